@@ -0,0 +1,224 @@
+"""
+Low-latency audio output.
+
+One PyAudio callback stream stays open on the selected output device. Audio
+to play is appended to a sample queue that the callback drains, so playback
+starts with the next callback (a few milliseconds) instead of after opening
+a stream or loading a file. Completion is signalled with events, and a
+waiter gives up if the device stops calling back. Pause, resume and stop
+take effect within one buffer.
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+import pyaudio
+
+from audio_utils import StreamingResampler, float32_to_pcm16
+
+OUTPUT_SAMPLE_RATE = 24000  # Kokoro, edge-tts and gTTS all produce 24 kHz speech
+
+
+def decode_file(path, sample_rate=OUTPUT_SAMPLE_RATE):
+    """
+    Decode an audio file (MP3, WAV, OGG...) to mono float32 at ``sample_rate``.
+
+    Uses pygame's decoder; the mixer is initialized on first use.
+    """
+    import pygame
+
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=sample_rate, channels=1)
+    frequency, _, channels = pygame.mixer.get_init()
+    samples = pygame.sndarray.array(pygame.mixer.Sound(path))
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    audio = samples.astype(np.float32) / 32768.0
+    if frequency != sample_rate:
+        resampler = StreamingResampler(frequency, sample_rate)
+        audio = np.concatenate([resampler.process(audio), resampler.flush()])
+    return audio
+
+
+class AudioOutput:
+    """
+    Plays mono float32 audio through a PyAudio callback stream.
+
+    :param sample_rate: Rate of everything passed to ``submit``/``play``.
+    :param audio: Shared ``pyaudio.PyAudio`` instance, or None to create one
+        when the stream is first opened (see also ``set_audio``).
+    :param device_index: Output device, or None for the default.
+    :param frames_per_buffer: Callback size; smaller starts playback sooner.
+    :param stall_timeout: Seconds without a device callback after which ``play``
+        gives up and drops the queue instead of waiting forever.
+    """
+
+    def __init__(self, sample_rate=OUTPUT_SAMPLE_RATE, audio=None, device_index=None, frames_per_buffer=512,
+                 stall_timeout=2.0):
+        self.sample_rate = sample_rate
+        self.device_index = device_index
+        self.frames_per_buffer = frames_per_buffer
+        self.stall_timeout = stall_timeout
+        self._own_audio = False
+        self.audio = audio
+        self._stream = None
+        self._lock = threading.Lock()
+        self._stream_lock = threading.RLock()  # Opening and closing; the callback never takes it
+        self._callbacks = 0  # Device callbacks so far, to notice a stalled stream
+        # int16 arrays to play, and events set once the audio queued before them has played
+        self._queue = collections.deque()
+        self._offset = 0  # Samples of _queue[0] already played
+        self._paused = False
+        self._stops = 0
+        self.output_latency = None  # Seconds reported by the device
+        self.last_start_latency = None  # Seconds from submit to the first callback that played it
+        self._submitted_at = None
+
+    @property
+    def paused(self):
+        return self._paused
+
+    @property
+    def active(self):
+        """True while audio is queued or playing."""
+        with self._lock:
+            return any(isinstance(item, np.ndarray) for item in self._queue)
+
+    def open(self, device_index=None):
+        """(Re)open the stream, e.g. after the output device was changed."""
+        with self._stream_lock:
+            self.close_stream()
+            if device_index is not None:
+                self.device_index = device_index
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
+                self._own_audio = True
+            self._stream = self.audio.open(format=pyaudio.paInt16, channels=1, rate=self.sample_rate, output=True,
+                                           output_device_index=self.device_index,
+                                           frames_per_buffer=self.frames_per_buffer,
+                                           stream_callback=self._callback)
+            self.output_latency = self._stream.get_output_latency()
+        return self
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        out = np.zeros(frame_count, dtype=np.int16)
+        with self._lock:
+            self._callbacks += 1
+            if self._paused:
+                return out.tobytes(), pyaudio.paContinue
+            filled = 0
+            while self._queue and (filled < frame_count or isinstance(self._queue[0], threading.Event)):
+                item = self._queue[0]
+                if isinstance(item, threading.Event):
+                    # Everything before this marker has been handed to the device
+                    item.set()
+                    self._queue.popleft()
+                    continue
+                if self._submitted_at is not None:
+                    self.last_start_latency = time.perf_counter() - self._submitted_at
+                    self._submitted_at = None
+                take = min(frame_count - filled, len(item) - self._offset)
+                out[filled:filled + take] = item[self._offset:self._offset + take]
+                filled += take
+                self._offset += take
+                if self._offset == len(item):
+                    self._queue.popleft()
+                    self._offset = 0
+        return out.tobytes(), pyaudio.paContinue
+
+    def submit(self, samples):
+        """Queue float32 samples behind whatever is already playing."""
+        with self._stream_lock:
+            if self._stream is None:
+                self.open()
+        pcm = float32_to_pcm16(samples)
+        if not len(pcm):
+            return
+        with self._lock:
+            if not any(isinstance(item, np.ndarray) for item in self._queue):
+                self._submitted_at = time.perf_counter()
+            self._queue.append(pcm)
+
+    def mark(self):
+        """Return an event that is set once everything queued so far has been played (or stopped)."""
+        done = threading.Event()
+        with self._lock:
+            if self._queue:
+                self._queue.append(done)
+            else:
+                done.set()
+        return done
+
+    def play(self, buffers):
+        """
+        Play each buffer as soon as the iterable yields it and wait for the end.
+
+        :param buffers: Iterable of float32 arrays, e.g. a ``KokoroTTS.stream`` generator.
+        :return: False if ``stop`` was called meanwhile or the device stalled, True otherwise.
+        """
+        stops = self._stops
+        for buffer in buffers:
+            if self._stops != stops:
+                return False
+            self.submit(buffer)
+        return self._wait(self.mark(), stops)
+
+    def _wait(self, done, stops):
+        """Wait for ``done``, giving up when stopped, when the stream is gone or when the device stalls."""
+        callbacks, progress_at = self._callbacks, time.monotonic()
+        while not done.wait(0.1):
+            if self._stops != stops:
+                return False
+            stream = self._stream
+            if stream is None or not stream.is_active():
+                break
+            if self._callbacks != callbacks:
+                callbacks, progress_at = self._callbacks, time.monotonic()
+            elif time.monotonic() - progress_at > self.stall_timeout + (self.output_latency or 0):
+                break
+        else:
+            return self._stops == stops
+        print("⚠️ Audio output stalled, dropping queued audio")
+        self.stop()
+        return False
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+
+    def stop(self):
+        """Drop everything queued and release anyone waiting in ``play``."""
+        with self._lock:
+            self._stops += 1
+            self._paused = False
+            for item in self._queue:
+                if isinstance(item, threading.Event):
+                    item.set()
+            self._queue.clear()
+            self._offset = 0
+            self._submitted_at = None
+
+    def close_stream(self):
+        with self._stream_lock:
+            if self._stream is not None:
+                self.stop()
+                self._stream.stop_stream()
+                self._stream.close()
+                self._stream = None
+
+    def set_audio(self, audio):
+        """Use another PyAudio instance, e.g. after PortAudio was re-initialized; reopens on next submit."""
+        self.close_stream()
+        if self._own_audio and self.audio is not None and self.audio is not audio:
+            self.audio.terminate()
+        self.audio = audio
+        self._own_audio = False
+
+    def close(self):
+        self.close_stream()
+        if self._own_audio:
+            self.audio.terminate()
@@ -0,0 +1,129 @@
+"""
+Audio conversion helpers shared by the capture and transcription paths.
+"""
+
+from math import gcd
+
+import numpy as np
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+class StreamingResampler:
+    """
+    Polyphase rational resampler that can be fed audio in arbitrary chunks.
+
+    Uses the same Kaiser-windowed FIR design as ``scipy.signal.resample_poly``,
+    but keeps the filter history and output phase between calls, so chunk
+    boundaries produce no edge artifacts and each input sample is filtered
+    exactly once.
+    """
+
+    def __init__(self, src_rate, dst_rate=WHISPER_SAMPLE_RATE, half_len=10):
+        g = gcd(int(src_rate), int(dst_rate))
+        self.up = int(dst_rate) // g
+        self.down = int(src_rate) // g
+        self.src_rate = src_rate
+        self.dst_rate = dst_rate
+
+        if self.up == self.down:
+            self._taps = None
+            return
+
+        # scipy.signal is slow to import, so only load it when resampling is needed
+        from scipy.signal import firwin, upfirdn
+        self._upfirdn = upfirdn
+
+        max_rate = max(self.up, self.down)
+        self._taps = firwin(2 * half_len * max_rate + 1, 1.0 / max_rate,
+                            window=('kaiser', 5.0)).astype(np.float32) * self.up
+        self.delay = (len(self._taps) - 1) // 2  # Group delay in upsampled samples
+        # Input samples spanned by the filter; that many are kept between chunks
+        self.phase_len = -(-len(self._taps) // self.up)
+        # Filters pre-shifted by 0..down-1 upsampled samples to align the output grid
+        self._shifted = [np.concatenate([np.zeros(shift, dtype=np.float32), self._taps])
+                         for shift in range(self.down)]
+        self.reset()
+
+    def reset(self):
+        if self._taps is None:
+            return
+        self._history = np.zeros(self.phase_len - 1, dtype=np.float32)
+        self._received = 0  # Input samples seen so far
+        self._next_out = 0  # Index of the next output sample
+
+    def process(self, samples):
+        """Resample a chunk of float32 audio and return the output available so far."""
+        samples = np.asarray(samples, dtype=np.float32)
+        if self._taps is None:
+            return samples
+
+        x = np.concatenate([self._history, samples])
+        base = self._received - len(self._history)  # Absolute index of x[0]
+        self._received += len(samples)
+
+        # Output k sits at upsampled position k*down + delay and needs input
+        # up to index (k*down + delay) // up, which must already have arrived.
+        last_out = (self._received * self.up - 1 - self.delay) // self.down
+        count = last_out + 1 - self._next_out
+        self._history = x[len(x) - (self.phase_len - 1):]
+        if count <= 0:
+            return np.zeros(0, dtype=np.float32)
+
+        # upfirdn evaluates the filter on its own grid of multiples of `down`
+        # starting at x[0]; delaying the taps by `shift` lines that grid up with
+        # the absolute output positions of this stream.
+        first = self._next_out * self.down + self.delay - base * self.up
+        shift = -first % self.down
+        start = (first + shift) // self.down
+        self._next_out = last_out + 1
+        out = self._upfirdn(self._shifted[shift], x, self.up, self.down)
+        return out[start:start + count].astype(np.float32, copy=False)
+
+    def flush(self):
+        """Push the filter tail out at the end of a stream."""
+        if self._taps is None:
+            return np.zeros(0, dtype=np.float32)
+        expected = -(-self._received * self.up // self.down)
+        out = self.process(np.zeros(self.delay // self.up + self.phase_len, dtype=np.float32))
+        out = out[:max(0, expected - (self._next_out - len(out)))]
+        self.reset()
+        return out
+
+
+def pcm16_to_float32(frames, sample_rate, resampler=None):
+    """
+    Convert int16 PCM to a 16 kHz float32 array in [-1, 1].
+
+    :param frames: An int16 numpy array, a bytes object or a list of byte chunks.
+    :param sample_rate: Capture rate of the frames.
+    :param resampler: Optional ``StreamingResampler`` carrying state across
+        chunks of the same stream; a one-shot resampler is used otherwise.
+    :return: Mono float32 numpy array ready for ``WhisperModel.transcribe``.
+    """
+    if isinstance(frames, (list, tuple)):
+        frames = b''.join(frames)
+    if not isinstance(frames, np.ndarray):
+        frames = np.frombuffer(frames, dtype=np.int16)
+    audio = frames.astype(np.float32) / 32768.0
+
+    if sample_rate != WHISPER_SAMPLE_RATE:
+        if resampler is None:
+            resampler = StreamingResampler(sample_rate)
+            return np.concatenate([resampler.process(audio), resampler.flush()])
+        audio = resampler.process(audio)
+
+    return audio
+
+
+def float32_to_pcm16(audio):
+    """Convert float32 samples in [-1, 1] to int16 PCM, clipping overshoots."""
+    audio = np.asarray(audio, dtype=np.float32)
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def rms(audio):
+    """Root-mean-square level of a float32 signal, on the int16 scale."""
+    if len(audio) == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(np.square(audio, dtype=np.float32)))) * 32768.0
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Headless batch transcription of recorded audio files.
+
+Files are spread across a pool of worker processes. Each worker loads the
+Whisper model once and uses faster-whisper's batched inference pipeline.
+Finished files are recorded in a manifest, so an interrupted run picks up
+where it left off.
+
+Usage:
+python voice2text.py batch recordings/ --model small --workers 2 --format jsonl srt
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.flac', '.m4a', '.ogg', '.opus')
+
+_worker_model = None
+_worker_options = {}
+
+
+def find_audio_files(paths):
+    """Expand files and directories into a sorted list of audio files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                files += [os.path.join(dirpath, f) for f in filenames if f.lower().endswith(AUDIO_EXTENSIONS)]
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"⚠️  Skipping missing path: {path}")
+    return sorted(os.path.abspath(f) for f in files)
+
+
+def file_key(path):
+    """Identify a file by path, size and mtime so edited recordings are redone."""
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+def load_manifest(manifest_path):
+    done = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line after a crash
+                if entry.get('status') == 'done':
+                    done[entry['key']] = entry
+    return done
+
+
+def append_manifest(manifest_path, entry):
+    with open(manifest_path, 'a') as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def format_timestamp(seconds):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+
+def write_atomic(path, content):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def output_names(files):
+    """
+    Output path (without extension, relative to the output directory) for each file.
+
+    Sub-directories below the files' common parent are mirrored, and files
+    that share a name up to the extension (``rec.wav``, ``rec.mp3``) keep
+    the extension. Any name that is still taken, ignoring case since output
+    folders may be case-insensitive, gets a ``-2``, ``-3``... suffix, so no
+    two inputs write the same transcript.
+    """
+    if not files:
+        return {}
+    try:
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+        relative = {path: os.path.relpath(os.path.abspath(path), root) for path in files}
+    except ValueError:  # Files on different Windows drives have no common parent
+        relative = {path: os.path.basename(path) for path in files}
+    stems = {path: os.path.splitext(name)[0] for path, name in relative.items()}
+    counts = {}
+    for stem in stems.values():
+        counts[stem.casefold()] = counts.get(stem.casefold(), 0) + 1
+
+    names, taken = {}, set()
+    for path in files:
+        name = relative[path] if counts[stems[path].casefold()] > 1 else stems[path]
+        unique, n = name, 2
+        while unique.casefold() in taken:
+            unique, n = f"{name}-{n}", n + 1
+        taken.add(unique.casefold())
+        names[path] = unique
+    return names
+
+
+def write_outputs(segments, name, output_dir, formats):
+    """Write ``<output_dir>/<name>.<format>`` for each format; ``name`` may contain sub-directories."""
+    stem = os.path.join(output_dir, name)
+    os.makedirs(os.path.dirname(stem), exist_ok=True)
+    outputs = []
+    if 'jsonl' in formats:
+        path = stem + ".jsonl"
+        lines = [json.dumps({"start": round(s['start'], 3), "end": round(s['end'], 3), "text": s['text']})
+                 for s in segments]
+        write_atomic(path, "\n".join(lines) + ("\n" if lines else ""))
+        outputs.append(path)
+    if 'srt' in formats:
+        path = stem + ".srt"
+        blocks = [f"{i}\n{format_timestamp(s['start'])} --> {format_timestamp(s['end'])}\n{s['text']}\n"
+                  for i, s in enumerate(segments, 1)]
+        write_atomic(path, "\n".join(blocks))
+        outputs.append(path)
+    return outputs
+
+
+def _init_worker(model_name, device, compute_type, cpu_threads, batch_size, language):
+    """Load the model once per worker process."""
+    global _worker_model, _worker_options
+    from whisper_models import create_whisper_model
+
+    model = create_whisper_model(model_name, device, compute_type, cpu_threads)
+    try:
+        from faster_whisper import BatchedInferencePipeline
+        _worker_model = BatchedInferencePipeline(model=model)
+        _worker_options = {"batch_size": batch_size}
+    except ImportError:
+        # faster-whisper < 1.1 has no batched pipeline
+        _worker_model = model
+        _worker_options = {}
+    if language:
+        _worker_options["language"] = language
+
+
+def _transcribe_file(path):
+    start = time.perf_counter()
+    segments, info = _worker_model.transcribe(path, **_worker_options)
+    segments = [{"start": s.start, "end": s.end, "text": s.text.strip()} for s in segments]
+    return {"segments": segments, "duration": info.duration, "language": info.language,
+            "elapsed": time.perf_counter() - start}
+
+
+def run_batch(files, output_dir, model_name="base", workers=1, batch_size=8, formats=('jsonl', 'srt'),
+              language=None, device=None, manifest_path=None):
+    """
+    Transcribe ``files`` into ``output_dir``, skipping those already in the manifest.
+
+    :return: Dict with file counts, audio seconds, wall seconds and audio-hours per hour.
+    """
+    from whisper_models import detect_device
+    from whisper_tuning import default_settings
+
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = manifest_path or os.path.join(output_dir, "manifest.jsonl")
+    done = load_manifest(manifest_path)
+    keys = {path: file_key(path) for path in files}
+    names = output_names(files)
+    pending = [path for path in files if keys[path] not in done]
+    print(f"{len(files)} files, {len(files) - len(pending)} already done, {len(pending)} to transcribe")
+    if not pending:
+        return {"files": 0, "failed": 0, "audio_seconds": 0.0, "wall_seconds": 0.0, "speed": 0.0}
+
+    device = device or detect_device()
+    workers = max(1, min(workers, len(pending)))
+    settings = default_settings(device)
+    # Split the cores between worker processes instead of oversubscribing
+    cpu_threads = 1 if device == "cuda" else max(1, (os.cpu_count() or 1) // workers)
+
+    audio_seconds = 0.0
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_name, device, settings["compute_type"], cpu_threads,
+                                       batch_size, language)) as pool:
+        futures = {pool.submit(_transcribe_file, path): path for path in pending}
+        for i, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ [{i}/{len(pending)}] {os.path.basename(path)}: {e}")
+                append_manifest(manifest_path, {"key": keys[path], "file": path, "status": "failed", "error": str(e)})
+                continue
+
+            try:
+                outputs = write_outputs(result["segments"], names[path], output_dir, formats)
+            except OSError as e:
+                failed += 1
+                print(f"❌ [{i}/{len(pending)}] {os.path.basename(path)}: could not write transcript: {e}")
+                append_manifest(manifest_path, {"key": keys[path], "file": path, "status": "failed", "error": str(e)})
+                continue
+            append_manifest(manifest_path, {"key": keys[path], "file": path, "status": "done",
+                                            "duration": result["duration"], "elapsed": result["elapsed"],
+                                            "outputs": outputs})
+            audio_seconds += result["duration"]
+            wall = time.perf_counter() - start
+            print(f"✅ [{i}/{len(pending)}] {os.path.basename(path)} ({result['duration']:.0f} s audio) "
+                  f"- {audio_seconds / wall:.1f} audio-h/h")
+
+    wall_seconds = time.perf_counter() - start
+    speed = audio_seconds / wall_seconds if wall_seconds > 0 else 0.0
+    return {"files": len(pending) - failed, "failed": failed, "audio_seconds": audio_seconds,
+            "wall_seconds": wall_seconds, "speed": speed}
+
+
+def add_parser(subparsers):
+    from whisper_models import WHISPER_MODELS
+
+    parser = subparsers.add_parser('batch', help='Transcribe recorded audio files')
+    parser.add_argument('paths', nargs='+', help='Audio files or directories')
+    parser.add_argument('-o', '--output-dir', default='transcripts', help='Where to write outputs (default: transcripts)')
+    parser.add_argument('-m', '--model', default='base', choices=WHISPER_MODELS, help='Whisper model (default: base)')
+    parser.add_argument('-w', '--workers', type=int, default=max(1, (os.cpu_count() or 2) // 4),
+                        help='Worker processes, each with its own model')
+    parser.add_argument('-b', '--batch-size', type=int, default=8, help='Batched inference size per worker')
+    parser.add_argument('-f', '--format', nargs='+', default=['jsonl', 'srt'], choices=['jsonl', 'srt'])
+    parser.add_argument('-l', '--language', default=None, help='Language code, auto-detected if omitted')
+    parser.add_argument('--device', choices=['cpu', 'cuda'], default=None)
+    parser.add_argument('--manifest', default=None, help='Manifest path (default: <output-dir>/manifest.jsonl)')
+    parser.set_defaults(func=main)
+    return parser
+
+
+def main(args):
+    files = find_audio_files(args.paths)
+    if not files:
+        print("❌ No audio files found")
+        return 1
+    stats = run_batch(files, args.output_dir, args.model, args.workers, args.batch_size, args.format,
+                      args.language, args.device, args.manifest)
+    hours = stats["audio_seconds"] / 3600
+    print(f"\nTranscribed {stats['files']} files ({hours:.2f} h of audio) in {stats['wall_seconds']:.0f} s "
+          f"- {stats['speed']:.1f} audio-hours per wall-clock hour")
+    if stats["failed"]:
+        print(f"❌ {stats['failed']} files failed, re-run to retry them")
+        return 1
+    return 0
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: window background rendering during a continuous resize.
+
+Simulates dragging the window corner, which fires one <Configure> event per
+frame, and reports the main-thread time spent per event:
+
+- old: per-pixel putpixel gradient rendered on every event
+- new: vectorized gradient, cached per size, rendered once after the drag
+  settles (each event only reschedules the redraw)
+
+When a display is available the ImageTk.PhotoImage conversion is included,
+otherwise only the PIL rendering is timed.
+
+Usage:
+python bench_gradient.py [events] [old_events]
+"""
+
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from gradient import GradientCache, gradient_image
+
+
+def old_gradient(width, height):
+    color1 = (0, 0, 0)
+    color2 = (0, 0, 51)
+    img = Image.new('RGB', (width, height), color1)
+    for y in range(height):
+        r = int(color1[0] + (color2[0] - color1[0]) * y / height)
+        g = int(color1[1] + (color2[1] - color1[1]) * y / height)
+        b = int(color1[2] + (color2[2] - color1[2]) * y / height)
+        for x in range(width):
+            img.putpixel((x, y), (r, g, b))
+    return img
+
+
+class FakeScheduler:
+    """Stands in for root.after/after_cancel so the debounce bookkeeping is timed too."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, ms, func, *args):
+        self.next_id += 1
+        self.jobs[self.next_id] = (func, args)
+        return self.next_id
+
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+
+    def run_pending(self):
+        for func, args in list(self.jobs.values()):
+            func(*args)
+        self.jobs.clear()
+
+
+def drag_sizes(events, start=(900, 800)):
+    return [(start[0] + 4 * i, start[1] + 3 * i) for i in range(events)]
+
+
+def report(name, frame_times):
+    ms = np.array(frame_times) * 1000
+    print(f"{name:<28} {len(ms):>4} events  mean {ms.mean():8.2f} ms  max {ms.max():8.2f} ms  "
+          f"busy {ms.sum():9.1f} ms")
+
+
+def main(events=60, old_events=5):
+    try:
+        import tkinter as tk
+        from PIL import ImageTk
+        root = tk.Tk()
+        root.withdraw()
+        to_photo = ImageTk.PhotoImage
+        print("Including ImageTk.PhotoImage conversion")
+    except Exception:
+        root = None
+        to_photo = lambda image: image
+        print("No display, timing PIL rendering only")
+
+    assert np.array_equal(np.asarray(old_gradient(90, 80)), np.asarray(gradient_image(90, 80))), \
+        "vectorized gradient differs from the putpixel version"
+
+    # Old: full putpixel render on every <Configure>
+    frame_times = []
+    for width, height in drag_sizes(old_events):
+        start = time.perf_counter()
+        to_photo(old_gradient(width, height))
+        frame_times.append(time.perf_counter() - start)
+    report("old (putpixel per event)", frame_times)
+
+    # Vectorized but still rendered on every event
+    frame_times = []
+    for width, height in drag_sizes(events):
+        start = time.perf_counter()
+        to_photo(gradient_image(width, height))
+        frame_times.append(time.perf_counter() - start)
+    report("vectorized per event", frame_times)
+
+    # New: debounced, one cached render after the drag
+    scheduler = FakeScheduler()
+    cache = GradientCache(lambda w, h: to_photo(gradient_image(w, h)))
+    job = None
+    frame_times = []
+
+    def apply_resize(width, height):
+        cache.get(width, height)
+
+    for width, height in drag_sizes(events):
+        start = time.perf_counter()
+        if job is not None:
+            scheduler.after_cancel(job)
+        job = scheduler.after(150, apply_resize, width, height)
+        frame_times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    scheduler.run_pending()
+    settle = time.perf_counter() - start
+    report("new (debounced, cached)", frame_times)
+    print(f"{'':<28} final render after settling: {settle * 1000:.2f} ms")
+
+    # Returning to a size already rendered
+    start = time.perf_counter()
+    cache.get(*drag_sizes(events)[-1])
+    print(f"{'':<28} cached size: {(time.perf_counter() - start) * 1000:.3f} ms")
+
+    if root is not None:
+        root.destroy()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+End-to-end dictation benchmark: replays WAV fixtures through the live pipeline.
+
+Each fixture is captured through a fake PyAudio input stream, at recording
+speed, into the same ring buffer, polling step and DictationSession
+(resampling, VAD gate, streaming Whisper) as ``VoiceApp.listen_loop``. At
+the end of each recording the transcript is sent through ``ChatSession`` to
+a stub Ollama server, so the turn latency covers everything on the client
+side of a reply without depending on a real LLM.
+
+Reported:
+- real-time factor: pipeline busy time / audio duration
+- partial and final latency percentiles: newest captured audio -> text
+- turn latency: end of the recording -> final text -> first reply token
+- peak RSS and CPU seconds per stage (resample, vad, whisper, finalize, llm)
+
+The results are compared with a baseline stored in bench_baseline.json. A
+metric that is worse by more than the tolerance fails the run (exit code 1).
+No baseline ships with the repository, since the numbers depend on the
+machine: record one per machine and configuration with --save-baseline
+first. Without one the run only reports, unless --require-baseline is given.
+
+Fixtures are the WAV files in bench_fixtures/ (any rate, mono or stereo);
+recordings of real speech give the most meaningful numbers. If the folder
+has none, deterministic voice-like clips are generated there.
+
+Usage:
+python bench_pipeline.py --save-baseline          # once, on a known-good revision
+python bench_pipeline.py [--model tiny] [--speed 1] [--tolerance 0.2] [--require-baseline]
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import ollama_client
+from ring_buffer import AudioRingBuffer
+from streaming import DictationSession, StreamingTranscriber
+from tracing import Tracer
+from vad import SpeechGate, create_vad
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_fixtures')
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+STEP_SECONDS = 0.5  # listen_loop's polling step
+FRAMES_PER_BUFFER = 1024
+
+# Lower is better for every metric; differences below the slack are noise
+METRIC_SLACK = {
+    "rtf": 0.02,
+    "partial_latency_p50_s": 0.05,
+    "partial_latency_p95_s": 0.05,
+    "final_latency_p50_s": 0.05,
+    "final_latency_p95_s": 0.05,
+    "turn_latency_p50_s": 0.05,
+    "peak_rss_mb": 20.0,
+    "cpu_resample_s": 0.02,
+    "cpu_vad_s": 0.02,
+    "cpu_whisper_s": 0.1,
+    "cpu_finalize_s": 0.02,
+    "cpu_llm_s": 0.02,
+}
+
+
+# --- Fixtures ---
+
+def make_fixtures(directory):
+    """Write deterministic voice-like recordings with pauses, at common capture rates."""
+    from whisper_tuning import calibration_clip
+
+    os.makedirs(directory, exist_ok=True)
+    for name, rate, layout in (("synthetic_44k.wav", 44100, [(1.0, False), (4.0, True), (1.5, False), (3.0, True), (2.0, False)]),
+                               ("synthetic_16k.wav", 16000, [(0.5, False), (6.0, True), (2.0, False)])):
+        parts = [calibration_clip(seconds, rate) if voiced else np.zeros(int(seconds * rate), dtype=np.float32)
+                 for seconds, voiced in layout]
+        write_wav(os.path.join(directory, name), np.concatenate(parts), rate)
+
+
+def write_wav(path, audio, rate):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+
+
+def read_wav(path):
+    """``(int16 mono samples, sample_rate)``; stereo is downmixed."""
+    with wave.open(path, 'rb') as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate, channels = f.getframerate(), f.getnchannels()
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return samples, rate
+
+
+# --- Fake capture device ---
+
+class FakeInputStream:
+    """Feeds a recording to a PyAudio stream callback at ``speed`` x real time (0 = as fast as possible)."""
+
+    def __init__(self, samples, rate, frames_per_buffer, callback, speed):
+        self.samples = samples
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = callback
+        self.speed = speed
+        self.captured_at = None  # perf_counter of the newest delivered buffer
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+
+    def start_stream(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        start = time.perf_counter()
+        for offset in range(0, len(self.samples), self.frames_per_buffer):
+            if self._stop.is_set():
+                break
+            chunk = self.samples[offset:offset + self.frames_per_buffer]
+            if self.speed > 0:
+                # A device delivers a buffer once it has been recorded
+                due = start + (offset + len(chunk)) / self.rate / self.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.callback(chunk.tobytes(), len(chunk), {}, 0)
+            self.captured_at = time.perf_counter()
+        self.finished.set()
+
+    def is_active(self):
+        return not self.finished.is_set()
+
+    def stop_stream(self):
+        self._stop.set()
+
+    def close(self):
+        self._stop.set()
+
+
+class FakePyAudio:
+    """The subset of ``pyaudio.PyAudio`` that listen_loop uses, playing a recording as the microphone."""
+
+    def __init__(self, samples, rate, speed=1.0):
+        self.samples = samples
+        self.rate = rate
+        self.speed = speed
+
+    def open(self, rate, input=True, frames_per_buffer=FRAMES_PER_BUFFER, stream_callback=None, **kwargs):
+        if rate != self.rate:
+            raise ValueError(f"Fixture is recorded at {self.rate} Hz, not {rate} Hz")
+        return FakeInputStream(self.samples, rate, frames_per_buffer, stream_callback, self.speed)
+
+    def terminate(self):
+        pass
+
+
+# --- Stub Ollama ---
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"models": [{"name": "stub"}]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b"{}")
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        if not request.get('messages'):
+            self._send_line({"done": True})  # keep_loaded / unload
+        else:
+            server = self.server
+            time.sleep(server.first_token_s)
+            for token in ("Sure", ",", " here", " is", " a", " reply", "."):
+                self._send_line({"message": {"role": "assistant", "content": token}, "done": False})
+                time.sleep(server.token_s)
+            prompt_tokens = sum(ollama_client.estimate_tokens(m.get('content', '')) for m in request['messages'])
+            self._send_line({"done": True, "prompt_eval_count": prompt_tokens,
+                             "prompt_eval_duration": int(server.first_token_s * 1e9),
+                             "eval_count": 7, "eval_duration": int(7 * server.token_s * 1e9)})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _send_line(self, obj):
+        data = (json.dumps(obj) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub_ollama(first_token_s, token_s):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+    server.daemon_threads = True
+    server.first_token_s = first_token_s
+    server.token_s = token_s
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# --- Measurement ---
+
+def peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        from whisper_models import process_rss_mb
+        return process_rss_mb()
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def replay(path, transcribe, chat, tracer, vad_backend, speed):
+    """
+    Run one fixture through capture, dictation and a chat turn; returns its measurements.
+
+    CPU time per stage comes from the spans ``DictationSession`` records, with
+    ``tracer`` on a process-wide CPU clock so Whisper's worker threads count.
+    """
+    samples, rate = read_wav(path)
+    audio_seconds = len(samples) / rate
+    pyaudio = FakePyAudio(samples, rate, speed)
+
+    # As in listen_loop: the callback fills a ring buffer that the loop polls
+    ring = AudioRingBuffer(rate * 60)
+    stream = pyaudio.open(rate=rate, input=True, frames_per_buffer=FRAMES_PER_BUFFER,
+                          stream_callback=lambda data, *args: ring.write_bytes(data) or (data, 0))
+    reader = ring.reader(0)
+
+    partial_latencies, final_latencies, finals = [], [], []
+    step_captured = [None]
+
+    def on_partial(text):
+        if text:
+            partial_latencies.append(time.perf_counter() - step_captured[0])
+
+    def on_final(text):
+        final_latencies.append(time.perf_counter() - step_captured[0])
+        finals.append(text)
+
+    turn = tracer.begin_turn("bench")
+    gate = SpeechGate(create_vad(vad_backend))
+    session = DictationSession(StreamingTranscriber(transcribe, language="en"), gate, rate,
+                               on_final=on_final, on_partial=on_partial, tracer=tracer, turn=turn)
+
+    busy = 0.0
+    stream.start_stream()
+    while not stream.finished.is_set():
+        if speed > 0:
+            time.sleep(STEP_SECONDS / speed)
+        else:
+            stream.finished.wait(0.01)
+        if reader.available() > 0:
+            step_captured[0] = stream.captured_at
+            start = time.perf_counter()
+            session.feed_pcm(reader.read())
+            busy += time.perf_counter() - start
+
+    # Stop dictation -> final text -> first reply token
+    end_of_capture = stream.captured_at
+    step_captured[0] = end_of_capture
+    start = time.perf_counter()
+    session.finish(reader.read())
+    busy += time.perf_counter() - start
+
+    transcript = " ".join(finals).strip() or "(no speech recognized)"
+    first_token = []
+    with tracer.span(turn, "llm"):
+        chat.ask(transcript, on_token=lambda token: first_token or first_token.append(time.perf_counter()))
+    cpu = dict(turn.totals)
+    tracer.end_turn(turn)
+    turn_latency = first_token[0] - end_of_capture if first_token else None
+
+    return {
+        "fixture": os.path.basename(path),
+        "audio_s": audio_seconds,
+        "busy_s": busy,
+        "partial_latencies": partial_latencies,
+        "final_latencies": final_latencies,
+        "turn_latency_s": turn_latency,
+        "cpu": cpu,
+        "speech_ratio": gate.speech_ratio,
+        "transcript": transcript,
+    }
+
+
+def summarize(runs):
+    audio = sum(r["audio_s"] for r in runs)
+    partials = [x for r in runs for x in r["partial_latencies"]]
+    finals = [x for r in runs for x in r["final_latencies"]]
+    turns = [r["turn_latency_s"] for r in runs if r["turn_latency_s"] is not None]
+    metrics = {
+        "rtf": sum(r["busy_s"] for r in runs) / audio,
+        "partial_latency_p50_s": percentile(partials, 50),
+        "partial_latency_p95_s": percentile(partials, 95),
+        "final_latency_p50_s": percentile(finals, 50),
+        "final_latency_p95_s": percentile(finals, 95),
+        "turn_latency_p50_s": statistics.median(turns) if turns else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    for run in runs:
+        for stage, seconds in run["cpu"].items():
+            metrics[f"cpu_{stage}_s"] = metrics.get(f"cpu_{stage}_s", 0.0) + seconds
+    return {k: v for k, v in metrics.items() if v is not None}
+
+
+def compare(metrics, baseline, tolerance):
+    """Names of metrics worse than the baseline by more than ``tolerance`` (relative) plus their slack."""
+    regressions = []
+    for name, base in baseline.items():
+        if name not in metrics or not isinstance(base, (int, float)):
+            continue
+        limit = base * (1 + tolerance) + METRIC_SLACK.get(name, 0.0)
+        marker = ""
+        if metrics[name] > limit:
+            regressions.append(name)
+            marker = "  ❌ regression"
+        print(f"  {name:<24} {metrics[name]:10.3f}  baseline {base:10.3f}{marker}")
+    return regressions
+
+
+def git_revision():
+    import subprocess
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def load_transcribe(model_name, device):
+    from whisper_models import create_whisper_model, detect_device
+    from whisper_tuning import default_settings
+
+    device = device or detect_device()
+    model = create_whisper_model(model_name, device=device, **default_settings(device))
+
+    def transcribe(audio, **kwargs):
+        segments, _ = model.transcribe(audio, **kwargs)
+        return list(segments)
+    return transcribe
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', default='tiny', help='Whisper model (default: tiny)')
+    parser.add_argument('--device', choices=['cpu', 'cuda'], default=None)
+    parser.add_argument('--vad', default='energy', help='VAD backend (default: energy, always available)')
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help='Folder of WAV recordings')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Capture speed, 1 = real time; 0 = as fast as possible (RTF only, no latencies)')
+    parser.add_argument('--llm-first-token-ms', type=float, default=150, help='Stub Ollama prefill time')
+    parser.add_argument('--llm-token-ms', type=float, default=20, help='Stub Ollama time per token')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown (default: 0.2)')
+    parser.add_argument('--require-baseline', action='store_true',
+                        help='Fail when there is no baseline for this configuration (for CI)')
+    parser.add_argument('--history', default=None, help='Append results to this JSONL file')
+    args = parser.parse_args()
+
+    fixtures = sorted(glob.glob(os.path.join(args.fixtures, '*.wav')))
+    if not fixtures:
+        print(f"No fixtures in {args.fixtures}, generating synthetic ones")
+        make_fixtures(args.fixtures)
+        fixtures = sorted(glob.glob(os.path.join(args.fixtures, '*.wav')))
+
+    print(f"Loading Whisper {args.model}...")
+    transcribe = load_transcribe(args.model, args.device)
+    server, url = start_stub_ollama(args.llm_first_token_ms / 1000, args.llm_token_ms / 1000)
+    chat = ollama_client.ChatSession(ollama_client.OllamaClient(url), "stub")
+
+    tracer = Tracer(clock=time.process_time)
+    runs = []
+    for path in fixtures:
+        run = replay(path, transcribe, chat, tracer, args.vad, args.speed)
+        runs.append(run)
+        print(f"{run['fixture']}: {run['audio_s']:.1f} s audio, RTF {run['busy_s'] / run['audio_s']:.3f}, "
+              f"{run['speech_ratio']:.0%} speech - {run['transcript'][:60]!r}")
+        with chat.lock:
+            chat.reset()
+    server.shutdown()
+
+    metrics = summarize(runs)
+    if args.speed <= 0:
+        # Without real-time capture the latencies only measure the replay itself
+        metrics = {k: v for k, v in metrics.items() if 'latency' not in k}
+    print("\nResults:")
+    for name, value in metrics.items():
+        print(f"  {name:<24} {value:10.3f}")
+
+    status = 0
+    baseline_key = f"{args.model}:{args.device or 'auto'}:{args.vad}:x{args.speed:g}"
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    if args.save_baseline:
+        baselines[baseline_key] = metrics
+        with open(args.baseline, 'w') as f:
+            json.dump(baselines, f, indent=2)
+        print(f"\n✅ Baseline {baseline_key} saved to {args.baseline}")
+    elif baseline_key in baselines:
+        print(f"\nCompared with baseline {baseline_key} (tolerance {args.tolerance:.0%}):")
+        regressions = compare(metrics, baselines[baseline_key], args.tolerance)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions: {', '.join(regressions)}")
+            status = 1
+        else:
+            print("✅ No regressions")
+    else:
+        print(f"\nNo baseline for {baseline_key}; create one with --save-baseline")
+        if args.require_baseline:
+            print("❌ --require-baseline is set")
+            status = 1
+
+    if args.history:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps({"revision": git_revision(), "time": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                "config": baseline_key, **metrics}) + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
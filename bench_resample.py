@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: FFT resampling per chunk vs the streaming polyphase resampler.
+
+Compares the old listen_loop path (scipy.signal.resample on every chunk,
+truncated to int16) with StreamingResampler, reporting CPU time per second
+of captured audio and the worst deviation from resampling the whole
+recording in one go (chunk-edge artifacts show up there).
+
+Usage:
+python bench_resample.py [seconds] [chunk_seconds]
+"""
+
+import sys
+import time
+
+import numpy as np
+from scipy.signal import resample, resample_poly
+
+from audio_utils import StreamingResampler, WHISPER_SAMPLE_RATE
+
+
+def old_path(audio, rate, chunk):
+    out = []
+    for i in range(0, len(audio), chunk):
+        data = audio[i:i + chunk]
+        target_samples = int(len(data) * WHISPER_SAMPLE_RATE / rate)
+        out.append(resample(data, target_samples).astype(np.int16))
+    return np.concatenate(out).astype(np.float32) / 32768.0
+
+
+def new_path(audio, rate, chunk):
+    resampler = StreamingResampler(rate)
+    out = []
+    for i in range(0, len(audio), chunk):
+        out.append(resampler.process(audio[i:i + chunk].astype(np.float32) / 32768.0))
+    out.append(resampler.flush())
+    return np.concatenate(out)
+
+
+def max_error(result, reference):
+    n = min(len(result), len(reference))
+    return float(np.max(np.abs(result[:n] - reference[:n])))
+
+
+def measure(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.process_time()
+        func(*args)
+        best = min(best, time.process_time() - start)
+    return best
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    chunk_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+    print("Resampler Benchmark")
+    print("===================")
+    print(f"{seconds:.0f} s of audio in {chunk_seconds} s chunks\n")
+    print(f"{'rate':>7}  {'resample ms/s':>13}  {'polyphase ms/s':>14}  {'resample err':>12}  {'polyphase err':>13}")
+
+    rng = np.random.default_rng(0)
+    for rate in (48000, 44100, 32000, 22050, 16000):
+        t = np.arange(int(rate * seconds)) / rate
+        audio = (np.sin(2 * np.pi * 440 * t) * 8000 + rng.standard_normal(len(t)) * 1000).astype(np.int16)
+        chunk = int(rate * chunk_seconds)
+        if rate == WHISPER_SAMPLE_RATE:
+            # Negotiated native capture: the old path skipped resampling too
+            new = measure(new_path, audio, rate, chunk) / seconds * 1000
+            print(f"{rate:>7}  {'-':>13}  {new:>14.2f}  {'-':>12}  {'0':>13}")
+            continue
+        reference = resample_poly(audio.astype(np.float32) / 32768.0, WHISPER_SAMPLE_RATE, rate)
+        old = measure(old_path, audio, rate, chunk) / seconds * 1000
+        new = measure(new_path, audio, rate, chunk) / seconds * 1000
+        old_err = max_error(old_path(audio, rate, chunk), reference)
+        new_err = max_error(new_path(audio, rate, chunk), reference)
+        print(f"{rate:>7}  {old:>13.2f}  {new:>14.2f}  {old_err:>12.4f}  {new_err:>13.4f}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import time, time-to-first-window and frozen bundle size.
+
+Import time comes from ``python -X importtime`` in a fresh interpreter, so
+the slowest top-level imports are listed by cumulative time. Time to first
+window is measured from launching a fresh interpreter until the VoiceApp
+window is mapped (needs a display). The bundle size is that of a PyInstaller
+build (``pyinstaller voice_app.spec``), if one exists.
+
+Results can be appended to a JSONL file to track them across changes.
+
+Usage:
+python bench_startup.py [--module voice_app] [--runs 3] [--bundle dist/Voice2Text] [--history startup.jsonl]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+WINDOW_SCRIPT = """
+import os, sys, time
+import tkinter as tk
+import voice_app
+root = tk.Tk()
+def mapped(event):
+    if event.widget is root:
+        print(time.time(), flush=True)
+        os._exit(0)
+root.bind('<Map>', mapped)
+voice_app.VoiceApp(root)
+root.mainloop()
+"""
+
+
+def import_times(module):
+    """Return (wall seconds, [(cumulative us, self us, name)]) for importing ``module``."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level after the separator's space
+        entries.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    return wall, entries
+
+
+def time_to_first_window(timeout=60):
+    """Seconds from launching the interpreter until the main window is mapped, or None."""
+    if sys.platform.startswith('linux') and not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY'):
+        return None
+    start = time.time()
+    result = subprocess.run([sys.executable, '-c', WINDOW_SCRIPT], capture_output=True, text=True, timeout=timeout)
+    for line in reversed(result.stdout.strip().splitlines()):
+        try:
+            return float(line) - start
+        except ValueError:
+            continue
+    raise RuntimeError((result.stderr.strip().splitlines() or ["window never appeared"])[-1])
+
+
+def bundle_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in filenames)
+    return total
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--module', default='voice_app', help='Module to import (default: voice_app)')
+    parser.add_argument('--runs', type=int, default=3, help='Repetitions; the median is reported')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports to list')
+    parser.add_argument('--bundle', default=None, help='PyInstaller output to measure (e.g. dist/Voice2Text)')
+    parser.add_argument('--history', default=None, help='Append results to this JSONL file')
+    args = parser.parse_args()
+
+    results = {"revision": git_revision(), "time": time.strftime('%Y-%m-%dT%H:%M:%S'), "module": args.module}
+
+    try:
+        runs = [import_times(args.module) for _ in range(args.runs)]
+    except RuntimeError as e:
+        print(f"❌ import {args.module} failed: {e}")
+        return 1
+    walls = [wall for wall, _ in runs]
+    totals = [sum(c for c, _, name in entries if name == args.module) for _, entries in runs]
+    results["interpreter_and_import_s"] = statistics.median(walls)
+    results["import_s"] = statistics.median(totals) / 1e6
+    print(f"import {args.module}: {results['import_s'] * 1000:.0f} ms "
+          f"(interpreter + import {results['interpreter_and_import_s'] * 1000:.0f} ms, median of {args.runs})")
+
+    # Slowest top-level imports from the last run
+    top_level = sorted((e for e in runs[-1][1] if not e[2].startswith(' ')), reverse=True)[:args.top]
+    results["slowest_imports"] = {name.strip(): cumulative / 1e6 for cumulative, _, name in top_level}
+    for cumulative, self_us, name in top_level:
+        print(f"  {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+    window = None
+    if args.module == 'voice_app':
+        try:
+            window = time_to_first_window()
+            if window is None:
+                print("Time to first window: skipped (no display)")
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"⚠️  Time to first window failed: {e}")
+    if window is not None:
+        results["first_window_s"] = window
+        print(f"Time to first window: {window * 1000:.0f} ms")
+
+    if args.bundle:
+        if os.path.exists(args.bundle):
+            results["bundle_mb"] = bundle_size(args.bundle) / 1024 / 1024
+            print(f"Bundle size: {results['bundle_mb']:.0f} MB ({args.bundle})")
+        else:
+            print(f"⚠️  {args.bundle} not found, build it with: pyinstaller voice_app.spec")
+
+    if args.history:
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(results) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Client for the local transcription daemon (``python voice2text.py daemon``).
+
+Front ends use it to hand recognition to the daemon's resident model
+instead of loading Whisper in their own process. ``health`` is a quick
+probe, so a client can fall back to a local model when no daemon runs.
+"""
+
+import json
+import threading
+
+import requests
+
+import ws_protocol
+from audio_utils import float32_to_pcm16
+
+DEFAULT_URL = 'http://127.0.0.1:8765'
+
+
+class DaemonStream:
+    """
+    A live transcription stream.
+
+    :param ws: Connected ``ws_protocol.WebSocket``.
+    :param on_event: ``on_event(event)`` for each event dict the daemon sends
+        (``partial``, ``final``, ``utterance_end``, ``status``, ``done``);
+        called from a reader thread.
+    """
+
+    def __init__(self, ws, on_event):
+        self.ws = ws
+        self.on_event = on_event
+        self.silence_seconds = 0.0
+        self.done = threading.Event()
+        self.error = None
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        try:
+            while True:
+                message = self.ws.receive()
+                if message is None:
+                    break
+                event = json.loads(message)
+                if event.get('type') == 'status':
+                    self.silence_seconds = event.get('silence_seconds', 0.0)
+                self.on_event(event)
+                if event.get('type') == 'done':
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+    def send_audio(self, audio):
+        """Send float32 16 kHz samples."""
+        if len(audio):
+            self.ws.send_binary(float32_to_pcm16(audio).tobytes())
+
+    def finish(self, timeout=30.0):
+        """
+        Flush the daemon's pending text, wait for its last events and close.
+
+        Call it once; if the daemon does not answer within ``timeout``,
+        ``error`` is set to a ``TimeoutError``.
+        """
+        try:
+            if not self.done.is_set():
+                self.ws.send_json({"type": "end"})
+                if not self.done.wait(timeout):
+                    self.error = self.error or TimeoutError(f"No final text from the daemon after {timeout:g} s")
+        finally:
+            self.close()
+
+    def close(self):
+        """Close the connection without waiting; safe to call more than once."""
+        self.ws.close()
+
+
+class DaemonClient:
+    """:param url: Base URL of the daemon, ``http://host:port`` (None for ``DEFAULT_URL``)."""
+
+    def __init__(self, url=None):
+        self.url = (DEFAULT_URL if url is None else url).rstrip('/')
+        self.session = requests.Session()
+
+    def health(self, timeout=0.5):
+        """The daemon's status dict, or None if it is not running."""
+        try:
+            response = self.session.get(f"{self.url}/health", timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+
+    def transcribe(self, audio_file, filename='audio.wav', model=None, language=None, prompt=None, timeout=120):
+        """
+        Transcribe an audio file through ``/v1/audio/transcriptions``.
+
+        :param audio_file: Encoded audio (WAV, MP3...) as bytes or a binary file.
+        :return: The transcribed text.
+        """
+        data = {"response_format": "json"}
+        if model:
+            data["model"] = model
+        if language:
+            data["language"] = language
+        if prompt:
+            data["prompt"] = prompt
+        response = self.session.post(f"{self.url}/v1/audio/transcriptions", data=data,
+                                     files={"file": (filename, audio_file)}, timeout=timeout)
+        response.raise_for_status()
+        return response.json()["text"]
+
+    def stream(self, on_event, model=None, language='en', timeout=60.0):
+        """
+        Open a live stream. Connecting may load the model on the daemon, hence the long timeout.
+
+        :return: A ``DaemonStream``.
+        """
+        query = f"language={language}" + (f"&model={model}" if model else "")
+        ws_url = "ws" + self.url[len("http"):] + "/v1/audio/stream?" + query
+        return DaemonStream(ws_protocol.connect(ws_url, timeout=timeout), on_event)
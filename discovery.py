@@ -0,0 +1,195 @@
+"""
+Background discovery of audio devices and Ollama models.
+
+Initializing PortAudio probes every host API and device, and asking Ollama
+for its models waits for a timeout when the server is down, so neither may
+run before the window is shown. The last results are kept on disk and shown
+immediately at the next launch; a background thread then refreshes them:
+the models periodically, the devices whenever the sound hardware changes
+(or periodically where that cannot be detected cheaply).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+CACHE_PATH = os.path.expanduser('~/.cache/voice2text/discovery.json')
+
+
+def list_audio_devices(audio):
+    """
+    Input and output devices of a ``pyaudio.PyAudio`` instance, in one pass.
+
+    :return: ``(inputs, outputs)``, lists of ``"Name (Index: n)"`` strings.
+    """
+    inputs, outputs = [], []
+    for i in range(audio.get_device_count()):
+        info = audio.get_device_info_by_index(i)
+        label = f"{info.get('name')} (Index: {i})"
+        if int(info.get('maxInputChannels', 0)) > 0:
+            inputs.append(label)
+        if int(info.get('maxOutputChannels', 0)) > 0:
+            outputs.append(label)
+    return inputs, outputs
+
+
+def device_name(label):
+    """``"Name (Index: n)"`` -> ``"Name"``."""
+    head, sep, _ = label.rpartition(' (Index: ')
+    return head if sep else label
+
+
+def match_device(saved, devices):
+    """
+    Entry of ``devices`` for a saved selection, or None.
+
+    Indices change when devices come and go, so an exact match is preferred
+    and the same device name at another index is accepted.
+    """
+    if saved in devices:
+        return saved
+    name = device_name(saved)
+    for label in devices:
+        if device_name(label) == name:
+            return label
+    return None
+
+
+def hardware_signature():
+    """
+    Cheap fingerprint of the attached sound hardware, or None where unknown.
+
+    PortAudio only sees a hot-plugged device after it is re-initialized,
+    which is too slow to do on a timer; listing the kernel's sound device
+    nodes is not.
+    """
+    if sys.platform.startswith('linux') and os.path.isdir('/dev/snd'):
+        return sorted(os.listdir('/dev/snd'))
+    return None
+
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(data, path=CACHE_PATH):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not save discovery cache: {e}")
+
+
+class Discovery:
+    """
+    Refreshes the device and model lists on a background thread.
+
+    Callbacks run on the discovery thread, only when a result differs from
+    the previous one (the first result always counts).
+
+    :param list_devices: ``list_devices(rescan)`` returning ``(inputs, outputs)``.
+        ``rescan`` is True after the hardware changed; return None if
+        PortAudio cannot be re-initialized right now and it is retried later.
+    :param list_models: Returns the model names; raises when Ollama is unreachable.
+    :param on_devices: ``on_devices(inputs, outputs)``.
+    :param on_models: ``on_models(models, error)``; ``error`` is None on success.
+    :param interval: Seconds between model refreshes and hardware checks.
+    :param device_interval: Seconds between device refreshes where hot-plug cannot be detected.
+    """
+
+    def __init__(self, list_devices, list_models, on_devices, on_models,
+                 interval=30.0, device_interval=300.0, cache_path=CACHE_PATH):
+        self.list_devices = list_devices
+        self.list_models = list_models
+        self.on_devices = on_devices
+        self.on_models = on_models
+        self.interval = interval
+        self.device_interval = device_interval
+        self.cache_path = cache_path
+        self.cache = load_cache(cache_path)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._force_devices = False
+        self._thread = None
+        self._devices = None
+        self._models = None  # (models, error) last reported
+
+    def cached_devices(self):
+        """``(inputs, outputs)`` found at the previous launch."""
+        return list(self.cache.get('input_devices', [])), list(self.cache.get('output_devices', []))
+
+    def cached_models(self):
+        return list(self.cache.get('ollama_models', []))
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def refresh(self, devices=False):
+        """Query Ollama again now, and the devices too if ``devices``."""
+        self._force_devices = self._force_devices or devices
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        signature = None
+        devices_time = None
+        while not self._stop.is_set():
+            current = hardware_signature()
+            changed = devices_time is not None and current != signature
+            due = devices_time is None or (current is None and time.monotonic() - devices_time >= self.device_interval)
+            if changed or due or self._force_devices:
+                self._force_devices = False
+                if self._discover_devices(rescan=changed):
+                    signature = current
+                    devices_time = time.monotonic()
+            self._discover_models()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _discover_devices(self, rescan):
+        try:
+            result = self.list_devices(rescan)
+        except Exception as e:
+            print(f"Device discovery failed: {e}")
+            return False
+        if result is None:
+            return False
+        inputs, outputs = list(result[0]), list(result[1])
+        if (inputs, outputs) != self._devices:
+            self._devices = (inputs, outputs)
+            self._update_cache(input_devices=inputs, output_devices=outputs)
+            self.on_devices(inputs, outputs)
+        return True
+
+    def _discover_models(self):
+        try:
+            result = (list(self.list_models()), None)
+        except Exception as e:
+            result = ([], e)
+        # Report a change of models or of the error kind, not every failed poll
+        key = (result[0], type(result[1]).__name__ if result[1] else None)
+        if key == self._models:
+            return
+        self._models = key
+        if result[1] is None:
+            self._update_cache(ollama_models=result[0])
+        self.on_models(*result)
+
+    def _update_cache(self, **values):
+        self.cache.update(values, updated=time.time())
+        save_cache(self.cache, self.cache_path)
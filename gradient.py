@@ -0,0 +1,56 @@
+"""
+Window background rendering.
+
+The vertical gradient is computed once per row with NumPy and broadcast
+across the width, instead of one ``putpixel`` call per pixel. Rendered sizes
+are cached, so returning to a previous window size costs nothing.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+
+def gradient_array(width, height, top=(0, 0, 0), bottom=(0, 0, 51)):
+    """
+    ``height x width x 3`` uint8 array fading from ``top`` to ``bottom``.
+
+    Row ``y`` has colour ``int(top + (bottom - top) * y / height)``, the same
+    values the old per-pixel loop produced.
+    """
+    y = np.arange(height, dtype=np.float64)[:, None]
+    top = np.asarray(top, dtype=np.float64)
+    bottom = np.asarray(bottom, dtype=np.float64)
+    # Same operation order as the loop, so the floats round the same way
+    rows = (top + (bottom - top) * y / max(height, 1)).astype(np.uint8)  # Truncates like int()
+    return np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (height, width, 3)))
+
+
+def gradient_image(width, height, top=(0, 0, 0), bottom=(0, 0, 51)):
+    from PIL import Image
+    return Image.fromarray(gradient_array(width, height, top, bottom), 'RGB')
+
+
+class GradientCache:
+    """
+    Keeps the last few rendered backgrounds, keyed by size.
+
+    :param render: ``render(width, height)`` returning the object to cache,
+        e.g. an ``ImageTk.PhotoImage`` so the Tk conversion is cached too.
+    :param max_entries: Sizes kept before the least recently used is dropped.
+    """
+
+    def __init__(self, render, max_entries=4):
+        self.render = render
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, width, height):
+        key = (width, height)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        image = self._entries[key] = self.render(width, height)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return image
@@ -1,11 +1,13 @@
-from kokoro import KPipeline
+import threading
+
 import numpy as np
-import soundfile as sf
+
+KOKORO_SAMPLE_RATE = 24000
 
 KOKORO_VOICES = ['af_alloy', 'af_aoede', 'af_bella', 'af_heart', 'af_jessica', 'af_kore', 'af_nicole', 'af_nova', 'af_river', 'af_sarah', 'af_sky', 'am_adam', 'am_echo', 'am_eric', 'am_fenrir', 'am_liam', 'am_michael', 'am_onyx', 'am_puck', 'bf_alice', 'bf_emma', 'bf_isabella', 'bf_lily', 'bm_daniel', 'bm_fable', 'bm_george', 'bm_lewis']
 
 def load_numpy_kpipeline():
-    import numpy as np
+    from kokoro import KPipeline
     return np, KPipeline
 
 
@@ -17,12 +19,50 @@ class KokoroTTS:
         self.speed = speed
         self.output_format = output_format
         self.device = device
+        # Imported here: kokoro pulls in torch, which apps only pay for once Kokoro is used
+        from kokoro import KPipeline
         self.KPipeline = KPipeline
         self.tts = self.KPipeline(
             lang_code=self.lang_code, repo_id="hexgrad/Kokoro-82M", device=self.device
         )
-        
-    def synthesize(self, text, voice, output_path, split_pattern=None):
+        # KPipeline is not thread-safe; one synthesis at a time per engine
+        self.lock = threading.Lock()
+
+    def preload_voice(self, voice):
+        """Load a voice pack now so the first sentence spoken with it does not pay for it."""
+        with self.lock:
+            self.tts.load_voice(voice)
+
+    def stream(self, text, voice, split_pattern=None, speed=None):
+        """
+        Yield speech for ``text`` as float32 arrays at ``KOKORO_SAMPLE_RATE``.
+
+        Each segment is yielded as soon as the pipeline produces it, so playback
+        can start before the rest of the text is synthesized. The engine lock
+        is only held while a segment is being generated.
+
+        :param text: The text to be synthesized.
+        :param voice: The voice model to use for synthesis.
+        :param split_pattern: Optional pattern to split text into smaller chunks.
+        :param speed: Overrides the engine's default speed for this call.
+        """
+        with self.lock:
+            generator = self.tts(
+                text, voice=voice, speed=speed or self.speed, split_pattern=split_pattern
+            )
+        while True:
+            with self.lock:
+                result = next(generator, None)
+            if result is None:
+                return
+            gs, ps, audio = result
+            if audio is not None:
+                # KPipeline yields torch tensors
+                if hasattr(audio, 'numpy'):
+                    audio = audio.detach().cpu().numpy()
+                yield np.asarray(audio, dtype=np.float32)
+
+    def synthesize(self, text, voice, output_path, split_pattern=None, speed=None):
         """
         Generate speech from text and save it as a WAV file.
 
@@ -30,18 +70,33 @@ class KokoroTTS:
         :param voice: The voice model to use for synthesis.
         :param output_path: Path to save the WAV file.
         :param split_pattern: Optional pattern to split text into smaller chunks.
+        :param speed: Overrides the engine's default speed for this call.
         """
+        audio_segments = list(self.stream(text, voice, split_pattern=split_pattern, speed=speed))
+        audio = np.concatenate(audio_segments)
 
-        generator = self.tts(
-            text, voice=voice, speed=self.speed, split_pattern=split_pattern
-        )
-        audio_segments = []
-        for gs, ps, audio in generator:
-            if audio is not None:
-                    # Only convert if it's a numpy array, not if already tensor
-                    audio_tensor = audio 
+        import soundfile as sf
+        sf.write(output_path, audio, KOKORO_SAMPLE_RATE, format=self.output_format)
 
-                    audio_segments.append(audio_tensor)
-        audio = np.concatenate(audio_segments)
-        
-        sf.write(output_path, audio, 24000, format=self.output_format)
\ No newline at end of file
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_kokoro(lang_code="a", device="cpu", voice=None):
+    """
+    Return the process-wide KokoroTTS for ``lang_code`` and ``device``.
+
+    The pipeline and model are loaded once per process; later calls only pay
+    for inference.
+
+    :param voice: Optional voice to preload, e.g. ``"af_heart"``.
+    """
+    key = (lang_code, device)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = _engines[key] = KokoroTTS(lang_code=lang_code, device=device)
+    if voice:
+        engine.preload_voice(voice)
+    return engine
@@ -10,10 +10,17 @@ import pyaudio
 import re
 import os
 import time
-from gtts import gTTS
-import pygame
+import tempfile
+import numpy as np
 import audioop
-from kokoro_tts import KokoroTTS, KOKORO_VOICES
+from kokoro_tts import KOKORO_SAMPLE_RATE, KOKORO_VOICES, get_kokoro
+from audio_output import AudioOutput, decode_file
+import discovery
+from tts_cache import TTSCache
+import ollama_client
+from tts_pipeline import SentenceSplitter, SpeechPipeline
+from ui_dispatcher import UIDispatcher
+from daemon_client import DEFAULT_URL as DAEMON_URL, DaemonClient
 
 class DictationApp:
     def __init__(self, root):
@@ -22,26 +29,48 @@ class DictationApp:
         self.root.geometry("700x600")
         self.root.configure(bg='#333333')
 
+        # Worker threads post GUI updates here instead of touching widgets
+        self.ui = UIDispatcher(self.root)
+        self.ui.register("status", lambda text: self.status_var.set(text), merge="last")
+        self.ui.register("text", self.show_text, merge="concat")
+        self.ui.register("clear_text", lambda: self.text_area.delete(1.0, tk.END))
+        self.ui.register("pause_label", lambda text: self.pause_tts_button.config(text=text), merge="last")
+        self.ui.register("devices", self.update_devices, merge="last")
+        self.ui.register("models", self.update_models, merge="last")
+
         # Config
         self.config_file = 'config.json'
         self.config = self.load_config()
 
+        # Audio devices and Ollama models are discovered in the background; until then
+        # the lists found at the previous launch are shown
+        self.discovery = discovery.Discovery(
+            self.list_audio_devices, lambda: self.ollama.list_models(timeout=5),
+            on_devices=lambda inputs, outputs: self.ui.post("devices", inputs, outputs),
+            on_models=lambda models, error: self.ui.post("models", models, error))
+
         # Audio devices
-        self.input_devices = self.get_audio_devices('input')
-        self.output_devices = self.get_audio_devices('output')
+        self.input_devices, self.output_devices = self.discovery.cached_devices()
         self.selected_input = tk.StringVar(value=self.config.get('input_device', ''))
         self.selected_output = tk.StringVar(value=self.config.get('output_device', ''))
 
+        # Ollama: one pooled client, keep_alive keeps the selected model loaded between turns
+        self.ollama_url = self.config.get('ollama_url')  # None: OLLAMA_HOST or localhost
+        self.ollama = ollama_client.configure(self.ollama_url, self.config.get('ollama_keep_alive'))
+
         # Ollama models
-        self.models = self.get_ollama_models()
+        self.models = self.discovery.cached_models()
         self.selected_model = tk.StringVar(value=self.config.get('model', ''))
 
         # Status and GPU
         self.status_var = tk.StringVar(value="Ready")
         self.gpu_var = tk.StringVar(value="GPU: Checking...")
 
-        # Recognition method
+        # Recognition method; 'Whisper daemon' uses the model resident in `voice2text.py daemon`
         self.recognizer_method = tk.StringVar(value=self.config.get('recognizer', 'Google'))
+        # Set transcription_daemon to "" to disable it
+        self.daemon_url = self.config.get('transcription_daemon', DAEMON_URL)
+        self.daemon = DaemonClient(self.daemon_url) if self.daemon_url else None
 
         # TTS engine
         self.tts_engine = tk.StringVar(value=self.config.get('tts_engine', 'gTTS'))
@@ -60,18 +89,39 @@ class DictationApp:
         self.recognizer.pause_threshold = 1.5  # Allow longer pauses
         self.is_listening = False
 
-        # TTS
-        self.current_channel = None
+        # Set to stop a streaming Ollama reply
+        self.ollama_cancel = threading.Event()
+
+        # TTS, latency is measured from the end of the user's turn to first audio
+        self.turn_start = time.perf_counter()
+        self.first_audio_latency = None
+        self.speech_pipeline = None
         self.tts_paused = False
-        pygame.mixer.init()
+        # pygame only decodes MP3s (decode_file starts its mixer on first use),
+        # playback goes through a PyAudio callback stream
 
         # VU
         self.monitor_stream = None
-        self.pyaudio_instance = pyaudio.PyAudio()
+        self.pyaudio_instance = None  # Initialized by the discovery thread
+        self.audio_lock = threading.Lock()
+
+        # Speech is played from memory on the selected output device
+        self.output = AudioOutput(device_index=self.get_device_index(self.selected_output.get()))
+
+        # Synthesized sentences are kept in a size-capped cache
+        self.tts_cache = TTSCache(max_bytes=self.config.get('tts_cache_mb', 200) * 1024 * 1024)
+        # Print cache and UI statistics to the console on exit
+        self.verbose = self.config.get('verbose', False)
 
         # Bind save on close
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        # Load the saved Kokoro voice in the background
+        self.on_voice_change()
+
+        self.ui.start()
+        self.discovery.start()
+
 
 
     def load_config(self):
@@ -90,7 +140,12 @@ class DictationApp:
             'model': self.selected_model.get(),
             'recognizer': self.recognizer_method.get(),
             'tts_engine': self.tts_engine.get(),
-            'voice': self.selected_voice.get()
+            'voice': self.selected_voice.get(),
+            'ollama_url': self.ollama_url,
+            'ollama_keep_alive': self.ollama.keep_alive,
+            'transcription_daemon': self.daemon_url,
+            'tts_cache_mb': self.tts_cache.max_bytes // (1024 * 1024),
+            'verbose': self.verbose
         }
         try:
             with open(self.config_file, 'w') as f:
@@ -102,7 +157,14 @@ class DictationApp:
         self.save_config()
         # if self.monitor_stream:
         #     self.monitor_stream.close()
-        self.pyaudio_instance.terminate()
+        self.discovery.stop()
+        with self.audio_lock:
+            self.output.close()
+            if self.pyaudio_instance is not None:
+                self.pyaudio_instance.terminate()
+        if self.verbose:
+            print(self.tts_cache.summary())
+            print(self.ui.summary())
         self.root.destroy()
 
     def update_vu(self):
@@ -134,18 +196,17 @@ class DictationApp:
         tk.Label(self.root, text="Input Device (Microphone):", bg='#333333', fg='white', font=('Helvetica', 10, 'bold'), relief='flat').grid(row=0, column=0, pady=5, padx=10, sticky='w')
         self.input_combo = ttk.Combobox(self.root, textvariable=self.selected_input, values=self.input_devices)
         self.input_combo.grid(row=0, column=1, pady=5, padx=10, sticky='ew')
-        if self.selected_input.get() not in self.input_devices and self.input_devices:
-            self.selected_input.set(self.input_devices[0])
+        self.select_device(self.selected_input, self.input_devices)
 
         tk.Label(self.root, text="Output Device (Speakers):", bg='#333333', fg='white', font=('Helvetica', 10, 'bold'), relief='flat').grid(row=1, column=0, pady=5, padx=10, sticky='w')
         self.output_combo = ttk.Combobox(self.root, textvariable=self.selected_output, values=self.output_devices)
         self.output_combo.grid(row=1, column=1, pady=5, padx=10, sticky='ew')
-        if self.selected_output.get() not in self.output_devices and self.output_devices:
-            self.selected_output.set(self.output_devices[0])
+        self.output_combo.bind('<<ComboboxSelected>>', self.on_output_change)
+        self.select_device(self.selected_output, self.output_devices)
 
         # Recognizer
         tk.Label(self.root, text="Speech Recognizer:", bg='#333333', fg='white', font=('Helvetica', 10, 'bold'), relief='flat').grid(row=2, column=0, pady=5, padx=10, sticky='w')
-        self.recognizer_combo = ttk.Combobox(self.root, textvariable=self.recognizer_method, values=['Google', 'Sphinx'])
+        self.recognizer_combo = ttk.Combobox(self.root, textvariable=self.recognizer_method, values=['Google', 'Sphinx', 'Whisper daemon'])
         self.recognizer_combo.grid(row=2, column=1, pady=5, padx=10, sticky='ew')
 
         # TTS Engine
@@ -157,11 +218,16 @@ class DictationApp:
         tk.Label(self.root, text="Kokoro Voice:", bg='#333333', fg='white', font=('Helvetica', 10, 'bold'), relief='flat').grid(row=3, column=2, pady=5, padx=10, sticky='w')
         self.voice_combo = ttk.Combobox(self.root, textvariable=self.selected_voice, values=self.kokoro_voices)
         self.voice_combo.grid(row=3, column=3, pady=5, padx=10, sticky='ew')
+        self.voice_combo.bind('<<ComboboxSelected>>', self.on_voice_change)
+        self.tts_combo.bind('<<ComboboxSelected>>', self.on_voice_change)
 
         # Model on right
         tk.Label(self.root, text="Ollama Model:", bg='#333333', fg='white', font=('Helvetica', 10, 'bold'), relief='flat').grid(row=0, column=2, pady=5, padx=10, sticky='w')
-        self.model_combo = ttk.Combobox(self.root, textvariable=self.selected_model, values=self.models)
+        # Opening the list asks Ollama again, so freshly pulled models show up
+        self.model_combo = ttk.Combobox(self.root, textvariable=self.selected_model, values=self.models,
+                                        postcommand=self.discovery.refresh)
         self.model_combo.grid(row=0, column=3, pady=5, padx=10, sticky='ew')
+        self.model_combo.bind('<<ComboboxSelected>>', self.on_model_change)
         if self.selected_model.get() not in self.models and self.models:
             self.selected_model.set(self.models[0])
 
@@ -192,54 +258,125 @@ class DictationApp:
         self.send_button = tk.Button(button_frame, text="Send to Ollama", command=self.send_current_text, font=('Helvetica', 12), padx=10, pady=5, bg='lightgray', fg='black')
         self.send_button.pack(side=tk.LEFT, padx=5)
 
+        self.cancel_button = tk.Button(button_frame, text="Cancel Reply", command=self.cancel_reply, font=('Helvetica', 12), padx=10, pady=5, bg='lightgray', fg='black')
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
         self.pause_tts_button = tk.Button(button_frame, text="Pause Speech", command=self.pause_tts, font=('Helvetica', 12), padx=10, pady=5, bg='lightgray', fg='black')
         self.pause_tts_button.pack(side=tk.LEFT, padx=5)
 
 
 
-    def get_audio_devices(self, type):
-        p = pyaudio.PyAudio()
-        devices = []
-        for i in range(p.get_device_count()):
-            info = p.get_device_info_by_index(i)
-            if type == 'input' and int(info.get('maxInputChannels', 0)) > 0:
-                devices.append(f"{info.get('name')} (Index: {i})")
-            elif type == 'output' and int(info.get('maxOutputChannels', 0)) > 0:
-                devices.append(f"{info.get('name')} (Index: {i})")
-        p.terminate()
-        return devices
+    def list_audio_devices(self, rescan=False):
+        """
+        Initialize PortAudio and list inputs and outputs in one pass; runs on the discovery thread.
+
+        A hot-plugged device only shows up after PortAudio is re-initialized,
+        which waits until nothing is listening or playing.
+        """
+        with self.audio_lock:
+            if self.pyaudio_instance is None:
+                self.pyaudio_instance = pyaudio.PyAudio()
+                self.output.set_audio(self.pyaudio_instance)
+            elif rescan:
+                if self.is_listening or self.output.active:
+                    return None
+                self.output.set_audio(None)
+                self.pyaudio_instance.terminate()
+                self.pyaudio_instance = pyaudio.PyAudio()
+                self.output.set_audio(self.pyaudio_instance)
+            return discovery.list_audio_devices(self.pyaudio_instance)
+
+    def select_device(self, var, devices):
+        """Keep the saved device (by name if its index changed), else pick the first one."""
+        match = discovery.match_device(var.get(), devices)
+        if match is not None:
+            var.set(match)
+        elif devices:
+            var.set(devices[0])
+
+    def update_devices(self, inputs, outputs):
+        self.input_devices, self.output_devices = inputs, outputs
+        self.input_combo.config(values=inputs)
+        self.output_combo.config(values=outputs)
+        if not self.is_listening:
+            self.select_device(self.selected_input, inputs)
+        old_output = self.get_device_index(self.selected_output.get())
+        self.select_device(self.selected_output, outputs)
+        if self.get_device_index(self.selected_output.get()) != old_output:
+            self.on_output_change()
+
+    def set_status(self, text):
+        """Safe to call from any thread."""
+        self.ui.post("status", text)
+
+    def append_text(self, text):
+        """Append to the transcript; safe to call from any thread."""
+        self.ui.post("text", text)
+
+    def show_text(self, text):
+        self.text_area.insert(tk.END, text)
+        self.text_area.see(tk.END)
 
     def get_device_index(self, device_str):
         match = re.search(r'Index: (\d+)', device_str)
         return int(match.group(1)) if match else None
 
-    def get_ollama_models(self):
-        """Get available Ollama models with improved error handling."""
+    def update_models(self, models, error):
+        """Fill the model list with what discovery found; an error means Ollama is not reachable."""
+        if isinstance(error, requests.exceptions.Timeout):
+            self.set_status("Ollama connection timeout")
+        elif isinstance(error, requests.exceptions.ConnectionError):
+            self.set_status("Cannot connect to Ollama - start with 'ollama serve'")
+        elif isinstance(error, (KeyError, ValueError)):
+            self.set_status("Invalid response from Ollama")
+        elif error is not None:
+            self.set_status(f"Ollama error: {str(error)[:50]}")
+        self.models = models
+        self.model_combo.config(values=models)
+        if models and self.selected_model.get() not in models:
+            self.selected_model.set(models[0])
+            self.on_model_change()
+
+    def on_output_change(self, event=None):
         try:
-            response = requests.get("http://localhost:11434/api/tags", timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            return [model['name'] for model in data.get('models', [])]
-        except requests.exceptions.Timeout:
-            self.status_var.set("Ollama connection timeout")
-            return []
-        except requests.exceptions.ConnectionError:
-            self.status_var.set("Cannot connect to Ollama - start with 'ollama serve'")
-            return []
-        except (KeyError, ValueError):
-            self.status_var.set("Invalid response from Ollama")
-            return []
+            with self.audio_lock:
+                self.output.open(self.get_device_index(self.selected_output.get()))
+            self.set_status(f"Output: {self.selected_output.get()}")
         except Exception as e:
-            self.status_var.set(f"Ollama error: {str(e)[:50]}")
-            return []
+            self.set_status(f"Cannot open output device: {str(e)[:50]}")
+
+    def on_voice_change(self, event=None):
+        # Load the Kokoro model and voice pack before the next reply needs them
+        if self.tts_engine.get() == 'kokoro':
+            voice = self.selected_voice.get()
+            threading.Thread(target=self.preload_voice, args=(voice,), daemon=True).start()
+
+    def preload_voice(self, voice):
+        try:
+            get_kokoro(lang_code=voice[0], voice=voice)
+        except Exception as e:
+            self.set_status(f"Could not load Kokoro voice {voice}: {str(e)[:50]}")
+
+    def on_model_change(self, event=None):
+        # Load the model now so the first question does not pay for it
+        model = self.selected_model.get()
+        threading.Thread(target=self.preload_model, args=(model,), daemon=True).start()
+
+    def preload_model(self, model):
+        try:
+            self.set_status(f"Loading {model}...")
+            self.ollama.keep_loaded(model)
+            self.set_status(f"{model} loaded")
+        except requests.exceptions.RequestException as e:
+            self.set_status(f"Could not load {model}: {str(e)[:50]}")
 
     def start_dictation(self):
         self.is_listening = True
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
-        self.status_var.set("Listening")
-        self.text_area.delete(1.0, tk.END)
-        self.text_area.insert(tk.END, "Listening...\n")
+        self.set_status("Listening")
+        self.ui.post("clear_text")
+        self.append_text("Listening...\n")
 
         # Start VU monitoring
         # Disabled due to PulseAudio conflict
@@ -257,12 +394,12 @@ class DictationApp:
         # if self.monitor_stream:
         #     self.monitor_stream.close()
         #     self.monitor_stream = None
-        self.status_var.set("Ready")
+        self.set_status("Ready")
 
     def listen_and_process(self):
         device_index = self.get_device_index(self.selected_input.get())
         if device_index is None:
-            self.text_area.insert(tk.END, "Invalid input device selected\n")
+            self.append_text("Invalid input device selected\n")
             return
         try:
             with sr.Microphone(device_index=device_index) as source:
@@ -272,151 +409,241 @@ class DictationApp:
                         audio = self.recognizer.listen(source, timeout=10)
                         if self.recognizer_method.get() == 'Google':
                             text = self.recognizer.recognize_google(audio)
+                        elif self.recognizer_method.get() == 'Whisper daemon':
+                            text = self.recognize_daemon(audio)
                         else:
                             text = self.recognizer.recognize_sphinx(audio)
-                        self.text_area.insert(tk.END, f"You said: {text}\n")
+                        self.turn_start = time.perf_counter()
+                        self.append_text(f"You said: {text}\n")
                         threading.Thread(target=self.send_to_ollama, args=(text,)).start()
                     except sr.WaitTimeoutError:
                         continue
                     except sr.UnknownValueError:
-                        self.text_area.insert(tk.END, "Could not understand audio\n")
+                        self.append_text("Could not understand audio\n")
                     except sr.RequestError as e:
-                        self.text_area.insert(tk.END, f"Error: {e}\n")
+                        self.append_text(f"Error: {e}\n")
         except Exception as e:
-            self.text_area.insert(tk.END, f"Error opening microphone: {e}\n")
+            self.append_text(f"Error opening microphone: {e}\n")
+
+    def recognize_daemon(self, audio):
+        """Transcribe a phrase with the transcription daemon's shared Whisper model."""
+        if self.daemon is None:
+            raise sr.RequestError('transcription daemon is disabled ("transcription_daemon" is empty in config.json)')
+        try:
+            text = self.daemon.transcribe(audio.get_wav_data(convert_rate=16000, convert_width=2), language='en')
+        except requests.exceptions.ConnectionError:
+            raise sr.RequestError(f"transcription daemon not running at {self.daemon.url} "
+                                  "(start it with: python voice2text.py daemon)")
+        except requests.exceptions.RequestException as e:
+            raise sr.RequestError(f"transcription daemon error: {e}")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
 
     def send_current_text(self):
         text = self.text_area.get(1.0, tk.END).strip()
         if not text:
-            self.text_area.insert(tk.END, "No text to send\n")
+            self.append_text("No text to send\n")
             return
-        self.status_var.set("Sending")
-        self.send_to_ollama(text)
+        self.set_status("Sending")
+        self.turn_start = time.perf_counter()
+        threading.Thread(target=self.send_to_ollama, args=(text,), daemon=True).start()
+
+    def cancel_reply(self):
+        self.ollama_cancel.set()
+        if self.speech_pipeline:
+            self.speech_pipeline.cancel()
+        self.stop_audio()
+
+    def stop_audio(self):
+        self.output.stop()
 
     def pause_tts(self):
-        if self.current_channel:
+        if self.output.active:
             if self.tts_paused:
-                self.current_channel.unpause()
+                self.output.resume()
                 self.tts_paused = False
-                self.pause_tts_button.config(text="Pause TTS")
+                self.ui.post("pause_label", "Pause TTS")
             else:
-                self.current_channel.pause()
+                self.output.pause()
                 self.tts_paused = True
-                self.pause_tts_button.config(text="Resume TTS")
+                self.ui.post("pause_label", "Resume TTS")
 
     def send_to_ollama(self, text):
         """Send text to Ollama with retry logic and better error handling."""
         model = self.selected_model.get()
         if not model:
-            self.text_area.insert(tk.END, "No model selected\n")
+            self.append_text("No model selected\n")
             return
 
         if not text or not text.strip():
-            self.text_area.insert(tk.END, "No text to send\n")
+            self.append_text("No text to send\n")
             return
 
         # Sanitize input
         text = text.strip()
         if len(text) > 10000:
             text = text[:10000] + "..."
-            self.text_area.insert(tk.END, "Input truncated to 10,000 characters\n")
+            self.append_text("Input truncated to 10,000 characters\n")
+
+        self.append_text(f"Sending to {model}...\n")
+
+        # A new request cancels a reply that is still streaming
+        self.ollama_cancel.set()
+        cancel_event = self.ollama_cancel = threading.Event()
+        streamed = []
+        pipeline = None
+        splitter = SentenceSplitter()
+
+        def on_token(token):
+            nonlocal pipeline
+            if not streamed:
+                self.append_text("Ollama: ")
+                self.set_status("Receiving")
+                # Start speaking the first sentence while the rest is generated
+                pipeline = self.start_speech_pipeline()
+            streamed.append(token)
+            self.append_text(token)
+            for sentence in splitter.feed(token):
+                pipeline.add(sentence)
+
+        def on_retry(attempt, retries, error):
+            self.append_text(f"Error, retrying... ({attempt}/{retries})\n")
 
-        self.text_area.insert(tk.END, f"Sending to {model}...\n")
+        try:
+            self.set_status("Processing")
+
+            # The client retries failed attempts until the first token arrives
+            reply, stats = self.ollama.generate(model, text, on_token, cancel_event=cancel_event, timeout=120,
+                                                on_retry=on_retry)
+            reply = reply.strip()
+            if streamed:
+                self.append_text("\n")
+
+            if stats.cancelled:
+                if pipeline:
+                    pipeline.cancel()
+                    self.stop_audio()
+                self.append_text("[Reply cancelled]\n")
+                self.set_status(f"Cancelled - {stats.summary()}")
+                return
+
+            if reply:
+                for sentence in splitter.flush():
+                    pipeline.add(sentence)
+                self.finish_speech_pipeline(pipeline)
+                pipeline = None
+            else:
+                self.append_text("Ollama returned empty response\n")
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                self.status_var.set(f"Processing (attempt {attempt + 1}/{max_retries})")
-                payload = {
-                    "model": model,
-                    "prompt": text,
-                    "stream": False
-                }
-
-                response = requests.post("http://localhost:11434/api/generate",
-                                       json=payload, timeout=120)
-
-                response.raise_for_status()
-                data = response.json()
-                reply = data.get('response', '').strip()
-
-                if reply:
-                    self.text_area.insert(tk.END, f"Ollama: {reply}\n")
-                    self.speak_response(reply)
-                else:
-                    self.text_area.insert(tk.END, "Ollama returned empty response\n")
-
-                self.status_var.set("Ready")
-                return  # Success
-
-            except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
-                    self.text_area.insert(tk.END, f"Timeout, retrying... ({attempt + 1}/{max_retries})\n")
-                    time.sleep(2)
-                    continue
-                else:
-                    self.text_area.insert(tk.END, "Ollama timeout - model may be slow\n")
-
-            except requests.exceptions.ConnectionError:
-                self.text_area.insert(tk.END, "Cannot connect to Ollama - check if running\n")
-                break
+            latency = f" · first audio {self.first_audio_latency:.2f} s" if self.first_audio_latency is not None else ""
+            self.set_status(f"Ready - {stats.summary()}{latency}")
+            return  # Success
 
-            except requests.exceptions.HTTPError as e:
-                status_code = e.response.status_code if e.response else "unknown"
-                self.text_area.insert(tk.END, f"Ollama HTTP error {status_code}: {str(e)[:50]}\n")
-                break
+        except requests.exceptions.Timeout:
+            if streamed:
+                self.append_text("\nOllama stream stalled - reply is incomplete\n")
+            else:
+                self.append_text("Ollama timeout - model may be slow\n")
 
-            except (KeyError, ValueError) as e:
-                self.text_area.insert(tk.END, f"Invalid response from Ollama: {str(e)[:50]}\n")
-                break
+        except requests.exceptions.ConnectionError:
+            self.append_text("Cannot connect to Ollama - check if running\n")
 
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    self.text_area.insert(tk.END, f"Error, retrying... ({attempt + 1}/{max_retries})\n")
-                    time.sleep(1)
-                    continue
-                else:
-                    self.text_area.insert(tk.END, f"Error connecting to Ollama: {str(e)[:50]}\n")
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else "unknown"
+            self.append_text(f"Ollama HTTP error {status_code}: {str(e)[:50]}\n")
 
-        self.status_var.set("Ready")
+        except (KeyError, ValueError) as e:
+            self.append_text(f"Invalid response from Ollama: {str(e)[:50]}\n")
 
-    def speak_response(self, text):
-        # TODO: Use selected output device
-        self.status_var.set("Speaking")
+        except Exception as e:
+            self.append_text(f"Error connecting to Ollama: {str(e)[:50]}\n")
+
+        if pipeline:
+            # Stream broke off; still speak what did arrive
+            for sentence in splitter.flush():
+                pipeline.add(sentence)
+            self.finish_speech_pipeline(pipeline)
+        self.set_status("Ready")
+
+    def start_speech_pipeline(self):
+        """Speak sentences as they are added; sentence N+1 is synthesized while N plays."""
+        self.first_audio_latency = None
+
+        def on_first_audio(when):
+            self.first_audio_latency = when - self.turn_start
+            self.set_status(f"Speaking (first audio after {self.first_audio_latency:.2f} s)")
+
+        if self.speech_pipeline:
+            # A new reply interrupts the previous one
+            self.speech_pipeline.cancel()
+            self.stop_audio()
+        self.speech_pipeline = SpeechPipeline(self._synthesize, self._play, on_first_audio=on_first_audio,
+                                              cleanup=self._remove_file)
+        return self.speech_pipeline
+
+    def finish_speech_pipeline(self, pipeline):
+        pipeline.close()
+        pipeline.wait()
+        if pipeline.error:
+            self.append_text(f"TTS error ({self.tts_engine.get()}): {pipeline.error}\n")
+
+    def _synthesize(self, text):
+        """Audio for one sentence with the selected engine, from the cache when possible."""
+        engine = self.tts_engine.get()
         # Preprocess text
         text = text.replace('*', 'star')
-        threading.Thread(target=self._speak_response, args=(text,)).start()
 
-    def _speak_response(self, text):
-        engine = self.tts_engine.get()
+        if engine == 'gTTS':
+            key = self.tts_cache.key("gtts", "en", 1.0, text)
+            cached = self.tts_cache.get(key)
+            if cached:
+                return cached
+            fd, temp_file = tempfile.mkstemp(suffix='.mp3')
+            os.close(fd)
+            from gtts import gTTS
+            tts = gTTS(text)
+            tts.save(temp_file)
+            return self.tts_cache.put_file(key, temp_file)
+
+        elif engine == 'kokoro':
+            voice = self.selected_voice.get()
+            key = self.tts_cache.key("kokoro", voice, 1.0, text)
+            cached = self.tts_cache.get(key)
+            if cached:
+                audio, _ = self.tts_cache.load_audio(cached)
+                return [audio]
+            # Shared engine, the model is loaded once per process. The pipeline runs
+            # the generator on its synthesis thread and plays segments as they arrive.
+            kokoro = get_kokoro(lang_code=voice[0])
+            return self._cache_segments(key, kokoro.stream(text, voice=voice, speed=1.0))
+
+        return None
+
+    def _cache_segments(self, key, segments):
+        """Pass Kokoro segments through and cache the sentence once it is complete (on the synthesis thread)."""
+        produced = []
+        for segment in segments:
+            produced.append(segment)
+            yield segment
+        if produced:
+            self.tts_cache.put_audio(key, np.concatenate(produced), KOKORO_SAMPLE_RATE)
+
+    def _play(self, audio):
+        self.tts_paused = False
+        self.ui.post("pause_label", "Pause TTS")
+        if isinstance(audio, str):
+            audio = [decode_file(audio)]
+        # Kokoro segments start playing as soon as each one is generated
+        self.output.play(audio)
+
+    def _remove_file(self, temp_file):
+        if not isinstance(temp_file, str) or self.tts_cache.contains(temp_file):
+            return
         try:
-            temp_file = None
-            
-            if engine == 'gTTS':
-                tts = gTTS(text)
-                temp_file = 'temp_tts.mp3'
-                tts.save(temp_file)                
-                
-            elif engine == 'kokoro':
-                # Initialize Kokoro TTS
-                kokoro = KokoroTTS(lang_code=self.selected_voice.get()[0], speed=1.0)  # American English
-                temp_file = 'temp_tts_kokoro.wav'
-                kokoro.synthesize(text, voice=self.selected_voice.get(), output_path=temp_file)
-            
-            if temp_file:
-                sound = pygame.mixer.Sound(temp_file)
-                self.current_channel = sound.play()
-                self.tts_paused = False
-                self.pause_tts_button.config(text="Pause TTS")
-                while self.current_channel and self.current_channel.get_busy():
-                    time.sleep(0.1)
-                os.remove(temp_file)
-                
-        except Exception as e:
-            self.text_area.insert(tk.END, f"TTS error ({engine}): {e}\n")
-        finally:
-            self.current_channel = None
-            self.status_var.set("Ready")
+            os.remove(temp_file)
+        except OSError:
+            pass
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,383 @@
+"""
+Ollama client helpers.
+
+One pooled HTTP session is shared by both apps, so turns reuse the same TCP
+connection. Requests pass ``keep_alive`` so the selected model stays loaded
+between turns instead of being reloaded at full cost, and failed requests are
+retried with one backoff policy.
+
+Streams ``/api/generate`` responses (newline-delimited JSON) so callers can
+show tokens as they arrive, stop mid-stream, and report time-to-first-token
+and generation speed.
+"""
+
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_URL = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+if not OLLAMA_URL.startswith(("http://", "https://")):
+    OLLAMA_URL = "http://" + OLLAMA_URL  # OLLAMA_HOST is often just host:port
+DEFAULT_KEEP_ALIVE = "30m"
+
+
+class StreamStats:
+    """Timing of one streamed generation."""
+
+    def __init__(self):
+        self.time_to_first_token = None  # Seconds from request to first token
+        self.tokens = 0
+        self.tokens_per_second = 0.0
+        self.total_seconds = 0.0
+        self.cancelled = False
+        self.prompt_tokens = 0  # Prompt tokens the server actually evaluated
+        self.prefill_seconds = 0.0
+        self.prefill_saved_seconds = 0.0  # Estimated, filled in by ChatSession
+
+    def summary(self):
+        if self.time_to_first_token is None:
+            return "no tokens"
+        text = f"TTFT {self.time_to_first_token:.2f} s · {self.tokens_per_second:.1f} tok/s"
+        if self.prefill_saved_seconds >= 0.01:
+            text += f" · prefill saved {self.prefill_saved_seconds:.2f} s"
+        return text
+
+
+def _is_retryable(error):
+    """Connection problems, timeouts and 5xx responses may succeed on a later attempt."""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class OllamaClient:
+    """
+    Pooled Ollama client.
+
+    :param base_url: Server address, ``OLLAMA_HOST`` or localhost by default.
+    :param keep_alive: How long Ollama keeps a model loaded after a request
+        (e.g. ``"30m"``, ``-1`` for forever, ``0`` to unload right away).
+    :param retries: Attempts per request, including the first one.
+    :param backoff: Seconds before the first retry, doubled after each failure.
+    """
+
+    def __init__(self, base_url=OLLAMA_URL, keep_alive=DEFAULT_KEEP_ALIVE, retries=3, backoff=1.0):
+        self.base_url = base_url.rstrip('/')
+        self.keep_alive = keep_alive
+        self.retries = max(1, retries)
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _with_retries(self, request, on_retry=None, cancel_event=None, can_retry=None):
+        """Run ``request()``, retrying retryable errors with exponential backoff."""
+        delay = self.backoff
+        for attempt in range(1, self.retries + 1):
+            try:
+                return request()
+            except Exception as e:
+                if attempt == self.retries or not _is_retryable(e):
+                    raise
+                if (cancel_event is not None and cancel_event.is_set()) or (can_retry and not can_retry()):
+                    raise
+                if on_retry:
+                    on_retry(attempt, self.retries, e)
+                time.sleep(delay)
+                delay *= 2
+
+    def list_models(self, timeout=5):
+        """Names of the locally installed models (a single probe, not retried)."""
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=timeout)
+        response.raise_for_status()
+        return [model['name'] for model in response.json().get('models', [])]
+
+    def keep_loaded(self, model, timeout=120):
+        """Load ``model`` now (if needed) and keep it resident for ``keep_alive``."""
+        def request():
+            response = self.session.post(f"{self.base_url}/api/generate",
+                                         json={"model": model, "keep_alive": self.keep_alive},
+                                         timeout=(5, timeout))
+            response.raise_for_status()
+        self._with_retries(request)
+
+    def unload(self, model, timeout=30):
+        """Ask Ollama to free the memory held by ``model``."""
+        response = self.session.post(f"{self.base_url}/api/generate", json={"model": model, "keep_alive": 0},
+                                     timeout=(5, timeout))
+        response.raise_for_status()
+
+    def generate(self, model, prompt, on_token, cancel_event=None, timeout=120, on_retry=None):
+        """
+        Stream a reply, see ``stream_generate``.
+
+        Failed attempts are retried only until the first token has arrived, so
+        text already shown is never repeated.
+
+        :param on_retry: Optional ``on_retry(attempt, retries, error)`` called before each retry.
+        """
+        received = []
+
+        def counting(token):
+            if not received:
+                received.append(True)
+            on_token(token)
+
+        payload = {"model": model, "prompt": prompt}
+        return self._with_retries(lambda: self._stream("/api/generate", payload, counting, cancel_event, timeout),
+                                  on_retry, cancel_event, can_retry=lambda: not received)
+
+    def chat(self, model, messages, on_token, cancel_event=None, timeout=120, on_retry=None):
+        """
+        Stream a reply to a list of ``{"role": ..., "content": ...}`` messages via ``/api/chat``.
+
+        Same streaming and retry behaviour as ``generate``.
+        """
+        received = []
+
+        def counting(token):
+            if not received:
+                received.append(True)
+            on_token(token)
+
+        payload = {"model": model, "messages": messages}
+        return self._with_retries(lambda: self._stream("/api/chat", payload, counting, cancel_event, timeout),
+                                  on_retry, cancel_event, can_retry=lambda: not received)
+
+    def _stream(self, path, payload, on_token, cancel_event, timeout):
+        stats = StreamStats()
+        parts = []
+        start = time.perf_counter()
+
+        payload = dict(payload, stream=True, keep_alive=self.keep_alive)
+        with self.session.post(f"{self.base_url}{path}", json=payload, stream=True,
+                               timeout=(5, timeout)) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if cancel_event is not None and cancel_event.is_set():
+                    stats.cancelled = True
+                    break
+                if not line:
+                    continue
+
+                data = json.loads(line)
+                if 'error' in data:
+                    raise ValueError(data['error'])
+
+                # /api/generate streams "response", /api/chat streams "message"
+                token = data.get('response') or (data.get('message') or {}).get('content', '')
+                if token:
+                    if stats.time_to_first_token is None:
+                        stats.time_to_first_token = time.perf_counter() - start
+                    stats.tokens += 1
+                    parts.append(token)
+                    on_token(token)
+
+                if data.get('done'):
+                    # Server-side counters are more accurate than our chunk count
+                    if data.get('eval_count') and data.get('eval_duration'):
+                        stats.tokens = data['eval_count']
+                        stats.tokens_per_second = data['eval_count'] / (data['eval_duration'] / 1e9)
+                    # Missing when the whole prompt was served from the cache
+                    stats.prompt_tokens = data.get('prompt_eval_count', 0)
+                    stats.prefill_seconds = data.get('prompt_eval_duration', 0) / 1e9
+                    break
+
+        stats.total_seconds = time.perf_counter() - start
+        if not stats.tokens_per_second and stats.time_to_first_token is not None:
+            generating = stats.total_seconds - stats.time_to_first_token
+            if generating > 0:
+                stats.tokens_per_second = stats.tokens / generating
+        return "".join(parts), stats
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token for English)."""
+    return len(text) // 4 + 1
+
+
+class ChatSession:
+    """
+    A conversation with one model over ``/api/chat``.
+
+    History is only ever appended to, so each request starts with exactly the
+    prompt the server processed last turn and Ollama reuses its cached KV state
+    instead of prefilling the whole conversation again. When the history grows
+    past ``max_history_tokens`` the oldest turns are folded into a short summary
+    in one go, so the cache is invalidated rarely rather than every turn.
+
+    :param client: ``OllamaClient`` to send requests with.
+    :param model: Model name.
+    :param system_prompt: Optional system message.
+    :param max_history_tokens: Token budget for system prompt, summary and
+        history; keep it below the model's context length minus the reply.
+    """
+
+    _SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+    def __init__(self, client, model, system_prompt=None, max_history_tokens=3072):
+        self.client = client
+        self.model = model
+        self.system_prompt = system_prompt
+        self.max_history_tokens = max_history_tokens
+        self.lock = threading.Lock()  # Guards the history; held briefly
+        self._turn_lock = threading.Lock()  # One question at a time
+        self._generation = 0
+        self.reset()
+
+    def reset(self):
+        """Start a new conversation; call with ``lock`` held when a reply may be streaming."""
+        self._generation += 1
+        self.messages = []  # [{"role", "content", "tokens"}]
+        self.summary = []   # One condensed line per compacted message
+        self.cached_tokens = 0  # Prompt + reply the server holds from the last turn
+        self.prefill_rate = None  # Seconds per prompt token, from the last real prefill
+        self.compactions = 0
+
+    def history_tokens(self):
+        return sum(m['tokens'] for m in self.messages) + estimate_tokens(self._system_text())
+
+    def _system_text(self):
+        parts = []
+        if self.system_prompt:
+            parts.append(self.system_prompt)
+        if self.summary:
+            parts.append(self._SUMMARY_HEADER + "\n" + "\n".join(self.summary))
+        return "\n\n".join(parts)
+
+    def _request_messages(self):
+        system = self._system_text()
+        messages = [{"role": "system", "content": system}] if system else []
+        return messages + [{"role": m['role'], "content": m['content']} for m in self.messages]
+
+    def _condense(self, message):
+        """First sentence of a message, for the summary."""
+        text = " ".join(message['content'].split())
+        for end in ('. ', '? ', '! '):
+            if end in text:
+                text = text[:text.index(end) + 1]
+                break
+        if len(text) > 150:
+            text = text[:147] + "..."
+        return f"{'User' if message['role'] == 'user' else 'Assistant'}: {text}"
+
+    def _compact(self):
+        """Fold old turns into the summary until the history fits in half the budget."""
+        target = self.max_history_tokens // 2
+        # The question being asked is always kept
+        while len(self.messages) > 1 and self.history_tokens() > target:
+            self.summary.append(self._condense(self.messages.pop(0)))
+        # The summary itself is bounded too: drop its oldest lines
+        while self.summary and estimate_tokens("\n".join(self.summary)) > self.max_history_tokens // 4:
+            self.summary.pop(0)
+        self.compactions += 1
+        self.cached_tokens = 0  # The prompt prefix changed, nothing to reuse
+
+    def ask(self, text, on_token, cancel_event=None, timeout=120, on_retry=None):
+        """
+        Send ``text`` as the next user turn and stream the reply.
+
+        ``lock`` is only held while the history is read or updated, not while the
+        reply streams, so ``reset`` or a model switch never waits for a reply.
+        A reply that arrives after ``reset`` is not added to the new conversation.
+
+        :return: ``(reply, stats)``; ``stats.prefill_saved_seconds`` estimates the
+            prefill time the server skipped thanks to the cached conversation.
+        """
+        with self._turn_lock:
+            with self.lock:
+                # A single message may use at most half the budget
+                limit = self.max_history_tokens * 2
+                if len(text) > limit:
+                    text = text[:limit] + "..."
+
+                question = {"role": "user", "content": text, "tokens": estimate_tokens(text)}
+                self.messages.append(question)
+                if self.history_tokens() > self.max_history_tokens:
+                    self._compact()
+
+                generation = self._generation
+                model = self.model
+                messages = self._request_messages()
+                expected_prompt = self.history_tokens()
+                reusable = self.cached_tokens
+
+            try:
+                reply, stats = self.client.chat(model, messages, on_token,
+                                                cancel_event=cancel_event, timeout=timeout, on_retry=on_retry)
+            except Exception:
+                with self.lock:
+                    if generation == self._generation and question in self.messages:
+                        self.messages.remove(question)
+                raise
+
+            with self.lock:
+                if generation != self._generation:
+                    return reply, stats  # Reset meanwhile: the turn belongs to the old conversation
+                if not reply:
+                    self.messages.remove(question)
+                    return reply, stats
+                # Keep partial (cancelled) replies too, the server has already cached them
+                self.messages.append({"role": "assistant", "content": reply,
+                                      "tokens": stats.tokens or estimate_tokens(reply)})
+
+                if stats.prompt_tokens >= 32 and stats.prefill_seconds > 0:
+                    self.prefill_rate = stats.prefill_seconds / stats.prompt_tokens
+                saved_tokens = min(reusable, max(0, expected_prompt - stats.prompt_tokens))
+                if self.prefill_rate is not None:
+                    stats.prefill_saved_seconds = saved_tokens * self.prefill_rate
+                if self.model == model:
+                    self.cached_tokens = max(expected_prompt, stats.prompt_tokens) + stats.tokens
+                else:
+                    self.cached_tokens = 0  # Switched models meanwhile, the new one has nothing cached
+                return reply, stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """The shared client, created with default settings on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
+
+
+def configure(base_url=None, keep_alive=None):
+    """
+    Point the shared client at a server and change ``keep_alive``.
+
+    An empty ``base_url`` means ``OLLAMA_HOST`` or localhost, resolved here so
+    a configured URL is only ever the one the user entered.
+    """
+    client = get_client()
+    client.base_url = (base_url or OLLAMA_URL).rstrip('/')
+    if keep_alive is not None:
+        client.keep_alive = keep_alive
+    return client
+
+
+def stream_generate(model, prompt, on_token, cancel_event=None, timeout=120, url=None):
+    """
+    Generate a reply with ``"stream": True`` and pass each token to ``on_token``.
+
+    Uses the shared pooled client; pass ``url`` only to target another server.
+
+    :param model: Ollama model name.
+    :param prompt: Prompt text.
+    :param on_token: Called with each text fragment as it arrives.
+    :param cancel_event: Optional ``threading.Event``; when set, the stream is
+        closed, which also stops generation on the server.
+    :param timeout: Maximum seconds to wait between chunks.
+    :return: ``(text, stats)`` with the text received so far and a ``StreamStats``.
+    """
+    client = get_client() if url is None else OllamaClient(url, get_client().keep_alive)
+    return client.generate(model, prompt, on_token, cancel_event=cancel_event, timeout=timeout)
@@ -0,0 +1,101 @@
+"""
+Fixed-capacity audio ring buffer.
+
+The capture callback writes samples in place into a preallocated NumPy array;
+readers address audio by absolute sample position, which only ever increases,
+so trimming old audio never shifts what a reader is pointing at.
+
+There is a single writer (the PyAudio callback) and any number of readers.
+The write position is published only after the samples are in place, so
+readers never see partially written data without taking a lock.
+"""
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    def __init__(self, capacity, dtype=np.int16):
+        """
+        :param capacity: Number of samples kept before the oldest are overwritten.
+        :param dtype: Sample type stored in the buffer.
+        """
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(self.capacity, dtype=self.dtype)
+        self.write_pos = 0  # Total samples ever written
+
+    @property
+    def oldest_pos(self):
+        """Absolute position of the oldest sample still held."""
+        return max(0, self.write_pos - self.capacity)
+
+    def write(self, samples):
+        """Copy samples into the buffer without allocating."""
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+        count = len(samples)
+        start = (self.write_pos + n - count) % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < count:
+            self._data[:count - first] = samples[first:]
+        self.write_pos += n
+
+    def write_bytes(self, data):
+        """Write raw PCM bytes, e.g. ``in_data`` from a PyAudio callback."""
+        self.write(np.frombuffer(data, dtype=self.dtype))
+
+    def views(self, start, end):
+        """
+        Return zero-copy views covering ``[start, end)``.
+
+        One view is returned when the range is contiguous in memory, two when
+        it wraps around the end of the array. Views stay valid until the writer
+        laps them, i.e. for ``capacity`` samples after ``start``.
+        """
+        start = max(start, self.oldest_pos)
+        end = min(end, self.write_pos)
+        if end <= start:
+            return (self._data[:0],)
+        i = start % self.capacity
+        j = i + (end - start)
+        if j <= self.capacity:
+            return (self._data[i:j],)
+        return (self._data[i:], self._data[:j - self.capacity])
+
+    def read(self, start, end):
+        """Return ``[start, end)`` as one array; copies only if the range wraps."""
+        parts = self.views(start, end)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def reader(self, position=None):
+        """Create a read cursor, by default positioned at the current write position."""
+        return RingReader(self, self.write_pos if position is None else position)
+
+
+class RingReader:
+    """A read cursor over an ``AudioRingBuffer``."""
+
+    def __init__(self, ring, position):
+        self.ring = ring
+        self.position = position
+        self.dropped = 0  # Samples overwritten before this reader got to them
+
+    def available(self):
+        return self.ring.write_pos - self.position
+
+    def read(self, max_samples=None):
+        """Return the next unread samples and advance the cursor."""
+        oldest = self.ring.oldest_pos
+        if self.position < oldest:
+            self.dropped += oldest - self.position
+            self.position = oldest
+        end = self.ring.write_pos
+        if max_samples is not None:
+            end = min(end, self.position + max_samples)
+        data = self.ring.read(self.position, end)
+        self.position += len(data)
+        return data
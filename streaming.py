@@ -0,0 +1,272 @@
+"""
+Streaming transcription engine.
+
+Runs Whisper over a rolling window of recent audio and uses word timestamps to
+decide which words are stable. A word is committed ("final") once two
+consecutive passes agree on it (local agreement); everything after the last
+committed word is reported as a "partial" hypothesis that may still change.
+"""
+
+import contextlib
+import re
+import time
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def _normalize_word(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class HypothesisBuffer:
+    """Tracks committed words and the latest unconfirmed hypothesis."""
+
+    def __init__(self):
+        self.committed = []  # (start, end, word) committed and still inside the audio window
+        self.buffer = []  # previous hypothesis after the committed prefix
+        self.new = []
+        self.last_committed_time = 0.0
+
+    def insert(self, words, offset):
+        """Add a new hypothesis; word times are relative to ``offset``."""
+        words = [(start + offset, end + offset, word) for start, end, word in words]
+        self.new = [w for w in words if w[0] > self.last_committed_time - 0.1]
+
+        # Whisper often repeats the tail of the committed text at the start
+        # of the window; drop up to 5 words that duplicate it.
+        if self.new and self.committed and abs(self.new[0][0] - self.last_committed_time) < 1:
+            max_ngram = min(len(self.committed), len(self.new), 5)
+            for n in range(max_ngram, 0, -1):
+                committed_tail = [_normalize_word(w[2]) for w in self.committed[-n:]]
+                new_head = [_normalize_word(w[2]) for w in self.new[:n]]
+                if committed_tail == new_head:
+                    self.new = self.new[n:]
+                    break
+
+    def flush(self):
+        """Commit the longest prefix shared by the last two hypotheses."""
+        commit = []
+        while self.new and self.buffer:
+            if _normalize_word(self.new[0][2]) != _normalize_word(self.buffer[0][2]):
+                break
+            word = self.new.pop(0)
+            self.buffer.pop(0)
+            commit.append(word)
+            self.last_committed_time = word[1]
+        self.buffer = self.new
+        self.new = []
+        self.committed.extend(commit)
+        return commit
+
+    def pop_committed(self, time):
+        """Forget committed words that end before ``time`` (audio was trimmed)."""
+        while self.committed and self.committed[0][1] <= time:
+            self.committed.pop(0)
+
+    def pending(self):
+        return self.buffer
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcriber over a rolling 16 kHz audio buffer.
+
+    Feed audio with ``insert_audio`` and call ``process_iter`` periodically;
+    it returns ``(final_text, partial_text)``. Call ``finish`` at the end of
+    the stream to commit whatever is still pending.
+    """
+
+    def __init__(self, transcribe, language="en", max_window=15.0, prompt_chars=200):
+        """
+        :param transcribe: Callable taking a 16 kHz float32 numpy array and
+            keyword arguments for ``WhisperModel.transcribe``; returns segments.
+        :param language: Language code passed to Whisper.
+        :param max_window: Seconds of audio kept before trimming at a commit point.
+        :param prompt_chars: Characters of committed text used as the initial prompt.
+        """
+        self.transcribe = transcribe
+        self.language = language
+        self.max_window = max_window
+        self.prompt_chars = prompt_chars
+        self.reset()
+
+    def reset(self):
+        self.audio = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0  # stream time (s) of self.audio[0]
+        self.hypothesis = HypothesisBuffer()
+        self.committed_text = ""
+
+    def insert_audio(self, audio):
+        self.audio = np.concatenate([self.audio, audio])
+
+    def buffered_seconds(self):
+        return len(self.audio) / SAMPLE_RATE
+
+    def process_iter(self):
+        """Transcribe the current window and return ``(final_text, partial_text)``."""
+        if len(self.audio) == 0:
+            return "", ""
+
+        segments = self.transcribe(
+            self.audio,
+            language=self.language,
+            word_timestamps=True,
+            condition_on_previous_text=False,
+            initial_prompt=self.committed_text[-self.prompt_chars:] or None,
+        )
+        segments = list(segments)
+        words = [(w.start, w.end, w.word) for s in segments for w in (s.words or [])]
+
+        self.hypothesis.insert(words, self.buffer_offset)
+        committed = self.hypothesis.flush()
+        final_text = self._join(committed)
+        if final_text:
+            self.committed_text = (self.committed_text + " " + final_text).strip()
+
+        if self.buffered_seconds() > self.max_window:
+            forced = self._join(self._trim(segments))
+            if forced:
+                self.committed_text = (self.committed_text + " " + forced).strip()
+                final_text = (final_text + " " + forced).strip()
+
+        return final_text, self._join(self.hypothesis.pending())
+
+    def finish(self):
+        """Commit the pending hypothesis and reset the stream."""
+        final_text = self._join(self.hypothesis.pending())
+        self.reset()
+        return final_text
+
+    def _trim(self, segments):
+        """Drop audio up to a commit point; returns any words force-committed."""
+        # Cut at the end of the last complete segment that is fully committed,
+        # so the next window never starts in the middle of a word.
+        forced = []
+        cut_time = None
+        last_committed = self.hypothesis.last_committed_time
+        for segment in segments:
+            end = segment.end + self.buffer_offset
+            if end <= last_committed:
+                cut_time = end
+        if cut_time is None:
+            cut_time = last_committed
+        if cut_time <= self.buffer_offset:
+            # Nothing agreed on for a whole window: commit the first half of the
+            # pending hypothesis rather than dropping it with the audio.
+            cut_time = self.buffer_offset + self.max_window / 2
+            pending = self.hypothesis.buffer
+            while pending and pending[0][1] <= cut_time:
+                forced.append(pending.pop(0))
+            if forced:
+                cut_time = forced[-1][1]
+                self.hypothesis.last_committed_time = cut_time
+                self.hypothesis.committed.extend(forced)
+        self.hypothesis.pop_committed(cut_time)
+        cut_samples = int((cut_time - self.buffer_offset) * SAMPLE_RATE)
+        self.audio = self.audio[cut_samples:]
+        self.buffer_offset = cut_time
+        return forced
+
+    @staticmethod
+    def _join(words):
+        return "".join(w[2] for w in words).strip()
+
+
+class DictationSession:
+    """
+    Real-time dictation over captured audio: resampling to 16 kHz, VAD gating
+    and streaming transcription. Used by the GUI's listen loop, the
+    transcription daemon and the pipeline benchmark, so all three run the
+    same code.
+
+    :param transcriber: A ``StreamingTranscriber``.
+    :param gate: A ``vad.SpeechGate``; only speech reaches the transcriber.
+    :param sample_rate: Capture rate of the PCM passed to ``feed_pcm``.
+    :param on_final: ``on_final(text)`` for committed text.
+    :param on_partial: ``on_partial(text)`` for the unconfirmed tail ("" clears it).
+    :param on_utterance_end: ``on_utterance_end(audio)`` with the utterance's
+        speech audio once it has been committed.
+    :param tracer: Optional ``tracing.Tracer``; the ``resample``, ``vad``,
+        ``whisper`` and ``finalize`` stages are recorded as spans of ``turn``.
+    """
+
+    def __init__(self, transcriber, gate, sample_rate=SAMPLE_RATE,
+                 on_final=None, on_partial=None, on_utterance_end=None, tracer=None, turn=None):
+        from audio_utils import StreamingResampler
+
+        self.transcriber = transcriber
+        self.gate = gate
+        self.sample_rate = sample_rate
+        self.resampler = StreamingResampler(sample_rate) if sample_rate != SAMPLE_RATE else None
+        self.on_final = on_final or (lambda text: None)
+        self.on_partial = on_partial or (lambda text: None)
+        self.on_utterance_end = on_utterance_end or (lambda audio: None)
+        self.utterance_audio = []
+        self.last_speech_time = None
+        self.tracer = tracer
+        self.turn = turn
+
+    def _span(self, stage):
+        if self.tracer is None:
+            return contextlib.nullcontext()
+        return self.tracer.span(self.turn, stage)
+
+    def feed_pcm(self, frames):
+        """Process int16 PCM at ``sample_rate`` (bytes, byte chunks or an array)."""
+        from audio_utils import pcm16_to_float32
+
+        with self._span("resample"):
+            audio = pcm16_to_float32(frames, self.sample_rate, self.resampler)
+        self.feed(audio)
+
+    def feed(self, audio):
+        """Process 16 kHz float32 audio: gate it, and transcribe the window while speech goes on."""
+        with self._span("vad"):
+            pieces = self.gate.process(audio)
+        if pieces:
+            self.last_speech_time = time.perf_counter()
+        for speech, ended in pieces:
+            self.transcriber.insert_audio(speech)
+            self.utterance_audio.append(speech)
+            if ended:
+                self.end_utterance()
+        if self.gate.in_speech and pieces:
+            with self._span("whisper"):
+                final_text, partial_text = self.transcriber.process_iter()
+            if final_text:
+                self.on_final(final_text)
+            self.on_partial(partial_text)
+
+    def finish(self, frames=b""):
+        """Process the last captured PCM and commit everything still pending."""
+        from audio_utils import pcm16_to_float32
+
+        with self._span("finalize"):
+            with self._span("resample"):
+                audio = pcm16_to_float32(frames, self.sample_rate, self.resampler)
+                if self.resampler is not None:
+                    audio = np.concatenate([audio, self.resampler.flush()])
+            with self._span("vad"):
+                pieces = self.gate.process(audio)
+            for speech, ended in pieces:
+                self.transcriber.insert_audio(speech)
+                self.utterance_audio.append(speech)
+                if ended:
+                    self.end_utterance()
+            self.end_utterance()
+
+    def end_utterance(self):
+        """Commit everything the transcriber still holds at the end of an utterance."""
+        audio, self.utterance_audio = self.utterance_audio, []
+        if self.transcriber.buffered_seconds() == 0:
+            self.transcriber.reset()
+            return
+        with self._span("whisper"):
+            final_text, _ = self.transcriber.process_iter()
+            final_text = (final_text + " " + self.transcriber.finish()).strip()
+        if final_text:
+            self.on_final(final_text)
+        self.on_partial("")
+        self.on_utterance_end(np.concatenate(audio) if audio else None)
@@ -0,0 +1,235 @@
+"""
+Per-stage timing for the voice -> LLM -> speech pipeline.
+
+A turn is one trip through the pipeline: dictation, the AI reply and its
+speech. Each stage is wrapped in a span (``with tracer.span(turn, "whisper")``
+or ``tracer.wrap``); spans come from several threads and a stage may repeat
+(one Whisper pass per step, one synthesis per sentence), so a turn keeps
+per-stage totals next to its individual spans. A span opened inside another
+one on the same thread is not counted twice: the outer span records only
+its own time (``finalize`` without the Whisper passes it ran).
+
+The last turns are kept in a ring buffer for the stats overlay. Finished
+turns are appended to a JSONL log and aggregated into Prometheus
+histograms, which can be written to a text file for node_exporter's
+textfile collector.
+"""
+
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Display order in the stats table; other stage names are shown after these
+STAGES = ("capture", "resample", "vad", "whisper", "finalize", "llm_first_token", "llm", "tts", "playback",
+          "first_audio")
+
+# Histogram buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Turn:
+    """The spans recorded for one turn."""
+
+    def __init__(self, turn_id, kind, clock=time.perf_counter):
+        self.id = turn_id
+        self.kind = kind
+        self.clock = clock
+        self.started = time.time()
+        self.start = clock()
+        self.spans = []  # (stage, offset_s, seconds)
+        self.totals = {}  # stage -> seconds
+        self.counts = {}  # stage -> number of spans
+        self.ended = False
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds, start=None):
+        """Record ``seconds`` spent in ``stage``; ignored once the turn has ended."""
+        offset = (start if start is not None else self.clock() - seconds) - self.start
+        with self._lock:
+            if self.ended:
+                return False
+            self.spans.append((stage, offset, seconds))
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.counts[stage] = self.counts.get(stage, 0) + 1
+        return True
+
+    def has(self, stage):
+        return stage in self.totals
+
+    def stage_ms(self):
+        with self._lock:
+            return {stage: seconds * 1000 for stage, seconds in self.totals.items()}
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "turn": self.id,
+                "kind": self.kind,
+                "started": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in self.totals.items()},
+                "counts": dict(self.counts),
+                "spans": [{"stage": stage, "offset_ms": round(offset * 1000, 2), "ms": round(seconds * 1000, 2)}
+                          for stage, offset, seconds in self.spans],
+            }
+
+
+class Tracer:
+    """
+    Collects turns and their spans; safe to use from any thread.
+
+    :param capacity: Number of finished turns kept in memory.
+    :param log_path: JSONL file each finished turn is appended to (None to disable).
+    :param metrics_path: File the Prometheus text is rewritten to after each turn (None to disable).
+    :param on_update: Called (from the recording thread) whenever a span is recorded or a turn ends.
+    :param clock: Time source of the spans; ``time.process_time`` records CPU seconds instead of wall time.
+    """
+
+    def __init__(self, capacity=50, log_path=None, metrics_path=None, on_update=None, clock=time.perf_counter):
+        self.turns = collections.deque(maxlen=capacity)
+        self.log_path = log_path
+        self.metrics_path = metrics_path
+        self.on_update = on_update
+        self.clock = clock
+        self.current = None
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Open spans of each thread
+        # Prometheus aggregates over all spans since start
+        self._buckets = {}  # stage -> counts per bucket (last one is +Inf)
+        self._sums = {}
+        self._turn_counts = {}  # kind -> finished turns
+
+    def begin_turn(self, kind):
+        """End the current turn and start a new one."""
+        with self._lock:
+            previous = self.current
+            turn = Turn(self._next_id, kind, self.clock)
+            self._next_id += 1
+            self.current = turn
+        if previous is not None:
+            self.end_turn(previous)
+        return turn
+
+    def end_turn(self, turn):
+        """Store a finished turn and export it; later spans for it are ignored."""
+        with turn._lock:
+            if turn.ended:
+                return
+            turn.ended = True
+        with self._lock:
+            if self.current is turn:
+                self.current = None
+            if not turn.spans:
+                return
+            self.turns.append(turn)
+            self._turn_counts[turn.kind] = self._turn_counts.get(turn.kind, 0) + 1
+            for stage, _, seconds in turn.spans:
+                self._observe(stage, seconds)
+        if self.log_path:
+            self._append_log(turn)
+        if self.metrics_path:
+            self._write_metrics()
+        self._notify()
+
+    def record(self, turn, stage, seconds, start=None):
+        if turn is not None and turn.add(stage, seconds, start):
+            self._notify()
+
+    @contextlib.contextmanager
+    def span(self, turn, stage):
+        """Record the time spent in the block, minus that of spans nested in it."""
+        stack = self._local.__dict__.setdefault('stack', [])
+        nested = [0.0]
+        stack.append(nested)
+        start = self.clock()
+        try:
+            yield
+        finally:
+            seconds = self.clock() - start
+            stack.pop()
+            if stack:
+                stack[-1][0] += seconds
+            self.record(turn, stage, seconds - nested[0], start)
+
+    def wrap(self, turn, stage, func):
+        """``func`` with each call recorded as a ``stage`` span of ``turn``."""
+        def traced(*args, **kwargs):
+            with self.span(turn, stage):
+                return func(*args, **kwargs)
+        return traced
+
+    def recent(self, n=10):
+        """The last ``n`` turns, oldest first, including the one in progress."""
+        with self._lock:
+            turns = list(self.turns)
+            if self.current is not None and self.current.spans:
+                turns.append(self.current)
+        return turns[-n:]
+
+    def table(self, n=10):
+        """Per-stage milliseconds of the last ``n`` turns as fixed-width text."""
+        turns = self.recent(n)
+        if not turns:
+            return "No turns recorded yet"
+        rows = [turn.stage_ms() for turn in turns]
+        seen = set().union(*rows)
+        stages = [s for s in STAGES if s in seen] + sorted(seen - set(STAGES))
+        lines = ["turn  kind       " + "".join(f"{stage[:9]:>10}" for stage in stages)]
+        for turn, row in zip(turns, rows):
+            marker = " " if turn.ended else "*"
+            cells = "".join(f"{row[stage]:10.0f}" if stage in row else f"{'-':>10}" for stage in stages)
+            lines.append(f"{turn.id:>4}{marker} {turn.kind:<10}{cells}")
+        return "\n".join(lines)
+
+    def _observe(self, stage, seconds):
+        counts = self._buckets.setdefault(stage, [0] * (len(BUCKETS) + 1))
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sums[stage] = self._sums.get(stage, 0.0) + seconds
+
+    def prometheus(self):
+        """Span durations and turn counts in the Prometheus text exposition format."""
+        lines = ["# HELP voice2text_stage_seconds Time spent in one span of a pipeline stage.",
+                 "# TYPE voice2text_stage_seconds histogram"]
+        with self._lock:
+            for stage in sorted(self._buckets):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), self._buckets[stage]):
+                    cumulative += count
+                    lines.append(f'voice2text_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'voice2text_stage_seconds_sum{{stage="{stage}"}} {self._sums[stage]:.6f}')
+                lines.append(f'voice2text_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+            lines += ["# HELP voice2text_turns_total Finished pipeline turns.",
+                      "# TYPE voice2text_turns_total counter"]
+            for kind in sorted(self._turn_counts):
+                lines.append(f'voice2text_turns_total{{kind="{kind}"}} {self._turn_counts[kind]}')
+        return "\n".join(lines) + "\n"
+
+    def _append_log(self, turn):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(turn.to_dict()) + "\n")
+        except OSError as e:
+            print(f"Could not write trace log: {e}")
+
+    def _write_metrics(self):
+        # Replace the file in one step so a scraper never reads half of it
+        temp = self.metrics_path + ".tmp"
+        try:
+            with open(temp, 'w') as f:
+                f.write(self.prometheus())
+            os.replace(temp, self.metrics_path)
+        except OSError as e:
+            print(f"Could not write metrics: {e}")
+
+    def _notify(self):
+        if self.on_update is not None:
+            self.on_update()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Headless transcription daemon.
+
+One long-running process owns the Whisper models and the streaming
+pipeline (VAD gate and local-agreement transcriber), so every front end on
+the machine shares a single resident model instead of loading its own.
+
+Endpoints (localhost only by default):
+
+- ``POST /v1/audio/transcriptions``: OpenAI-compatible file transcription
+  (multipart ``file``, ``model``, ``language``, ``prompt``, ``temperature``,
+  ``response_format`` of json/text/verbose_json/srt/vtt).
+- ``GET /v1/audio/stream`` (WebSocket): send 16 kHz mono 16-bit PCM as
+  binary messages, receive ``partial``/``final``/``utterance_end`` events as
+  JSON; send ``{"type": "end"}`` to flush, answered by ``{"type": "done"}``.
+- ``GET /health`` and ``GET /v1/models``.
+
+Usage:
+python voice2text.py daemon [--port 8765] [--model base] [--preload]
+"""
+
+import io
+import json
+import os
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import ws_protocol
+from batch_transcribe import format_timestamp
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+RESPONSE_FORMATS = ('json', 'text', 'verbose_json', 'srt', 'vtt')
+
+
+class TranscriptionService:
+    """
+    Shared models for all clients.
+
+    :param default_model: Whisper model used when a request names none
+        (or an OpenAI name such as ``whisper-1``).
+    :param device: ``cpu``/``cuda``, detected if None.
+    :param ram_budget_mb: Budget of the model registry; least recently used models are unloaded.
+    :param tuning: Calibrated CTranslate2 settings per ``model:device`` (``whisper_tuning`` in the config).
+    :param vad_backend: VAD used by streaming sessions.
+    """
+
+    def __init__(self, default_model='base', device=None, ram_budget_mb=2048, tuning=None, vad_backend='energy'):
+        from whisper_models import WhisperModelRegistry, detect_device
+
+        self.default_model = default_model
+        self.device = device or detect_device()
+        self.registry = WhisperModelRegistry(ram_budget_mb)
+        self.tuning = tuning or {}
+        self.vad_backend = vad_backend
+        self._load_lock = threading.Lock()
+        self.requests = 0
+        self.streams = 0
+        self.started = time.time()
+
+    def model_name(self, name):
+        from whisper_models import WHISPER_MODELS
+
+        return name if name in WHISPER_MODELS else self.default_model
+
+    def model(self, name=None):
+        """Loaded ``WhisperModel`` for ``name``; loads it once, however many clients ask."""
+        from whisper_models import create_whisper_model
+        from whisper_tuning import tuned_settings
+
+        name = self.model_name(name)
+        with self._load_lock:
+            model = self.registry.get(name)
+            if model is not None:
+                return model
+            # Clients stream in parallel, so use the workers calibrated for concurrency if any
+            settings = tuned_settings(self.tuning, name, self.device, concurrent=True)
+            print(f"Loading Whisper model {name} on {self.device} ({settings['compute_type']})")
+            return self.registry.load(name, lambda: create_whisper_model(name, device=self.device, **settings),
+                                      self.device)
+
+    def transcribe(self, audio, model=None, **kwargs):
+        """Transcribe a 16 kHz float32 array or an audio file object; returns ``(segments, info)``."""
+        segments, info = self.model(model).transcribe(audio, **kwargs)
+        return list(segments), info
+
+    def open_stream(self, model=None, language='en'):
+        return StreamSession(self, model, language)
+
+    def health(self):
+        return {
+            "status": "ok",
+            "device": self.device,
+            "default_model": self.default_model,
+            "loaded_models": list(self.registry.footprints()),
+            "models_mb": round(self.registry.total_mb(), 1),
+            "requests": self.requests,
+            "streams": self.streams,
+            "uptime_s": round(time.time() - self.started),
+        }
+
+
+class StreamSession:
+    """
+    Live transcription of one client's audio, the same ``DictationSession``
+    as the GUI's real-time dictation: only speech passes the VAD gate, and
+    the rolling window is committed when an utterance ends.
+    """
+
+    def __init__(self, service, model=None, language='en'):
+        from streaming import DictationSession, StreamingTranscriber
+        from vad import SpeechGate, create_vad
+
+        model = service.model(model)
+        self.gate = SpeechGate(create_vad(service.vad_backend))
+        self.events = []
+        self.session = DictationSession(
+            StreamingTranscriber(lambda audio, **kwargs: list(model.transcribe(audio, **kwargs)[0]),
+                                 language=language),
+            self.gate,
+            on_final=lambda text: self.events.append({"type": "final", "text": text}),
+            on_partial=lambda text: self.events.append({"type": "partial", "text": text}),
+            on_utterance_end=lambda audio: self.events.append({"type": "utterance_end"}))
+
+    def feed(self, frames):
+        """Process 16 kHz PCM16 bytes; returns the events to send."""
+        self.session.feed_pcm(frames)
+        self.events.append({"type": "status", "in_speech": self.gate.in_speech,
+                            "silence_seconds": self.gate.silence_seconds})
+        return self._take()
+
+    def finish(self):
+        """Commit whatever is still pending at the end of the stream."""
+        self.session.finish()
+        self.events.append({"type": "done", "speech_ratio": self.gate.speech_ratio})
+        return self._take()
+
+    def _take(self):
+        events, self.events = self.events, []
+        return events
+
+
+def format_transcription(segments, info, response_format, words=False):
+    """Body and content type of an OpenAI-style transcription response."""
+    text = " ".join(s.text.strip() for s in segments).strip()
+    if response_format == 'text':
+        return text + "\n", 'text/plain; charset=utf-8'
+    if response_format == 'srt':
+        blocks = [f"{i}\n{format_timestamp(s.start)} --> {format_timestamp(s.end)}\n{s.text.strip()}\n"
+                  for i, s in enumerate(segments, 1)]
+        return "\n".join(blocks), 'text/plain; charset=utf-8'
+    if response_format == 'vtt':
+        blocks = [f"{format_timestamp(s.start).replace(',', '.')} --> {format_timestamp(s.end).replace(',', '.')}\n"
+                  f"{s.text.strip()}\n"
+                  for s in segments]
+        return "WEBVTT\n\n" + "\n".join(blocks), 'text/vtt; charset=utf-8'
+    if response_format == 'verbose_json':
+        body = {
+            "task": "transcribe",
+            "language": info.language,
+            "duration": round(info.duration, 3),
+            "text": text,
+            "segments": [{"id": i, "start": round(s.start, 3), "end": round(s.end, 3), "text": s.text,
+                          "avg_logprob": s.avg_logprob, "no_speech_prob": s.no_speech_prob}
+                         for i, s in enumerate(segments)],
+        }
+        if words:
+            body["words"] = [{"word": w.word.strip(), "start": round(w.start, 3), "end": round(w.end, 3)}
+                             for s in segments for w in (s.words or [])]
+        return json.dumps(body), 'application/json'
+    return json.dumps({"text": text}), 'application/json'
+
+
+def parse_multipart(content_type, body):
+    """Fields of a ``multipart/form-data`` body: name -> str, or bytes for files; repeated names -> list."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode('latin-1') + b"\r\n\r\n" + body)
+    if not message.is_multipart():
+        raise ValueError("Expected multipart/form-data")
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param('name', header='content-disposition')
+        if not name:
+            continue
+        payload = part.get_payload(decode=True) or b""
+        value = payload if part.get_filename() is not None else payload.decode('utf-8')
+        if name in fields:
+            previous = fields[name]
+            fields[name] = (previous if isinstance(previous, list) else [previous]) + [value]
+        else:
+            fields[name] = value
+    return fields
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    server_version = "Voice2TextDaemon/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type='application/json'):
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, message):
+        self.send_body(status, json.dumps({"error": {"message": message, "type": "invalid_request_error"}}))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/health':
+            self.send_body(200, json.dumps(self.service.health()))
+        elif url.path == '/v1/models':
+            from whisper_models import WHISPER_MODELS
+            self.send_body(200, json.dumps({"object": "list", "data": [
+                {"id": name, "object": "model", "owned_by": "local"} for name in WHISPER_MODELS]}))
+        elif url.path == '/v1/audio/stream':
+            self.handle_stream(parse_qs(url.query))
+        else:
+            self.send_error_json(404, f"Unknown path {url.path}")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/v1/audio/transcriptions':
+            self.send_error_json(404, f"Unknown path {url.path}")
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length or length > MAX_UPLOAD_BYTES:
+            self.send_error_json(413 if length else 411, "Missing or oversized request body")
+            return
+        try:
+            fields = parse_multipart(self.headers.get('Content-Type', ''), self.rfile.read(length))
+        except ValueError as e:
+            self.send_error_json(400, str(e))
+            return
+        upload = fields.get('file')
+        if not isinstance(upload, bytes):
+            self.send_error_json(400, "Missing 'file'")
+            return
+        response_format = fields.get('response_format', 'json')
+        if response_format not in RESPONSE_FORMATS:
+            self.send_error_json(400, f"Unsupported response_format {response_format!r}")
+            return
+        granularities = fields.get('timestamp_granularities[]', [])
+        words = 'word' in (granularities if isinstance(granularities, list) else [granularities])
+        try:
+            temperature = float(fields.get('temperature') or 0.0)
+        except (TypeError, ValueError):
+            self.send_error_json(400, f"Invalid temperature {fields.get('temperature')!r}")
+            return
+
+        from faster_whisper import decode_audio
+
+        self.service.requests += 1
+        start = time.perf_counter()
+        try:
+            audio = decode_audio(io.BytesIO(upload), sampling_rate=16000)
+            segments, info = self.service.transcribe(
+                audio, model=fields.get('model'), language=fields.get('language') or None,
+                initial_prompt=fields.get('prompt') or None,
+                temperature=temperature, word_timestamps=words)
+        except Exception as e:
+            self.send_error_json(500, f"Transcription failed: {e}")
+            return
+        body, content_type = format_transcription(segments, info, response_format, words)
+        if self.server.verbose:
+            print(f"Transcribed {info.duration:.1f} s in {time.perf_counter() - start:.2f} s")
+        self.send_body(200, body, content_type)
+
+    def handle_stream(self, query):
+        key = self.headers.get('Sec-WebSocket-Key')
+        if self.headers.get('Upgrade', '').lower() != 'websocket' or not key:
+            self.send_error_json(426, "WebSocket upgrade required")
+            return
+        try:
+            session = self.service.open_stream(query.get('model', [None])[0], query.get('language', ['en'])[0])
+        except Exception as e:
+            self.send_error_json(500, f"Could not load model: {e}")
+            return
+        self.send_response(101)
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', ws_protocol.accept_key(key))
+        self.end_headers()
+        self.close_connection = True
+        self.service.streams += 1
+
+        ws = ws_protocol.WebSocket(self.rfile, self.wfile)
+        try:
+            while True:
+                message = ws.receive()
+                if message is None:
+                    break
+                if isinstance(message, bytes):
+                    for event in session.feed(message):
+                        ws.send_json(event)
+                elif json.loads(message).get('type') == 'end':
+                    for event in session.finish():
+                        ws.send_json(event)
+                    break
+        except (OSError, ValueError, ws_protocol.WebSocketError) as e:
+            print(f"Stream ended: {e}")
+        finally:
+            ws.close()
+
+
+class DaemonServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service, verbose=False):
+        super().__init__(address, DaemonHandler)
+        self.service = service
+        self.verbose = verbose
+
+
+def load_settings():
+    """Whisper settings shared with the GUI (``~/.voice_config.json``)."""
+    try:
+        with open(os.path.expanduser('~/.voice_config.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def add_parser(subparsers):
+    from whisper_models import WHISPER_MODELS
+
+    parser = subparsers.add_parser('daemon', help='Serve transcription to all local clients from one loaded model')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'Address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('-m', '--model', default=None, choices=WHISPER_MODELS,
+                        help='Default Whisper model (default: the GUI\'s selected model)')
+    parser.add_argument('--device', choices=['cpu', 'cuda'], default=None)
+    parser.add_argument('--preload', action='store_true', help='Load the default model before accepting requests')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log every request')
+    parser.set_defaults(func=main)
+    return parser
+
+
+def main(args):
+    settings = load_settings()
+    service = TranscriptionService(
+        default_model=args.model or settings.get('whisper_model', 'base'),
+        device=args.device,
+        ram_budget_mb=settings.get('whisper_ram_budget_mb', 2048),
+        tuning=settings.get('whisper_tuning', {}),
+        vad_backend=settings.get('vad_backend', 'energy'))
+    if args.preload:
+        start = time.perf_counter()
+        service.model()
+        print(f"✅ {service.default_model} loaded in {time.perf_counter() - start:.1f} s")
+    server = DaemonServer((args.host, args.port), service, args.verbose)
+    print(f"🎧 Transcription daemon on http://{args.host}:{args.port} "
+          f"(model {service.default_model}, {service.device})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
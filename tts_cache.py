@@ -0,0 +1,153 @@
+"""
+On-disk cache of synthesized speech.
+
+Audio is stored under a hash of (engine, voice, rate, normalized text), so
+repeated phrases are played straight from disk without synthesizing them
+again. The total size is capped; the least recently used files are evicted
+first. The index lives in memory and is rebuilt from the directory at
+startup, with file modification times recording recency across restarts.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.expanduser('~/.cache/voice2text/tts')
+
+
+def normalize_text(text):
+    """Collapse whitespace so trivially different strings share an entry."""
+    return " ".join(text.split())
+
+
+class TTSCache:
+    """
+    Size-capped LRU cache of audio files.
+
+    :param directory: Where cached files are kept.
+    :param max_bytes: Total size budget; 0 disables caching.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (filename, size), oldest first
+        self._total = 0
+        self._load_index()
+
+    def _load_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            key, ext = os.path.splitext(name)
+            if ext == '.tmp' or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, key, name, stat.st_size))
+        for _, key, name, size in sorted(files):
+            self._entries[key] = (name, size)
+            self._total += size
+        self._evict()
+
+    @staticmethod
+    def key(engine, voice, rate, text):
+        data = json.dumps([engine, voice, rate, normalize_text(text)], ensure_ascii=False)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    def contains(self, path):
+        """True if ``path`` is a file owned by the cache (callers must not delete it)."""
+        return os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory)
+
+    def get(self, key):
+        """Path of the cached audio for ``key``, or None. Counts a hit or a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                path = os.path.join(self.directory, entry[0])
+                if os.path.exists(path):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    try:
+                        os.utime(path)  # Recency survives a restart
+                    except OSError:
+                        pass
+                    return path
+                # Deleted behind our back
+                del self._entries[key]
+                self._total -= entry[1]
+            self.misses += 1
+            return None
+
+    def put_file(self, key, source_path, move=True):
+        """
+        Store an audio file under ``key`` and return its path in the cache.
+
+        :param move: Move ``source_path`` into the cache instead of copying it.
+        """
+        if self.max_bytes <= 0:
+            return source_path
+        name = key + os.path.splitext(source_path)[1]
+        path = os.path.join(self.directory, name)
+        tmp_path = path + ".tmp"
+        if move:
+            shutil.move(source_path, tmp_path)
+        else:
+            shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+        self._add(key, name, os.path.getsize(path))
+        return path
+
+    def put_audio(self, key, audio, sample_rate):
+        """Store float32 samples as FLAC and return the cached path, or None if caching is off."""
+        import soundfile as sf
+
+        if self.max_bytes <= 0:
+            return None
+        name = key + ".flac"
+        path = os.path.join(self.directory, name)
+        tmp_path = path + ".tmp"
+        sf.write(tmp_path, audio, sample_rate, format='FLAC')
+        os.replace(tmp_path, path)
+        self._add(key, name, os.path.getsize(path))
+        return path
+
+    def load_audio(self, path):
+        """Read a cached FLAC back as ``(float32 samples, sample_rate)``."""
+        import soundfile as sf
+
+        return sf.read(path, dtype='float32')
+
+    def _add(self, key, name, size):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            self._entries[key] = (name, size)
+            self._total += size
+            self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            _, (name, size) = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass  # Still open for playback on some platforms
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return (f"TTS cache: {self.hits} hits, {self.misses} misses ({rate:.0f}%), "
+                f"{len(self._entries)} files, {self._total / 1024 / 1024:.1f} MB")
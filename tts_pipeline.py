@@ -0,0 +1,191 @@
+"""
+Sentence-pipelined text-to-speech.
+
+LLM output is cut into sentences as it streams in. A synthesis thread turns
+each sentence into audio while a playback thread plays the previous one, so
+speech starts after the first sentence instead of after the whole reply.
+Sentences are always played in the order they were added.
+
+``synthesize`` may also return a generator (or any other iterator) of audio
+buffers. The synthesis thread drains it into a per-sentence queue, so
+playback of that sentence starts with its first buffer while the rest is
+still being synthesized, and the next sentence is synthesized while it plays.
+"""
+
+import collections.abc
+import queue
+import re
+import threading
+import time
+
+# Sentence end: terminal punctuation (optionally closed by a quote or bracket)
+# followed by whitespace, or a blank line / list item break.
+_BOUNDARY = re.compile(r'(?<=[.!?…])["\')\]]*\s+|\n\s*\n|\n(?=\s*(?:[-*•]|\d+\.)\s)')
+_ABBREVIATIONS = ('mr.', 'mrs.', 'ms.', 'dr.', 'prof.', 'st.', 'vs.', 'etc.', 'e.g.', 'i.e.', 'approx.')
+
+
+class SentenceSplitter:
+    """Incrementally splits streamed text into sentences."""
+
+    def __init__(self, min_chars=20):
+        """
+        :param min_chars: Shorter sentences are held back and joined with the
+            next one, so TTS is not asked to speak "Sure." on its own.
+        """
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, text):
+        """Add streamed text and return the sentences completed by it."""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars or candidate.lower().endswith(_ABBREVIATIONS):
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Return whatever is left at the end of the stream."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+class SegmentStream:
+    """Buffers of one sentence, produced by the synthesis thread and consumed by playback."""
+
+    _END = object()
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.on_first_buffer = None
+
+    def put(self, buffer):
+        self._queue.put(buffer)
+
+    def close(self):
+        self._queue.put(self._END)
+
+    def __iter__(self):
+        while True:
+            buffer = self._queue.get()
+            if buffer is self._END:
+                return
+            if self.on_first_buffer:
+                self.on_first_buffer()
+                self.on_first_buffer = None
+            yield buffer
+
+
+class SpeechPipeline:
+    """
+    Synthesizes sentence N+1 while sentence N is playing.
+
+    :param synthesize: ``synthesize(text)`` returning audio for ``play``, or None to skip.
+        An iterator result is consumed on the synthesis thread and passed to
+        ``play`` as a ``SegmentStream``.
+    :param play: ``play(audio)`` blocking until the audio has finished.
+    :param on_first_audio: Called with the ``time.perf_counter()`` timestamp
+        when the first sentence starts playing.
+    :param cleanup: Optional ``cleanup(audio)`` run after playback or when cancelled.
+    """
+
+    _DONE = object()
+
+    def __init__(self, synthesize, play, on_first_audio=None, cleanup=None, lookahead=2):
+        self.synthesize = synthesize
+        self.play = play
+        self.on_first_audio = on_first_audio
+        self.cleanup = cleanup
+        self.cancelled = threading.Event()
+        self.first_audio_time = None
+        self.error = None
+        self._text_queue = queue.Queue()
+        # Bounded so synthesis stays only a little ahead of playback
+        self._audio_queue = queue.Queue(maxsize=lookahead)
+        self._synth_thread = threading.Thread(target=self._synth_loop, daemon=True)
+        self._play_thread = threading.Thread(target=self._play_loop, daemon=True)
+        self._synth_thread.start()
+        self._play_thread.start()
+
+    def add(self, sentence):
+        if sentence and sentence.strip():
+            self._text_queue.put(sentence)
+
+    def close(self):
+        """No more sentences will be added."""
+        self._text_queue.put(self._DONE)
+
+    def wait(self):
+        """Block until everything added has been played (or the pipeline was cancelled)."""
+        self._synth_thread.join()
+        self._play_thread.join()
+
+    def cancel(self):
+        self.cancelled.set()
+        self._text_queue.put(self._DONE)
+
+    def _synth_loop(self):
+        try:
+            while True:
+                sentence = self._text_queue.get()
+                if sentence is self._DONE or self.cancelled.is_set():
+                    break
+                try:
+                    audio = self.synthesize(sentence)
+                    # Lazy results must not run on the playback thread, where the next
+                    # sentence would only start synthesizing once this one has played
+                    if isinstance(audio, collections.abc.Iterator):
+                        self._stream_segments(audio)
+                        continue
+                except Exception as e:
+                    self.error = e
+                    continue
+                if audio is not None:
+                    self._audio_queue.put(audio)
+        finally:
+            self._audio_queue.put(self._DONE)
+
+    def _stream_segments(self, generator):
+        """Hand the sentence to playback first, then fill it as segments are generated."""
+        stream = SegmentStream()
+        self._audio_queue.put(stream)
+        try:
+            for segment in generator:
+                if self.cancelled.is_set():
+                    break
+                stream.put(segment)
+        finally:
+            stream.close()
+            if hasattr(generator, 'close'):
+                generator.close()
+
+    def _play_loop(self):
+        while True:
+            audio = self._audio_queue.get()
+            if audio is self._DONE:
+                break
+            try:
+                if not self.cancelled.is_set():
+                    if isinstance(audio, SegmentStream):
+                        # Audio starts with the first segment, not when playback begins waiting
+                        audio.on_first_buffer = self._mark_first_audio
+                    else:
+                        self._mark_first_audio()
+                    self.play(audio)
+            except Exception as e:
+                self.error = e
+            finally:
+                if self.cleanup:
+                    self.cleanup(audio)
+
+    def _mark_first_audio(self):
+        if self.first_audio_time is None:
+            self.first_audio_time = time.perf_counter()
+            if self.on_first_audio:
+                self.on_first_audio(self.first_audio_time)
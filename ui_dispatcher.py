@@ -0,0 +1,140 @@
+"""
+Event-driven GUI updates for the Tk apps.
+
+Worker threads must not touch Tk widgets. They post typed events here
+instead; the dispatcher wakes the Tk loop only when something was posted
+(no polling timer) and handles everything pending at most once per frame.
+Bursts are merged before they reach the widgets: for a ``"last"`` event
+only the newest one is applied (status text, progress), and adjacent
+``"concat"`` events are joined into one call (streamed tokens), so a fast
+token stream costs one ``insert`` per frame instead of one per token.
+"""
+
+import collections
+import threading
+import time
+
+import numpy as np
+
+
+class UIDispatcher:
+    """
+    Delivers events posted from any thread to handlers on the Tk thread.
+
+    :param root: The Tk root window.
+    :param frame_ms: Minimum time between two dispatches; events arriving
+        meanwhile are handled together.
+    """
+
+    def __init__(self, root, frame_ms=16):
+        self.root = root
+        self.frame_ms = frame_ms
+        self._handlers = {}  # kind -> (handler, merge)
+        self._lock = threading.Lock()
+        self._pending = collections.deque()  # (kind, args, posted_at)
+        self._scheduled = False
+        self._running = False  # True once the Tk loop has run a dispatch
+        self._last_dispatch = 0.0
+        # Metrics
+        self.posted = 0
+        self.handled = 0
+        self.frames = 0
+        self.max_depth = 0
+        self._latencies = collections.deque(maxlen=1000)  # Seconds from post to handler
+
+    def register(self, kind, handler, merge=None):
+        """
+        :param handler: Called with the event's arguments on the Tk thread.
+        :param merge: None to handle every event, ``"last"`` to handle only the
+            newest pending one, ``"concat"`` to join the (string) first argument
+            of adjacent events.
+        """
+        if merge not in (None, "last", "concat"):
+            raise ValueError(f"Unknown merge mode: {merge}")
+        self._handlers[kind] = (handler, merge)
+
+    def post(self, kind, *args):
+        """Queue an event; safe to call from any thread."""
+        with self._lock:
+            self._pending.append((kind, args, time.perf_counter()))
+            self.posted += 1
+            self.max_depth = max(self.max_depth, len(self._pending))
+            if self._scheduled or not self._running:
+                # Before the main loop runs, start() has a dispatch queued already
+                return
+            self._scheduled = True
+            delay = max(0, int(self.frame_ms - (time.perf_counter() - self._last_dispatch) * 1000))
+        try:
+            self.root.after(delay, self._dispatch)
+        except RuntimeError:
+            # Main loop has exited (window closing)
+            with self._lock:
+                self._scheduled = False
+
+    def start(self):
+        """Handle whatever was posted before the main loop; call from the Tk thread."""
+        with self._lock:
+            self._scheduled = True
+        self.root.after(0, self._dispatch)
+
+    @property
+    def depth(self):
+        return len(self._pending)
+
+    def _dispatch(self):
+        with self._lock:
+            events = list(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+            self._running = True
+            self._last_dispatch = time.perf_counter()
+        self.frames += 1
+        for kind, args, posted_at in self._merge(events):
+            handler = self._handlers.get(kind)
+            if handler is None:
+                print(f"No UI handler for {kind!r}")
+                continue
+            self._latencies.append(time.perf_counter() - posted_at)
+            self.handled += 1
+            try:
+                handler[0](*args)
+            except Exception as e:
+                print(f"UI handler {kind!r} failed: {e}")
+
+    def _merge(self, events):
+        newest = {}
+        for i, (kind, _, _) in enumerate(events):
+            if self._handlers.get(kind, (None, None))[1] == "last":
+                newest[kind] = i
+        merged = []
+        for i, (kind, args, posted_at) in enumerate(events):
+            merge = self._handlers.get(kind, (None, None))[1]
+            if merge == "last" and newest[kind] != i:
+                continue
+            if merge == "concat" and merged and merged[-1][0] == kind:
+                # Keep the first post time: latency is that of the oldest token
+                prev_args, prev_posted = merged[-1][1], merged[-1][2]
+                merged[-1] = (kind, (prev_args[0] + args[0],) + tuple(args[1:]), prev_posted)
+                continue
+            merged.append((kind, args, posted_at))
+        return merged
+
+    def stats(self):
+        """Queue depth and post-to-handler latency (milliseconds)."""
+        latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+        return {
+            "posted": self.posted,
+            "handled": self.handled,
+            "frames": self.frames,
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "latency_ms_p50": float(np.percentile(latencies, 50)),
+            "latency_ms_p95": float(np.percentile(latencies, 95)),
+            "latency_ms_max": float(latencies.max()),
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"UI: {s['posted']} events in {s['frames']} frames ({s['handled']} widget updates), "
+                f"max queue {s['max_depth']}, latency p50 {s['latency_ms_p50']:.1f} ms, "
+                f"p95 {s['latency_ms_p95']:.1f} ms")
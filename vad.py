@@ -0,0 +1,162 @@
+"""
+Voice activity detection between capture and recognition.
+
+Audio is split into short frames (10-30 ms), each frame is classified by a
+backend, and a SpeechGate smooths the decisions with an onset count and a
+hangover so that short pauses inside an utterance do not cut it apart. Only
+the audio the gate lets through is sent to Whisper.
+"""
+
+import numpy as np
+
+from audio_utils import rms
+
+SAMPLE_RATE = 16000
+
+
+class EnergyVAD:
+    """Frame energy against an adaptive noise floor."""
+
+    name = "energy"
+
+    def __init__(self, threshold=500, ratio=3.0, adapt=0.05):
+        """
+        :param threshold: Minimum RMS (int16 scale) for a frame to count as speech.
+        :param ratio: How far above the tracked noise floor speech must be.
+        :param adapt: Smoothing factor for the noise floor estimate.
+        """
+        self.threshold = threshold
+        self.ratio = ratio
+        self.adapt = adapt
+        self.noise_floor = threshold / ratio
+
+    def is_speech(self, frame):
+        level = rms(frame)
+        speech = level > max(self.threshold, self.noise_floor * self.ratio)
+        if not speech:
+            self.noise_floor += self.adapt * (level - self.noise_floor)
+        return speech
+
+
+class WebRTCVAD:
+    """Google's WebRTC VAD (GMM based); needs the optional webrtcvad package."""
+
+    name = "webrtc"
+
+    def __init__(self, aggressiveness=2):
+        import webrtcvad
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame):
+        pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+        return self.vad.is_speech(pcm, SAMPLE_RATE)
+
+
+VAD_BACKENDS = {
+    "energy": EnergyVAD,
+    "webrtc": WebRTCVAD,
+}
+
+
+_reported_unavailable = set()
+
+
+def create_vad(backend="energy", **kwargs):
+    """
+    Create a VAD backend by name, falling back to energy if it cannot load.
+
+    Energy is the default since it needs no extra package; ``"webrtc"`` is
+    more robust to noise once ``webrtcvad`` is installed.
+    """
+    try:
+        return VAD_BACKENDS[backend](**kwargs)
+    except (ImportError, KeyError) as e:
+        # Reported once per process, not at every dictation start
+        if backend not in _reported_unavailable:
+            _reported_unavailable.add(backend)
+            print(f"VAD backend '{backend}' unavailable ({e}), using energy VAD")
+        return EnergyVAD()
+
+
+class SpeechGate:
+    """
+    Turns per-frame VAD decisions into speech segments.
+
+    ``process`` takes float32 16 kHz audio of any length and returns a list of
+    ``(audio, ended)`` pieces: speech audio to transcribe, and whether the
+    utterance it belongs to ended with this piece.
+    """
+
+    def __init__(self, vad, frame_ms=30, onset_ms=90, hangover_ms=600, preroll_ms=300):
+        """
+        :param vad: Backend with an ``is_speech(frame)`` method.
+        :param frame_ms: Frame length; WebRTC VAD accepts 10, 20 or 30 ms.
+        :param onset_ms: Consecutive speech needed to open the gate.
+        :param hangover_ms: Consecutive non-speech needed to close it again.
+        :param preroll_ms: Audio kept from before the onset so word starts are not clipped.
+        """
+        self.vad = vad
+        self.frame_len = SAMPLE_RATE * frame_ms // 1000
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.preroll_frames = max(self.onset_frames, preroll_ms // frame_ms)
+        self.frame_ms = frame_ms
+        self.reset()
+
+    def reset(self):
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._preroll = []
+        self.in_speech = False
+        self._speech_run = 0
+        self._silence_run = 0
+        self.total_frames = 0
+        self.speech_frames = 0  # Frames passed on to recognition
+
+    @property
+    def silence_seconds(self):
+        """Length of the current stretch of non-speech."""
+        return self._silence_run * self.frame_ms / 1000
+
+    @property
+    def speech_ratio(self):
+        return self.speech_frames / self.total_frames if self.total_frames else 0.0
+
+    def process(self, audio):
+        audio = np.concatenate([self._pending, audio])
+        n_frames = len(audio) // self.frame_len
+        self._pending = audio[n_frames * self.frame_len:]
+
+        pieces = []
+        current = []
+        for i in range(n_frames):
+            frame = audio[i * self.frame_len:(i + 1) * self.frame_len]
+            speech = self.vad.is_speech(frame)
+            self.total_frames += 1
+
+            if speech:
+                self._speech_run += 1
+                self._silence_run = 0
+            else:
+                self._speech_run = 0
+                self._silence_run += 1
+
+            if not self.in_speech:
+                self._preroll.append(frame)
+                if len(self._preroll) > self.preroll_frames:
+                    self._preroll.pop(0)
+                if self._speech_run >= self.onset_frames:
+                    self.in_speech = True
+                    current.extend(self._preroll)
+                    self.speech_frames += len(self._preroll)
+                    self._preroll = []
+            else:
+                current.append(frame)
+                self.speech_frames += 1
+                if self._silence_run >= self.hangover_frames:
+                    self.in_speech = False
+                    pieces.append((np.concatenate(current), True))
+                    current = []
+
+        if current:
+            pieces.append((np.concatenate(current), False))
+        return pieces
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Voice 2 Text command line entry point.
+
+Usage:
+python voice2text.py                 # start the GUI
+python voice2text.py batch FILES...  # transcribe recorded audio files
+python voice2text.py daemon          # serve one shared Whisper model to all clients
+"""
+
+import argparse
+import sys
+
+import batch_transcribe
+import transcription_daemon
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='voice2text', description='Voice 2 Text')
+    subparsers = parser.add_subparsers(dest='command')
+    batch_transcribe.add_parser(subparsers)
+    transcription_daemon.add_parser(subparsers)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        import voice_app
+        voice_app.main()
+        return 0
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
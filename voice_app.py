@@ -17,35 +17,30 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import pyperclip
 import threading
+import functools
 import time
 import json
 import pyaudio
 import numpy as np
 import tempfile
-import wave
-from faster_whisper import WhisperModel
-from scipy.signal import resample
-import torch
+from audio_utils import WHISPER_SAMPLE_RATE, StreamingResampler, pcm16_to_float32
+from ring_buffer import AudioRingBuffer
+from streaming import DictationSession, StreamingTranscriber
+from vad import SpeechGate, create_vad
+from whisper_models import WHISPER_MODELS, WHISPER_MODEL_INFO, WhisperModelRegistry, create_whisper_model, detect_device
+from whisper_tuning import calibrate, tuned_settings, tuning_key
+import ollama_client
+from tts_pipeline import SentenceSplitter, SpeechPipeline
+from tts_cache import TTSCache
+from audio_output import AudioOutput, decode_file
+import discovery
 import requests
-from gtts import gTTS
-import pygame
-import asyncio
-import edge_tts
-from PIL import Image, ImageTk
+from gradient import GradientCache, gradient_image
+from ui_dispatcher import UIDispatcher
+from tracing import Tracer
+from daemon_client import DEFAULT_URL as DAEMON_URL, DaemonClient
 import datetime
 import queue
-from tqdm import tqdm
-
-class GuiTqdm(tqdm):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.app = getattr(GuiTqdm, 'app', None)
-
-    def update(self, n=1):
-        super().update(n)
-        if self.app and self.total and self.total > 0:
-            progress = min(100, self.n / self.total * 100)
-            self.app.queue.put(('progress', progress))
 
 
 class VoiceApp:
@@ -57,14 +52,20 @@ class VoiceApp:
         self.root.resizable(True, True)
 
         # Create canvas with gradient background
-        self.canvas = tk.Canvas(self.root, width=900, height=800, highlightthickness=0)
+        self.canvas = tk.Canvas(self.root, width=900, height=800, highlightthickness=0, bg='black')
         self.canvas.pack(fill='both', expand=True)
 
-        # Bind resize event
+        # Backgrounds are cached per size; resizes are applied once the window settles
+        self.gradients = GradientCache(self.render_gradient)
+        self.resize_job = None
         self.canvas.bind('<Configure>', self.on_canvas_resize)
 
-        # Create initial gradient
-        self.create_gradient(900, 800)
+        # Thread-safe GUI updates: workers post events, the Tk loop is woken only when needed
+        self.ui = UIDispatcher(self.root)
+        self.register_ui_handlers()
+
+        # No initial gradient: the first <Configure> draws it at the real size, after the
+        # window is up, and the black canvas matches its top colour until then
 
         # Config
         self.config_file = os.path.expanduser('~/.voice_config.json')
@@ -74,9 +75,18 @@ class VoiceApp:
         # TTS settings
         self.tts_rate = self.config.get('tts_rate', 180)
 
-        # Audio devices
-        self.audio = pyaudio.PyAudio()
-        self.microphones = self.get_microphones()
+        # Voice activity detection backend: 'energy', or 'webrtc' with the optional webrtcvad package
+        self.vad_backend = self.config.get('vad_backend', 'energy')
+
+        # Audio devices and Ollama models are discovered in the background; until then
+        # the lists found at the previous launch are shown
+        self.discovery = discovery.Discovery(self.list_audio_devices, self.list_ollama_models,
+                                             on_devices=lambda inputs, outputs: self.ui.post("devices", inputs),
+                                             on_models=lambda models, error: self.ui.post("models", models, error))
+        self.audio = None  # PortAudio is initialized by the discovery thread
+        self.audio_lock = threading.Lock()
+        self.audio_ready = threading.Event()
+        self.microphones = self.discovery.cached_devices()[0]
         self.selected_mic_index = 0
         self.selected_mic_name = self.config.get('microphone_name', '')
 
@@ -86,59 +96,102 @@ class VoiceApp:
         self.model_var = tk.StringVar()
 
         # Set mic from saved name or default
-        if self.microphones:
-            if self.selected_mic_name and self.selected_mic_name in self.microphones:
-                self.mic_var.set(self.selected_mic_name)
-                self.selected_mic_index = self.microphones.index(self.selected_mic_name)
-            else:
-                self.mic_var.set(self.microphones[0])
-                self.selected_mic_index = 0
-                self.selected_mic_name = self.microphones[0]
-        else:
-            self.mic_var.set("No microphone detected")
-            self.selected_mic_name = ''
+        self.select_microphone()
 
         # Whisper models
-        self.whisper_models = ["tiny", "base", "small", "medium", "large-v2", "large-v3"]
+        self.whisper_models = WHISPER_MODELS
         self.selected_whisper_model = self.config.get('whisper_model', 'tiny')
-        # Model sizes in MB and estimated download times in minutes (assuming 1 MB/s)
-        self.model_info = {
-            "tiny": {"size": 39, "eta": 1},
-            "base": {"size": 74, "eta": 1},
-            "small": {"size": 244, "eta": 4},
-            "medium": {"size": 769, "eta": 13},
-            "large-v2": {"size": 1550, "eta": 26},
-            "large-v3": {"size": 1550, "eta": 26}
-        }
+        self.model_info = WHISPER_MODEL_INFO
+
+        # Speech recognition with Faster Whisper, recently used models stay cached
+        self.whisper_ram_budget_mb = self.config.get('whisper_ram_budget_mb', 2048)
+        self.model_registry = WhisperModelRegistry(self.whisper_ram_budget_mb)
+        # Per model/device CTranslate2 settings found by calibration
+        self.whisper_tuning = self.config.get('whisper_tuning', {})
+
+        # Two-pass decoding: a small draft model for partials, the selected model for finals
+        self.two_pass = self.config.get('two_pass', False)
+        self.draft_whisper_model = self.config.get('draft_whisper_model', 'tiny')
+        self.draft_model = None
+        if self.two_pass:
+            threading.Thread(target=self.load_draft_model, daemon=True).start()
+        self.model = None
+        # A running transcription daemon (python voice2text.py daemon) serves recognition from its
+        # resident model instead; set to "" to always load Whisper in this process
+        self.daemon_url = self.config.get('transcription_daemon', DAEMON_URL)
+        self.daemon = None
+        # Run a silent clip, an Ollama preload and a TTS init at startup so the first turn is not slow
+        self.warmup = self.config.get('warmup', True)
+        # Print diagnostics (VAD ratios, cache and UI statistics) to the console
+        self.verbose = self.config.get('verbose', False)
+
+        # Text-to-speech engine; synthesized sentences are kept in a size-capped cache.
+        # Playback goes through a PyAudio callback stream, pygame is only loaded to decode MP3s.
+        self.output_device_index = self.config.get('output_device_index')
+        self.output = AudioOutput(device_index=self.output_device_index)
+        self.tts_cache_mb = self.config.get('tts_cache_mb', 200)
+        self.tts_cache = TTSCache(max_bytes=self.tts_cache_mb * 1024 * 1024)
+        self.tts_playing = False
 
-        # Speech recognition with Faster Whisper
-        threading.Thread(target=self.load_whisper_model, daemon=True).start()
+        # Set to stop a streaming AI reply
+        self.ai_cancel = threading.Event()
 
-        # Text-to-speech engine
-        pygame.mixer.init()
-        self.tts_playing = False
+        # Per-stage timings of recent turns for the stats overlay; finished turns can also be
+        # logged as JSONL and exported as Prometheus text (both off when the path is "")
+        self.trace_log = self.config.get('trace_log', '')
+        self.metrics_file = self.config.get('metrics_file', '')
+        self.tracer = Tracer(log_path=os.path.expanduser(self.trace_log) if self.trace_log else None,
+                             metrics_path=os.path.expanduser(self.metrics_file) if self.metrics_file else None,
+                             on_update=self.on_trace_update)
+        self.stats_window = None
 
-        # Queue for thread-safe GUI updates
-        self.queue = queue.Queue()
+        # Sentence-pipelined speech; latency is measured from the end of the user's turn
+        self.speech_pipeline = None
+        self.turn_start = time.perf_counter()
+        self.last_speech_time = None
+        self.first_audio_latency = None
 
         # Performance and memory optimization
-        self.audio_frames = []  # Limit memory usage
-        self.max_audio_frames = 1000  # Prevent excessive memory usage
+        self.audio_ring = None  # Preallocated per stream, constant memory
+        self.max_buffer_seconds = 60  # Audio kept in the ring buffer
+
+        # Ollama: one pooled client, keep_alive keeps the selected model loaded between turns
+        self.ollama_url = self.config.get('ollama_url')  # None: OLLAMA_HOST or localhost
+        self.ollama_keep_alive = self.config.get('ollama_keep_alive', ollama_client.DEFAULT_KEEP_ALIVE)
+        self.ollama = ollama_client.configure(self.ollama_url, self.ollama_keep_alive)
 
         # Ollama models
-        self.ollama_models = self.get_ollama_models()
+        self.ollama_models = self.discovery.cached_models()
         self.selected_model = self.config.get('selected_model', "llama3.2" if "llama3.2" in self.ollama_models else (self.ollama_models[0] if self.ollama_models else "llama3.2"))
         # Ensure selected model is valid
         if self.ollama_models and self.selected_model not in self.ollama_models:
             self.selected_model = self.ollama_models[0]
+
+        # Follow-up questions continue one conversation; the server reuses its cached prompt
+        self.chat_history_tokens = self.config.get('chat_history_tokens', 3072)
+        self.chat = ollama_client.ChatSession(self.ollama, self.selected_model,
+                                              max_history_tokens=self.chat_history_tokens)
+        self.clear_after_send = self.config.get('clear_after_send', False)
         self.is_listening = False
         self.current_text = ""
         self.audio_stream = None
 
+        # Committed text per utterance; ids keep increasing so late refinements can be matched
+        self.transcript_lock = threading.Lock()
+        self.utterance_texts = {}
+        self.utterance_id = 0
+        self.transcript_first_id = 0  # Utterances before this one belong to a cleared transcript
+        self.refine_queue = queue.Queue()
+        threading.Thread(target=self.refine_worker, daemon=True).start()
+
         # Create GUI
         self.create_gui()
 
-        self.process_queue()
+        self.ui.start()
+        self.discovery.start()
+
+        # Load the Whisper model (and warm up) in the background
+        threading.Thread(target=self.startup, daemon=True).start()
 
         # Bind close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -148,48 +201,107 @@ class VoiceApp:
         self.time_label.config(text=current_time)
         self.root.after(1000, self.update_time)
 
-    def process_queue(self):
-        try:
-            while True:
-                msg = self.queue.get_nowait()
-                if msg[0] == "update_status":
-                    self.update_status(msg[1], msg[2])
-                elif msg[0] == "update_transcript":
-                    self.text_area.insert(tk.END, f"{msg[1]}\n")
-                    self.text_area.see(tk.END)
-                    self.root.update_idletasks()
-                elif msg[0] == "show_error":
-                    messagebox.showerror("Error", msg[1])
-                elif msg[0] == "clear_ai":
-                    self.ai_text_area.delete(1.0, tk.END)
-                elif msg[0] == "insert_ai":
-                    self.ai_text_area.insert(tk.END, msg[1])
-
-                elif msg[0] == "stop_dictation":
-                    self.stop_dictation()
-        except queue.Empty:
-            pass
-        self.root.after(100, self.process_queue)
+    def register_ui_handlers(self):
+        ui = self.ui
+        ui.register("update_status", self.show_status, merge="last")
+        ui.register("progress", self.show_progress, merge="last")
+        ui.register("progress_mode", self.show_progress_mode)
+        ui.register("loaded_label", self.update_loaded_label, merge="last")
+        ui.register("calibrate_done", lambda: self.calibrate_button.config(state='normal'))
+        ui.register("update_transcript", self.update_transcript)
+        ui.register("partial_transcript", self.show_partial, merge="last")
+        ui.register("final_transcript", self.show_final)
+        ui.register("replace_transcript", self.replace_utterance)
+        ui.register("show_error", lambda message: messagebox.showerror("Error", message))
+        ui.register("clear_ai", lambda: self.ai_text_area.delete(1.0, tk.END))
+        ui.register("insert_ai", lambda text: self.ai_text_area.insert(tk.END, text), merge="concat")
+        ui.register("stop_dictation", self.stop_dictation)
+        ui.register("dictation_done", self.copy_dictation)
+        ui.register("devices", self.update_microphones, merge="last")
+        ui.register("models", self.update_ollama_models, merge="last")
+        ui.register("trace", self.show_stats, merge="last")
+
+    def show_progress(self, value):
+        # Progress only moves forward until a new operation resets it with "progress_mode"
+        self.progress_bar.stop()
+        if str(self.progress_bar['mode']) == 'determinate':
+            value = max(value, float(self.progress_bar['value']))
+        self.progress_bar.config(mode='determinate', maximum=100, value=value)
+
+    def show_progress_mode(self, mode):
+        """``"determinate"`` restarts the bar at 0, ``"indeterminate"`` animates it, ``"stopped"`` halts it."""
+        self.progress_bar.stop()
+        if mode == 'determinate':
+            self.progress_bar.config(mode='determinate', maximum=100, value=0)
+        elif mode == 'indeterminate':
+            self.progress_bar.config(mode='indeterminate')
+            self.progress_bar.start()
+
+    def show_partial(self, text):
+        # Replace the unconfirmed tail in place
+        if self.text_area.tag_ranges("partial"):
+            self.text_area.delete("partial.first", "partial.last")
+        if text:
+            self.text_area.insert(tk.END, text, "partial")
+        self.text_area.see(tk.END)
 
-    def get_ollama_models(self):
-        """Get available Ollama models with improved error handling."""
-        try:
-            response = requests.get('http://localhost:11434/api/tags', timeout=5)
-            response.raise_for_status()  # Raise exception for bad status codes
-            data = response.json()
-            return [model['name'] for model in data.get('models', [])]
-        except requests.exceptions.Timeout:
-            self.update_status("Ollama connection timeout - check if Ollama is running", "orange")
-            return []
-        except requests.exceptions.ConnectionError:
-            self.update_status("Cannot connect to Ollama - start with 'ollama serve'", "red")
-            return []
-        except requests.exceptions.RequestException as e:
-            self.update_status(f"Ollama request error: {str(e)[:50]}", "red")
-            return []
-        except (KeyError, ValueError) as e:
-            self.update_status(f"Invalid Ollama response: {str(e)[:50]}", "red")
-            return []
+    def show_final(self, text, utterance_id, draft):
+        if self.text_area.tag_ranges("partial"):
+            self.text_area.delete("partial.first", "partial.last")
+        tags = (f"utt{utterance_id}", "draft") if draft else (f"utt{utterance_id}",)
+        self.text_area.insert(tk.END, f"{text} ", tags)
+        self.text_area.see(tk.END)
+
+    def toggle_stats(self):
+        """Open or close the overlay with the per-stage milliseconds of the last turns."""
+        if self.stats_window is not None:
+            self.stats_window.destroy()
+            self.stats_window = None
+            return
+        self.stats_window = tk.Toplevel(self.root, bg='black')
+        self.stats_window.title("Pipeline stats (ms)")
+        self.stats_window.attributes('-topmost', True)
+        self.stats_window.protocol("WM_DELETE_WINDOW", self.toggle_stats)
+        self.stats_label = tk.Label(self.stats_window, text="", justify='left', anchor='nw',
+                                    font=('Consolas', 9), bg='black', fg='#00ff88')
+        self.stats_label.pack(fill='both', expand=True, padx=8, pady=8)
+        self.show_stats()
+
+    def on_trace_update(self):
+        """Called from any thread when a span is recorded; redraws the overlay if it is open."""
+        if self.stats_window is not None:
+            self.ui.post("trace")
+
+    def show_stats(self):
+        if self.stats_window is None:
+            return
+        legend = "* turn in progress"
+        self.stats_label.config(text=f"{self.tracer.table(10)}\n\n{legend}")
+
+    def list_ollama_models(self):
+        """Called from the discovery thread."""
+        return self.ollama.list_models(timeout=5)
+
+    def update_ollama_models(self, models, error):
+        """Fill the model list with what discovery found; an error means Ollama is not reachable."""
+        if error is not None:
+            if isinstance(error, requests.exceptions.Timeout):
+                self.update_status("Ollama connection timeout - check if Ollama is running", "orange")
+            elif isinstance(error, requests.exceptions.ConnectionError):
+                self.update_status("Cannot connect to Ollama - start with 'ollama serve'", "red")
+            elif isinstance(error, requests.exceptions.RequestException):
+                self.update_status(f"Ollama request error: {str(error)[:50]}", "red")
+            else:
+                self.update_status(f"Invalid Ollama response: {str(error)[:50]}", "red")
+        self.ollama_models = models
+        self.model_combo.config(values=models if models else ["Ollama not running"])
+        if not models:
+            self.model_var.set("Ollama not running")
+        elif self.selected_model in models:
+            if self.model_var.get() != self.selected_model:
+                self.model_var.set(self.selected_model)
+        else:
+            self.model_var.set("llama3.2" if "llama3.2" in models else models[0])
 
     def load_config(self):
         config = {}
@@ -207,8 +319,24 @@ class VoiceApp:
         config = {
             'microphone_name': self.selected_mic_name,
             'selected_model': self.selected_model,
+            'ollama_url': self.ollama_url,
+            'ollama_keep_alive': self.ollama_keep_alive,
+            'chat_history_tokens': self.chat_history_tokens,
+            'clear_after_send': self.clear_after_send,
             'whisper_model': self.selected_whisper_model,
-            'tts_rate': self.tts_rate
+            'tts_rate': self.tts_rate,
+            'vad_backend': self.vad_backend,
+            'whisper_ram_budget_mb': self.whisper_ram_budget_mb,
+            'whisper_tuning': self.whisper_tuning,
+            'two_pass': self.two_pass,
+            'draft_whisper_model': self.draft_whisper_model,
+            'warmup': self.warmup,
+            'verbose': self.verbose,
+            'tts_cache_mb': self.tts_cache_mb,
+            'output_device_index': self.output_device_index,
+            'transcription_daemon': self.daemon_url,
+            'trace_log': self.trace_log,
+            'metrics_file': self.metrics_file
         }
         try:
             with open(self.config_file, 'w') as f:
@@ -219,136 +347,362 @@ class VoiceApp:
 
     def on_close(self):
         self.save_config()
-        self.audio.terminate()
+        if self.verbose:
+            print(self.tts_cache.summary())
+            print(self.ui.summary())
+        if self.tracer.current is not None:
+            self.tracer.end_turn(self.tracer.current)
+        self.discovery.stop()
+        with self.audio_lock:
+            self.output.close()
+            if self.audio is not None:
+                self.audio.terminate()
         self.root.destroy()
 
+    def render_gradient(self, width, height):
+        from PIL import ImageTk  # Not needed before the window is shown
+        return ImageTk.PhotoImage(gradient_image(width, height))
+
     def create_gradient(self, width, height):
-        color1 = (0, 0, 0)
-        color2 = (0, 0, 51)
-        img = Image.new('RGB', (width, height), color1)
-        for y in range(height):
-            r = int(color1[0] + (color2[0] - color1[0]) * y / height)
-            g = int(color1[1] + (color2[1] - color1[1]) * y / height)
-            b = int(color1[2] + (color2[2] - color1[2]) * y / height)
-            for x in range(width):
-                img.putpixel((x, y), (r, g, b))
-        self.bg_photo = ImageTk.PhotoImage(img)
-        self.canvas.delete("gradient")
-        self.canvas.create_image(0, 0, anchor='nw', image=self.bg_photo, tags="gradient")
+        self.bg_photo = self.gradients.get(width, height)
+        if self.canvas.find_withtag("gradient"):
+            self.canvas.itemconfig("gradient", image=self.bg_photo)
+        else:
+            self.canvas.create_image(0, 0, anchor='nw', image=self.bg_photo, tags="gradient")
+            self.canvas.tag_lower("gradient")
 
     def on_canvas_resize(self, event):
-        width = event.width
-        height = event.height
+        # Dragging fires <Configure> continuously; redraw only after it has settled
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(150, self.apply_resize, event.width, event.height)
+
+    def apply_resize(self, width, height):
+        self.resize_job = None
         self.create_gradient(width, height)
 
-    def get_microphones(self):
-        microphones = []
-        for i in range(self.audio.get_device_count()):
-            info = self.audio.get_device_info_by_index(i)
-            max_input = info.get('maxInputChannels', 0)
-            if isinstance(max_input, (int, float)) and max_input > 0:
-                microphones.append(f"{info.get('name')} (Index: {i})")
-        return microphones
+    def list_audio_devices(self, rescan=False):
+        """
+        Initialize PortAudio and enumerate devices; called from the discovery thread.
+
+        After a hot-plug PortAudio has to be re-initialized to see the new
+        device, which is postponed while a stream is in use.
+        """
+        with self.audio_lock:
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
+                self.output.set_audio(self.audio)
+            elif rescan:
+                if self.is_listening or self.tts_playing or self.output.active:
+                    return None
+                self.output.set_audio(None)
+                self.audio.terminate()
+                self.audio = pyaudio.PyAudio()
+                self.output.set_audio(self.audio)
+            devices = discovery.list_audio_devices(self.audio)
+        self.audio_ready.set()
+        return devices
+
+    def select_microphone(self):
+        """Select the saved microphone (by name if its index changed) or the first one."""
+        saved = discovery.match_device(self.selected_mic_name, self.microphones) if self.selected_mic_name else None
+        if saved is not None:
+            self.mic_var.set(saved)
+            self.selected_mic_index = self.microphones.index(saved)
+            self.selected_mic_name = saved
+        elif self.microphones:
+            self.mic_var.set(self.microphones[0])
+            self.selected_mic_index = 0
+            self.selected_mic_name = self.microphones[0]
+        else:
+            self.mic_var.set("No microphone detected")
+            self.selected_mic_index = 0
+
+    def update_microphones(self, microphones):
+        """Fill the microphone list with what discovery found."""
+        self.microphones = microphones
+        self.mic_combo.config(values=microphones if microphones else ["No microphone detected"])
+        if not self.is_listening:
+            self.select_microphone()
 
     def get_mic_device_index(self, mic_string):
         import re
         match = re.search(r'Index: (\d+)', mic_string)
         return int(match.group(1)) if match else 0
 
+    def get_capture_rates(self, device_index):
+        """Return capture rates to try, 16 kHz first so resampling can be skipped."""
+        candidates = [16000]
+        try:
+            default_rate = int(self.audio.get_device_info_by_index(device_index).get('defaultSampleRate', 0))
+            if default_rate:
+                candidates.append(default_rate)
+        except Exception as e:
+            print(f"Could not query device {device_index}: {e}")
+        candidates += [48000, 44100, 32000, 22050, 8000]
+
+        supported = []
+        for rate in candidates:
+            if rate in supported:
+                continue
+            try:
+                if self.audio.is_format_supported(rate, input_device=device_index,
+                                                  input_channels=1, input_format=pyaudio.paInt16):
+                    supported.append(rate)
+            except ValueError:
+                continue
+        # Some backends reject every probe but still open fine; fall back to trying all
+        return supported or list(dict.fromkeys(candidates))
+
     def load_whisper_model(self):
         """Load Whisper model with improved error handling and performance."""
-        info = self.model_info.get(self.selected_whisper_model, {"size": "unknown", "eta": "unknown"})
+        name = self.selected_whisper_model
+        info = self.model_info.get(name, {"size": "unknown", "eta": "unknown"})
         size = info["size"]
         eta = info["eta"]
-        self.update_status(f"Loading Whisper model: {self.selected_whisper_model} ({size} MB) - estimated download time: {eta} min", "#ffaa00")
+        self.update_status(f"Loading Whisper model: {name} ({size} MB) - estimated download time: {eta} min", "#ffaa00")
+        loading = threading.Event()
         if isinstance(eta, int) and eta > 0:
-            self.root.after(0, lambda: self.progress_bar.config(mode='determinate', maximum=100, value=0))
-            # Start progress update
+            self.ui.post("progress_mode", "determinate")
             total_time = eta * 60  # seconds
-            step = 100 / total_time
-            def update_progress():
-                current = self.progress_bar['value']
-                if current < 100:
-                    self.progress_bar['value'] = min(100, current + step)
-                    self.root.after(1000, update_progress)
-            self.root.after(1000, update_progress)
+
+            def estimate_progress():
+                # Advance the bar along the estimated download time until loading ends
+                elapsed = 0
+                while not loading.wait(1):
+                    elapsed += 1
+                    self.ui.post("progress", min(99, elapsed / total_time * 100))
+            threading.Thread(target=estimate_progress, daemon=True).start()
         else:
-            self.root.after(0, lambda: self.progress_bar.config(mode='indeterminate'))
-            self.root.after(0, lambda: self.progress_bar.start())
+            self.ui.post("progress_mode", "indeterminate")
 
-        # Determine optimal device and compute type
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        compute_type = "int8"
+        # Determine optimal device; compute type and threads come from calibration
+        device = detect_device()
 
         try:
-            self.model = WhisperModel(
-                self.selected_whisper_model,
-                device=device,
-                compute_type=compute_type,
-                cpu_threads=1 if device == "cuda" else 4
-            )
+            self.model = self.model_registry.load(name, lambda: self.create_model(name, device), device, pin="active")
             self.update_status("Whisper model loaded successfully!", "#00aa00")
-            self.root.after(0, lambda: self.progress_bar.config(value=100))
-            self.root.after(0, lambda: self.loaded_label.config(text=f"Loaded: {self.selected_whisper_model}"))
+            self.ui.post("progress", 100)
+            self.ui.post("loaded_label")
 
         except Exception as e:
             loaded = False
             if device == "cuda":
                 self.update_status("CUDA failed, falling back to CPU...", "#ffaa00")
                 try:
-                    device = "cpu"
-                    compute_type = "int8"
-                    self.model = WhisperModel(
-                        self.selected_whisper_model,
-                        device=device,
-                        compute_type=compute_type,
-                        cpu_threads=4
-                    )
+                    self.model = self.model_registry.load(name, lambda: self.create_model(name, "cpu"), "cpu",
+                                                          pin="active")
                     self.update_status("Whisper model loaded on CPU!", "#00aa00")
-                    self.root.after(0, lambda: self.progress_bar.config(value=100))
-                    self.root.after(0, lambda: self.loaded_label.config(text=f"Loaded: {self.selected_whisper_model}"))
+                    self.ui.post("progress", 100)
+                    self.ui.post("loaded_label")
                     loaded = True
                 except Exception as e2:
-                    error_msg = f"Failed to load Whisper model on CPU: {str(e2)[:100]}"
-                    self.update_status(error_msg, "red")
-                    self.root.after(0, lambda: self.progress_bar.config(value=0))
-                    self.model = None
-                    self.root.after(0, lambda: self.loaded_label.config(text="Loaded: Failed"))
+                    e = e2
             if not loaded:
                 error_msg = f"Failed to load Whisper model: {str(e)[:100]}"
                 self.update_status(error_msg, "red")
-                self.root.after(0, lambda: self.progress_bar.stop())
+                self.ui.post("progress_mode", "stopped")
                 self.model = None
-                self.root.after(0, lambda: self.loaded_label.config(text="Loaded: Failed"))
-                error_msg = f"Failed to load Whisper model: {str(e)[:100]}"
-                self.update_status(error_msg, "red")
-                self.root.after(0, lambda: self.progress_bar.stop())
-                self.model = None
-                self.root.after(0, lambda: self.loaded_label.config(text="Loaded: Failed"))
-                error_msg = f"Failed to load Whisper model: {str(e)[:100]}"
-                self.update_status(error_msg, "red")
-                self.root.after(0, lambda: self.progress_bar.stop())
-                self.model = None
-                self.root.after(0, lambda: self.loaded_label.config(text="Loaded: Failed"))
+                self.model_registry.pin("active", None)
+                self.ui.post("loaded_label", "Loaded: Failed")
+        finally:
+            loading.set()
+
+    def startup(self):
+        """Load the Whisper model, then warm up everything the first turn would otherwise pay for."""
+        if not self.warmup:
+            self.load_recognizer()
+            return
+
+        start = time.perf_counter()
+        timings = {}
+        steps = [("Ollama", self.warm_up_ollama), ("TTS", self.warm_up_tts)]
+
+        def run(name, step):
+            step_start = time.perf_counter()
+            try:
+                step()
+                timings[name] = time.perf_counter() - step_start
+            except Exception as e:
+                print(f"Warm-up of {name} failed: {e}")
+            self.ui.post("progress", len(timings) / (len(steps) + 1) * 100)
+
+        # Ollama and TTS mostly wait on the network, so they warm up while Whisper loads
+        threads = [threading.Thread(target=run, args=step, daemon=True) for step in steps]
+        for thread in threads:
+            thread.start()
+        self.load_recognizer()
+        if self.model is not None:
+            self.update_status("🔥 Warming up Whisper...", "#ffaa00")
+            run("Whisper", self.warm_up_whisper)
+        for thread in threads:
+            thread.join()
+
+        if self.model is not None or self.daemon is not None:
+            details = ", ".join(f"{name} {seconds:.1f} s" for name, seconds in timings.items())
+            self.ui.post("progress", 100)
+            self.ui.post("update_status", f"🔥 Ready in {time.perf_counter() - start:.1f} s ({details})", "#00aa00")
+
+    def load_recognizer(self):
+        """Use the transcription daemon if one is running, else load Whisper in this process."""
+        if not self.connect_daemon():
+            self.load_whisper_model()
+
+    def connect_daemon(self):
+        """Hand recognition to a running transcription daemon; returns True if one answered."""
+        if not self.daemon_url:
+            return False
+        client = DaemonClient(self.daemon_url)
+        health = client.health()
+        if health is None:
+            return False
+        self.daemon = client
+        loaded = ", ".join(health.get('loaded_models', [])) or "none yet"
+        self.update_status(f"🎧 Using transcription daemon on {health.get('device')} (loaded: {loaded})", "#00aa00")
+        self.ui.post("loaded_label", f"Loaded: daemon ({self.daemon_url})")
+        return True
+
+    def warm_up_whisper(self):
+        """Run one second of silence through the models so CTranslate2 initializes its kernels now."""
+        silence = np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32)
+        for model in (self.model, self.draft_model):
+            if model is not None:
+                self.transcribe_audio(silence, model=model, language="en", beam_size=1, vad_filter=False)
+
+    def warm_up_ollama(self):
+        """Load the selected AI model into memory with an empty request."""
+        if self.selected_model in self.ollama_models:
+            self.ollama.keep_loaded(self.selected_model)
+
+    def warm_up_tts(self):
+        """Initialize edge-tts, the decoder and the output stream without playing anything."""
+        path = self.synthesize_speech("Ready.")
+        if path:
+            decode_file(path)
+            self.remove_speech_file(path)
+        if self.audio_ready.wait(10):
+            with self.audio_lock:
+                self.output.open()
+
+    def create_model(self, name, device):
+        settings = self.get_whisper_settings(name, device)
+        return create_whisper_model(
+            name,
+            device=device,
+            compute_type=settings["compute_type"],
+            cpu_threads=settings["cpu_threads"],
+            num_workers=settings["num_workers"]
+        )
+
+    def load_draft_model(self):
+        """Load the small model that produces partials in two-pass mode."""
+        name = self.draft_whisper_model
+        device = detect_device()
+        self.update_status(f"Loading draft model: {name}...", "#ffaa00")
+        try:
+            self.draft_model = self.model_registry.load(name, lambda: self.create_model(name, device), device,
+                                                        pin="draft")
+        except Exception:
+            try:
+                self.draft_model = self.model_registry.load(name, lambda: self.create_model(name, "cpu"), "cpu",
+                                                            pin="draft")
+            except Exception as e:
+                self.draft_model = None
+                self.model_registry.pin("draft", None)
+                self.update_status(f"Failed to load draft model: {str(e)[:100]}", "red")
+                return
+        self.update_status(f"Two-pass: {name} drafts, {self.selected_whisper_model} finals", "#00aa00")
+        self.ui.post("loaded_label")
 
+    def on_two_pass_change(self, *args):
+        self.two_pass = self.two_pass_var.get()
+        self.draft_whisper_model = self.draft_var.get()
+        self.save_config()
+        self.draft_model = None
+        self.model_registry.pin("draft", None)
+        if self.two_pass:
+            threading.Thread(target=self.load_draft_model, daemon=True).start()
+        else:
+            self.update_status("Two-pass off", "black")
+
+    def get_whisper_settings(self, name, device):
+        """Calibrated CTranslate2 settings for a model, or hardware-based defaults."""
+        return tuned_settings(self.whisper_tuning, name, device)
+
+    def calibrate_whisper(self):
+        """Benchmark the selected model across CTranslate2 settings and reload it with the fastest."""
+        if self.is_listening:
+            self.update_status("Stop dictation before calibrating", "orange")
+            return
+        self.calibrate_button.config(state='disabled')
+        threading.Thread(target=self.run_calibration, args=(self.selected_whisper_model,), daemon=True).start()
+
+    def run_calibration(self, name):
+        device = detect_device()
+
+        def progress(done, total, message):
+            self.ui.post("progress", done / total * 100)
+            self.ui.post("update_status", f"⚙️ Calibrating {name}: {message}", "#ffaa00")
+
+        self.ui.post("progress_mode", "determinate")
+        try:
+            best = calibrate(name, device, progress)
+            self.whisper_tuning[tuning_key(name, device)] = best
+            self.save_config()
+            self.ui.post("update_status", f"⚙️ {name}: {best['compute_type']}, {best['cpu_threads']} threads x {best['num_workers']} ({best['seconds'] * 1000:.0f} ms, {best['tokens_per_second']:.0f} tok/s)", "#00aa00")
+            # Reload with the new settings
+            self.model_registry.unload(name)
+            if self.selected_whisper_model == name:
+                self.model = None
+                self.model_registry.pin("active", None)
+                self.load_whisper_model()
         except Exception as e:
-            error_msg = f"Unexpected error loading Whisper model: {str(e)[:100]}"
-            self.update_status(error_msg, "red")
-            self.root.after(0, lambda: self.progress_bar.stop())
-            self.model = None
-            self.root.after(0, lambda: self.loaded_label.config(text="Loaded: Failed"))
+            self.ui.post("update_status", f"Calibration failed: {str(e)[:80]}", "red")
+        finally:
+            self.ui.post("calibrate_done")
+
+    def update_loaded_label(self, text=None):
+        """Show ``text``, or the active model and what the model cache is holding."""
+        if text is not None:
+            self.loaded_label.config(text=text)
+            return
+        footprints = self.model_registry.footprints()
+        if self.model is None:
+            text = "Loaded: None"
+        else:
+            name = self.selected_whisper_model
+            text = f"Loaded: {name} ({footprints.get(name, 0):.0f} MB)"
+        if len(footprints) > 1:
+            text += f" | cached {len(footprints)} / {self.model_registry.total_mb():.0f} MB"
+        self.loaded_label.config(text=text)
+
+    def unload_cached_models(self):
+        """Free every cached Whisper model except the active and draft ones, which are still in use."""
+        keep = [self.selected_whisper_model] if self.model is not None else []
+        if self.draft_model is not None:
+            keep.append(self.draft_whisper_model)
+        unloaded = self.model_registry.unload_all(keep=keep)
+        self.update_loaded_label()
+        if unloaded:
+            self.update_status(f"Unloaded: {', '.join(unloaded)}", "#0066cc")
+        else:
+            self.update_status("No cached models to unload", "black")
 
     def audio_callback(self, in_data, frame_count, time_info, status):
         """Callback for audio stream with memory management"""
-        if self.is_listening:
-            self.audio_frames.append(in_data)
-            # Prevent excessive memory usage by limiting frame buffer
-            if len(self.audio_frames) > self.max_audio_frames:
-                # Remove oldest frames to maintain buffer size
-                remove_count = len(self.audio_frames) - self.max_audio_frames
-                self.audio_frames = self.audio_frames[remove_count:]
+        if self.is_listening and self.audio_ring is not None:
+            self.audio_ring.write_bytes(in_data)
         return (in_data, pyaudio.paContinue)
 
+    def transcribe_audio(self, audio_data, model=None, **kwargs):
+        """Transcribe a 16 kHz float32 array in memory and return the list of segments."""
+        model = model or self.model
+        if model is None:
+            raise RuntimeError("Whisper model not loaded")
+
+        segments, info = model.transcribe(audio_data, **kwargs)
+        return list(segments)
+
     def create_gui(self):
         # Style
         style = ttk.Style()
@@ -387,6 +741,32 @@ class VoiceApp:
         self.loaded_label = tk.Label(whisper_frame, text="Loaded: None", bg='#000010', fg='white', font=('Helvetica', 8))
         self.loaded_label.pack(side='left', padx=(10, 0))
 
+        self.unload_button = tk.Button(whisper_frame, text="Unload cached", command=self.unload_cached_models,
+                                       bg='#000022', fg='white', font=('Helvetica', 8), relief='flat')
+        self.unload_button.pack(side='left', padx=(10, 0))
+
+        self.calibrate_button = tk.Button(whisper_frame, text="⚙️ Calibrate", command=self.calibrate_whisper,
+                                          bg='#000022', fg='white', font=('Helvetica', 8), relief='flat')
+        self.calibrate_button.pack(side='left', padx=(5, 0))
+
+        self.stats_button = tk.Button(whisper_frame, text="📊 Stats", command=self.toggle_stats,
+                                      bg='#000022', fg='white', font=('Helvetica', 8), relief='flat')
+        self.stats_button.pack(side='left', padx=(5, 0))
+
+        # Two-pass draft model selection
+        draft_frame = ttk.Frame(self.root, style='TFrame')
+        self.canvas.create_window(450, 730, window=draft_frame)
+
+        self.two_pass_var = tk.BooleanVar(value=self.two_pass)
+        tk.Checkbutton(draft_frame, text="Two-pass", variable=self.two_pass_var, command=self.on_two_pass_change,
+                       bg='#000022', fg='white', selectcolor='#000055', activebackground='#000022',
+                       font=('Arial', 12, 'bold')).pack(side='left')
+        tk.Label(draft_frame, text="Draft Model:", bg='#000022', fg='white', font=('Arial', 12, 'bold')).pack(side='left', padx=(10, 0))
+        self.draft_var = tk.StringVar(value=self.draft_whisper_model)
+        self.draft_combo = ttk.Combobox(draft_frame, textvariable=self.draft_var, values=self.whisper_models, state='readonly', width=12)
+        self.draft_combo.pack(side='left', padx=(10, 0))
+        self.draft_combo.bind('<<ComboboxSelected>>', self.on_two_pass_change)
+
         # Microphone selection
         mic_frame = ttk.Frame(self.root, style='TFrame')
         self.canvas.create_window(450, 650, window=mic_frame)
@@ -403,7 +783,9 @@ class VoiceApp:
 
         tk.Label(model_frame, text="AI Model:", bg='#000022', fg='white', font=('Arial', 12, 'bold')).pack(side='left')
         model_values = self.ollama_models if self.ollama_models else ["Ollama not running"]
-        self.model_combo = ttk.Combobox(model_frame, textvariable=self.model_var, values=model_values, state='readonly', width=40)
+        # Opening the list asks Ollama again, so freshly pulled models show up
+        self.model_combo = ttk.Combobox(model_frame, textvariable=self.model_var, values=model_values, state='readonly', width=40,
+                                        postcommand=self.discovery.refresh)
         self.model_combo.pack(side='left', padx=(10, 0))
         if self.ollama_models:
             self.model_var.set(self.selected_model)
@@ -428,6 +810,8 @@ class VoiceApp:
                                                     bg='black', fg='white', insertbackground='white',
                                                     font=('Consolas', 10), borderwidth=0, relief='flat')
         self.text_area.pack(fill='x', expand=False)
+        self.text_area.tag_configure("partial", foreground='#888888')
+        self.text_area.tag_configure("draft", foreground='#bbbbbb')
 
         # AI Response area
         ai_frame = ttk.Frame(self.root)
@@ -473,6 +857,10 @@ class VoiceApp:
                                        command=self.clear_text)
         self.clear_button.pack(side='left', padx=5)
 
+        self.new_chat_button = ttk.Button(button_frame, text="💬 New Chat",
+                                          command=self.new_chat)
+        self.new_chat_button.pack(side='left', padx=5)
+
 
 
     def on_mic_change_combo(self, event=None):
@@ -484,16 +872,48 @@ class VoiceApp:
             self.update_status(f"Selected: {value.split(' (')[0]}")
 
     def on_model_change(self, *args):
+        if self.model_var.get() not in self.ollama_models:
+            return  # "Ollama not running" placeholder
+        old_model = self.selected_model
         self.selected_model = self.model_var.get()
         self.save_config()
         self.update_status(f"AI Model: {self.selected_model}")
+        with self.chat.lock:
+            # Keep the conversation, but the new model has nothing cached yet
+            self.chat.model = self.selected_model
+            self.chat.cached_tokens = 0
+        if self.selected_model != old_model and self.selected_model in self.ollama_models:
+            threading.Thread(target=self.switch_ollama_model, args=(old_model, self.selected_model), daemon=True).start()
+
+    def switch_ollama_model(self, old_model, new_model):
+        """Free the previous model and load the new one before the first question."""
+        try:
+            if old_model in self.ollama_models:
+                self.ollama.unload(old_model)
+            self.ollama.keep_loaded(new_model)
+            self.ui.post("update_status", f"AI Model: {new_model} (loaded)", "black")
+        except requests.exceptions.RequestException as e:
+            print(f"Could not preload {new_model}: {e}")
 
     def on_whisper_change(self, event=None):
         old_model = self.selected_whisper_model
         self.selected_whisper_model = self.whisper_var.get()
         if self.selected_whisper_model != old_model:
             self.save_config()
-            self.model = None  # Free old model
+            if self.daemon is not None:
+                # The daemon loads it when the next dictation starts
+                self.update_status(f"Whisper model: {self.selected_whisper_model} (daemon)", "#00aa00")
+                return
+            # Pin before the lookup so a concurrent load cannot evict it in between
+            self.model_registry.pin("active", self.selected_whisper_model)
+            cached = self.model_registry.get(self.selected_whisper_model)
+            if cached is not None:
+                self.model = cached
+                self.update_loaded_label()
+                self.update_status(f"Whisper model: {self.selected_whisper_model} (cached)", "#00aa00")
+                return
+            self.model = None  # Old model stays in the cache until evicted
+            self.model_registry.pin("active", None)
             self.loaded_label.config(text="Loaded: None")
             self.update_status(f"Loading Whisper model: {self.selected_whisper_model}...", "#ffaa00")
             threading.Thread(target=self.load_whisper_model, daemon=True).start()
@@ -503,10 +923,12 @@ class VoiceApp:
         self.save_config()
 
     def update_status(self, message, color='gray', progress_text=""):
-        """Update status with optional progress indicator."""
+        """Update status with optional progress indicator; safe to call from any thread."""
+        self.ui.post("update_status", message, color)
+
+    def show_status(self, message, color='gray'):
         if hasattr(self, 'status_label'):
             self.status_label.config(text=message, fg=color)
-            self.root.update_idletasks()
 
     def toggle_dictation(self):
         if self.is_listening:
@@ -515,12 +937,18 @@ class VoiceApp:
             self.start_dictation()
 
     def start_dictation(self):
+        if not self.audio_ready.is_set():
+            self.update_status("Still looking for audio devices...", "orange")
+            return
         if not self.microphones:
             messagebox.showerror("Error", "No microphones found!")
             return
 
         self.is_listening = True
-        self.current_text = ""
+        with self.transcript_lock:
+            self.current_text = ""
+            self.utterance_texts = {}
+            self.transcript_first_id = self.utterance_id
         self.text_area.delete(1.0, tk.END)
         self.text_area.insert(tk.END, "🎙️ Listening... Speak now!\n\n")
 
@@ -533,16 +961,22 @@ class VoiceApp:
     def stop_dictation(self):
         self.is_listening = False
         self.dictation_button.config(text="🎙️ Start Dictation")
+        # listen_loop commits the last words and then posts "dictation_done" to copy them
+        self.update_status("🔍 Finalizing...", "#ffaa00")
 
-        if self.current_text.strip():
-            pyperclip.copy(self.current_text.strip())
+        # Small delay to ensure audio stream is fully closed
+        time.sleep(0.1)
+
+    def copy_dictation(self):
+        """Copy the finished transcript, once finalizing has committed the last words."""
+        with self.transcript_lock:
+            text = self.current_text.strip()
+        if text:
+            pyperclip.copy(text)
             self.update_status("📋 Text copied to clipboard!", "#0066cc")
         else:
             self.update_status("Ready", "black")
 
-        # Small delay to ensure audio stream is fully closed
-        time.sleep(0.1)
-
     def copy_text(self):
         if self.is_listening:
             self.stop_dictation()
@@ -557,18 +991,33 @@ class VoiceApp:
             self.update_status("No text to copy", "black")
 
     def send_to_ai(self):
+        # The user's turn ended with their last speech if still dictating, otherwise now
+        if self.is_listening and self.last_speech_time is not None:
+            self.turn_start = self.last_speech_time
+        else:
+            self.turn_start = time.perf_counter()
         if self.is_listening:
             self.stop_dictation()
         text = self.text_area.get(1.0, tk.END).strip()
         if text:
+            # A new question cancels a reply that is still streaming
+            self.ai_cancel.set()
+            self.ai_cancel = threading.Event()
             self.ai_text_area.delete(1.0, tk.END)
+            # Optionally start the next question with an empty transcript
+            if self.clear_after_send:
+                self.clear_transcript()
             self.update_status("🤖 Sending to AI...", "#ffaa00")
-            threading.Thread(target=self.query_ollama_and_speak, args=(text,), daemon=True).start()
+            # A dictated question and its reply are traced as one turn
+            turn = self.tracer.current
+            if turn is None or turn.kind != "voice" or turn.has("llm"):
+                turn = self.tracer.begin_turn("text")
+            threading.Thread(target=self.query_ollama_and_speak, args=(text, turn), daemon=True).start()
         else:
             self.update_status("No text to send to AI", "black")
 
-    def query_ollama_and_speak(self, user_text):
-        """Query Ollama with retry logic and improved error handling."""
+    def query_ollama_and_speak(self, user_text, turn=None):
+        """Query Ollama with retry logic and improved error handling; stages are traced in ``turn``."""
         if not user_text or not user_text.strip():
             self.update_status("No text to send to AI", "orange")
             return
@@ -578,301 +1027,446 @@ class VoiceApp:
             self.update_status("Ollama not running - start with 'ollama serve'", "red")
             return
 
-        # Sanitize input
+        # Long input is cut to fit the conversation's token budget by the chat session
         user_text = user_text.strip()
-        if len(user_text) > 10000:  # Limit input size
-            user_text = user_text[:10000] + "..."
-            self.update_status("Input truncated to 10,000 characters", "orange")
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                self.update_status(f"🤖 Querying AI... (attempt {attempt + 1}/{max_retries})", "#ffaa00")
-
-                # Query Ollama with reasonable timeout
-                response = requests.post('http://localhost:11434/api/generate',
-                                        json={
-                                            "model": self.selected_model,
-                                            "prompt": user_text,
-                                            "stream": False
-                                        },
-                                        timeout=120)  # Increased timeout for slower models
-
-                response.raise_for_status()
-                ai_response = response.json().get('response', '').strip()
-
-                if ai_response:
-                    # Display AI response
-                    self.queue.put(("clear_ai",))
-                    self.queue.put(("insert_ai", ai_response))
-
-                    # Speak the response with TTS
-                    self.update_status("🎵 Generating speech...", "#00aa00")
-                    self.speak_with_tts(ai_response)
-                    self.update_status("🤖 AI responded successfully!", "#00aa00")
-                    return  # Success, exit function
-                    self.update_status("AI gave empty response", "orange")
-                    return
-
-            except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
-                    self.update_status(f"AI timeout, retrying... ({attempt + 1}/{max_retries})", "orange")
-                    time.sleep(2)  # Wait before retry
-                    continue
-                    self.update_status("AI timeout - model may be slow or overloaded", "red")
+        cancel_event = self.ai_cancel
+        streamed = []
+        pipeline = None
+        splitter = SentenceSplitter()
+        spoken_chars = 0
+
+        def on_token(token):
+            nonlocal pipeline, spoken_chars
+            if not streamed:
+                self.tracer.record(turn, "llm_first_token", time.perf_counter() - ask_start, ask_start)
+                self.ui.post("clear_ai")
+                self.ui.post("update_status", "🤖 AI is answering...", "#00aa00")
+                # Start speaking the first sentence while the rest is generated
+                pipeline = self.start_speech_pipeline(turn)
+            streamed.append(token)
+            self.ui.post("insert_ai", token)
+            for sentence in splitter.feed(token):
+                if spoken_chars < 5000:  # Limit text length for TTS
+                    spoken_chars += len(sentence)
+                    pipeline.add(sentence)
+
+        def on_retry(attempt, retries, error):
+            self.ui.post("update_status", f"AI error, retrying... ({attempt}/{retries})", "orange")
 
-            except requests.exceptions.ConnectionError:
-                self.update_status("Cannot connect to Ollama - check if running", "red")
-                break  # Don't retry connection errors
+        try:
+            self.update_status("🤖 Querying AI...", "#ffaa00")
+
+            # Stream the reply so text shows up as it is generated; the client
+            # retries failed attempts until the first token arrives
+            ask_start = time.perf_counter()
+            with self.tracer.span(turn, "llm"):
+                ai_response, stats = self.chat.ask(user_text, on_token, cancel_event=cancel_event, timeout=120,
+                                                   on_retry=on_retry)
+            ai_response = ai_response.strip()
+
+            if stats.cancelled:
+                if pipeline:
+                    pipeline.cancel()
+                self.ui.post("update_status", f"🤖 AI cancelled ({stats.summary()})", "orange")
+                return
 
-            except requests.exceptions.HTTPError as e:
-                status_code = e.response.status_code if e.response else "unknown"
-                self.update_status(f"Ollama HTTP error {status_code}: {str(e)[:50]}", "red")
-                break  # Don't retry HTTP errors
+            if ai_response:
+                # Speak whatever is left after the last full sentence
+                for sentence in splitter.flush():
+                    pipeline.add(sentence)
+                self.finish_speech_pipeline(pipeline)
+                latency = f" · first audio {self.first_audio_latency:.2f} s" if self.first_audio_latency is not None else ""
+                self.ui.post("update_status", f"🤖 AI responded - {stats.summary()}{latency}", "#00aa00")
+                return
+            self.update_status("AI gave empty response", "orange")
 
-            except (KeyError, ValueError) as e:
-                self.update_status(f"Invalid response from Ollama: {str(e)[:50]}", "red")
-                break
+        except requests.exceptions.Timeout:
+            if streamed:
+                self.update_status("AI stream stalled - reply is incomplete", "red")
+            else:
+                self.update_status("AI timeout - model may be slow or overloaded", "red")
 
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    self.update_status(f"AI error, retrying... ({attempt + 1}/{max_retries})", "orange")
-                    time.sleep(1)
-                    continue
-                    self.update_status(f"AI error: {str(e)[:50]}", "red")
+        except requests.exceptions.ConnectionError:
+            self.update_status("Cannot connect to Ollama - check if running", "red")
+
+        except requests.exceptions.HTTPError as e:
+            status_code = e.response.status_code if e.response is not None else "unknown"
+            self.update_status(f"Ollama HTTP error {status_code}: {str(e)[:50]}", "red")
+
+        except (KeyError, ValueError) as e:
+            self.update_status(f"Invalid response from Ollama: {str(e)[:50]}", "red")
+
+        except Exception as e:
+            self.update_status(f"AI error: {str(e)[:50]}", "red")
+        finally:
+            # Let anything already queued be spoken, and release the pipeline threads
+            if pipeline is not None:
+                pipeline.close()
+            if turn is not None:
+                self.tracer.end_turn(turn)
+
+    def clean_tts_text(self, text):
+        # Remove hashtags and asterisks for cleaner speech
+        return text.replace('#', '').replace('*', '').strip()
+
+    def synthesize_speech(self, text):
+        """Return an MP3 for one sentence, from the cache or from edge-tts (falling back to gTTS)."""
+        text = self.clean_tts_text(text)
+        if not text:
+            return None
+
+        # Calculate rate for edge-tts: map 100-300 to -50% to +50%
+        rate_percent = ((self.tts_rate - 180) / 120) * 50  # 180 is neutral
+        rate_str = f"{rate_percent:+.0f}%"
+        voice = "en-US-AriaNeural"
+        edge_key = self.tts_cache.key("edge-tts", voice, rate_str, text)
+        gtts_key = self.tts_cache.key("gtts", "co.uk", 1.0, text)
+        cached = self.tts_cache.get(edge_key) or self.tts_cache.get(gtts_key)
+        if cached:
+            return cached
+
+        # Loaded on first use to keep startup fast
+        import asyncio
+        import edge_tts
+        from gtts import gTTS
+
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3', mode='w+b')
+        temp_file.close()
+        try:
+            async def generate_speech():
+                communicate = edge_tts.Communicate(text, voice, rate=rate_str)
+                await communicate.save(temp_file.name)
+
+            asyncio.run(generate_speech())
+            key = edge_key
+        except Exception as e:
+            # Fallback to gTTS
+            print(f"Edge TTS failed ({e}), using gTTS")
+            tts = gTTS(text=text, lang='en', slow=False, tld='co.uk')
+            tts.save(temp_file.name)
+            key = gtts_key
+        return self.tts_cache.put_file(key, temp_file.name)
+
+    def play_speech_file(self, path):
+        """Play a synthesized file, returning when it ends or TTS is stopped."""
+        if not self.tts_playing:
+            return
+        self.audio_ready.wait(5)  # Play on the shared PortAudio instance once discovery created it
+        self.output.play([decode_file(path)])
+
+    def remove_speech_file(self, path):
+        if self.tts_cache.contains(path):
+            return
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def start_speech_pipeline(self, turn=None):
+        """Start a pipeline that speaks sentences as they are added, tracing synthesis and playback in ``turn``."""
+        self.tts_playing = True
+        self.first_audio_latency = None
+
+        def on_first_audio(when):
+            self.first_audio_latency = when - self.turn_start
+            self.tracer.record(turn, "first_audio", self.first_audio_latency, self.turn_start)
+            self.ui.post("update_status", f"🔊 Speaking (first audio after {self.first_audio_latency:.2f} s)", "#00aa00")
+
+        self.speech_pipeline = SpeechPipeline(self.tracer.wrap(turn, "tts", self.synthesize_speech),
+                                              self.tracer.wrap(turn, "playback", self.play_speech_file),
+                                              on_first_audio=on_first_audio, cleanup=self.remove_speech_file)
+        return self.speech_pipeline
+
+    def finish_speech_pipeline(self, pipeline):
+        """Wait for queued sentences to be spoken and report the outcome."""
+        pipeline.close()
+        pipeline.wait()
+        self.tts_playing = False
+        if pipeline.error and pipeline.first_audio_time is None:
+            self.update_status(f"TTS error: {str(pipeline.error)[:60]}", "red")
+        elif self.first_audio_latency is not None:
+            self.ui.post("update_status", f"Speech completed - first audio after {self.first_audio_latency:.2f} s", "#00aa00")
 
     def speak_with_tts(self, text):
-        """Speak text with edge-tts or fallback to gTTS."""
+        """Speak text sentence by sentence with edge-tts or fallback to gTTS."""
         if not text or not text.strip():
             self.update_status("No text to speak", "orange")
             return
 
         # Limit text length for TTS
         text = text.strip()
-        # Remove hashtags and asterisks for cleaner speech
-        text = text.replace('#', '').replace('*', '')
         if len(text) > 5000:
             text = text[:5000] + "..."
             self.update_status("Speech truncated to 5000 characters", "orange")
 
-        try:
-            self.update_status("🔊 Generating speech...", "#00aa00")
-            self.tts_playing = True
-
-            # Calculate rate for edge-tts: map 100-300 to -50% to +50%
-            rate_percent = ((self.tts_rate - 180) / 120) * 50  # 180 is neutral
-            rate_str = f"{rate_percent:+.0f}%"
-
-            async def generate_speech():
-                try:
-                    voice = "en-US-AriaNeural"
-                    communicate = edge_tts.Communicate(text, voice, rate=rate_str)
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3', mode='w+b')
-                    temp_file.close()
-                    await communicate.save(temp_file.name)
-                    return temp_file.name
-                except Exception as e:
-                    raise e
-
-            temp_file_name = asyncio.run(generate_speech())
-            pygame.mixer.music.load(temp_file_name)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy() and self.tts_playing:
-                pygame.time.wait(100)
-            pygame.mixer.music.stop()
-            os.unlink(temp_file_name)
-            self.update_status("Speech completed", "#00aa00")
-
-        except Exception as e:
-            # Fallback to gTTS
-            try:
-                self.update_status("Edge TTS failed, using gTTS...", "orange")
-                tts = gTTS(text=text, lang='en', slow=False, tld='co.uk')
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3', mode='w+b')
-                temp_file.close()
-                tts.save(temp_file.name)
-                pygame.mixer.music.load(temp_file.name)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy() and self.tts_playing:
-                    pygame.time.wait(100)
-                pygame.mixer.music.stop()
-                os.unlink(temp_file.name)
-                self.update_status("Speech completed (gTTS)", "#00aa00")
-            except Exception as e2:
-                error_msg = f"TTS error: {str(e)[:30]}, gTTS: {str(e2)[:30]}"
-                self.update_status(error_msg, "red")
-        finally:
-            self.tts_playing = False
-            self.queue.put(("update_status", "Ready", "white"))
+        self.turn_start = time.perf_counter()
+        self.update_status("🔊 Generating speech...", "#00aa00")
+        turn = self.tracer.begin_turn("speech")
+        pipeline = self.start_speech_pipeline(turn)
+        splitter = SentenceSplitter()
+        for sentence in splitter.feed(text) + splitter.flush():
+            pipeline.add(sentence)
+        self.finish_speech_pipeline(pipeline)
+        self.tracer.end_turn(turn)
 
     def stop_tts(self):
         if self.is_listening:
             self.stop_dictation()
+        self.ai_cancel.set()
+        if self.speech_pipeline:
+            self.speech_pipeline.cancel()
         self.tts_playing = False
-        pygame.mixer.music.stop()
+        self.output.stop()
         self.update_status("TTS stopped", "orange")
 
     def clear_text(self):
         if self.is_listening:
             self.stop_dictation()
-        self.text_area.delete(1.0, tk.END)
         self.ai_text_area.delete(1.0, tk.END)
-        self.current_text = ""
+        self.clear_transcript()
         self.update_status("Ready", "black")
 
+    def clear_transcript(self):
+        self.text_area.delete(1.0, tk.END)
+        with self.transcript_lock:
+            self.current_text = ""
+            self.utterance_texts = {}
+            self.transcript_first_id = self.utterance_id
+
+    def new_chat(self):
+        """Forget the conversation so the next question starts a new one."""
+        self.ai_cancel.set()
+        with self.chat.lock:
+            self.chat.reset()
+        self.ai_text_area.delete(1.0, tk.END)
+        self.update_status("💬 New conversation", "black")
+
     def listen_loop(self):
         try:
+            if self.model is None and self.daemon is None:
+                raise RuntimeError("Whisper model not loaded")
+
             device_index = self.get_mic_device_index(self.microphones[self.selected_mic_index])
 
+            turn = self.tracer.begin_turn("voice")
+            capture_start = time.perf_counter()
+
             # Start audio stream - try different sample rates
-            self.audio_frames = []
-            sample_rates = [48000, 44100, 32000, 22050, 16000, 8000]  # Try common rates
+            sample_rates = self.get_capture_rates(device_index)
 
             for rate in sample_rates:
                 try:
-                    self.audio_stream = self.audio.open(
-                        format=pyaudio.paInt16,
-                        channels=1,
-                        rate=rate,
-                        input=True,
-                        input_device_index=device_index,
-                        frames_per_buffer=1024,
-                        stream_callback=self.audio_callback
-                    )
+                    self.audio_ring = AudioRingBuffer(rate * self.max_buffer_seconds)
+                    with self.audio_lock:
+                        self.audio_stream = self.audio.open(
+                            format=pyaudio.paInt16,
+                            channels=1,
+                            rate=rate,
+                            input=True,
+                            input_device_index=device_index,
+                            frames_per_buffer=1024,
+                            stream_callback=self.audio_callback
+                        )
                     self.sample_rate = rate
                     break
                 except Exception as e:
                     print(f"Failed to open stream at {rate} Hz: {e}")
                     continue
-                self.root.after(0, lambda: self.update_status("No audio device available - check microphone setup", "red"))
+            else:
+                self.ui.post("update_status", "No audio device available - check microphone setup", "red")
                 return
 
             self.audio_stream.start_stream()
-            self.queue.put(("update_status", "🎙️ Listening... (real-time)", "#00aa00"))
+            self.tracer.record(turn, "capture", time.perf_counter() - capture_start, capture_start)
+            self.ui.post("update_status", "🎙️ Listening... (real-time)", "#00aa00")
 
-            processed_frames = 0
-            chunk_duration = 3  # Increased to 3 seconds for better accuracy and less CPU usage
-            silence_threshold = 500  # RMS threshold for silence detection
-            consecutive_silent_chunks = 0
-            max_silent_chunks = 5  # Stop after 15 seconds of silence
+            reader = self.audio_ring.reader(0)
+            step_duration = 0.5  # Seconds between passes over the sliding window
+            max_silence_seconds = 15  # Stop after 15 seconds of silence
+            if self.daemon is not None:
+                try:
+                    self.dictate_with_daemon(reader, step_duration, max_silence_seconds, turn)
+                finally:
+                    self.close_audio_stream()
+                self.ui.post("dictation_done")
+                return
+            gate = SpeechGate(create_vad(self.vad_backend))
+
+            # Two-pass: the draft model streams partials, the selected model re-decodes each utterance
+            draft_model = None
+            if self.two_pass and self.draft_whisper_model != self.selected_whisper_model:
+                draft_model = self.draft_model
+            if draft_model is not None:
+                transcribe = functools.partial(self.transcribe_audio, model=draft_model)
+            else:
+                transcribe = self.transcribe_audio
+            two_pass = draft_model is not None
+            # Only speech reaches Whisper; an utterance is committed when it ends
+            session = DictationSession(
+                StreamingTranscriber(transcribe, language="en"), gate, self.sample_rate,
+                on_final=lambda text: self.add_final_text(text, two_pass),
+                on_partial=lambda text: self.ui.post("partial_transcript", text),
+                on_utterance_end=lambda audio: self.end_utterance(audio, two_pass),
+                tracer=self.tracer, turn=turn)
 
             # Real-time transcription loop
             while self.is_listening:
-                time.sleep(chunk_duration)
+                time.sleep(step_duration)
 
                 # Check if we have new frames to process
-                if len(self.audio_frames) > processed_frames:
-                    chunk_frames = self.audio_frames[processed_frames:]
-                    processed_frames = len(self.audio_frames)
-
-                    # Quick silence detection to avoid unnecessary processing
-                    if len(chunk_frames) > 0:
-                        try:
-                            audio_data = np.frombuffer(b''.join(chunk_frames), dtype=np.int16)
-                            rms = np.sqrt(np.mean(audio_data.astype(np.float32) ** 2))
-
-                            if rms < silence_threshold:
-                                consecutive_silent_chunks += 1
-                                if consecutive_silent_chunks >= max_silent_chunks:
-                                    self.queue.put(("update_status", "Silence detected, stopping...", "#ffaa00"))
-                                    self.stop_dictation()
-                                    break
-                                consecutive_silent_chunks = 0
-                        except:
-                            pass  # Continue processing if RMS calculation fails
-
-                    # Process this chunk
-                    self.queue.put(("update_status", "🔍 Recognizing...", "#ffaa00"))
+                if reader.available() > 0:
                     try:
-                        # Convert chunk to numpy and resample (optimized)
-                        audio_data = np.frombuffer(b''.join(chunk_frames), dtype=np.int16)
-
-                        # Only resample if necessary and cache the resampled data
-                        if self.sample_rate != 16000:
-                            num_samples = len(audio_data)
-                            target_samples = int(num_samples * 16000 / self.sample_rate)
-                            audio_data = resample(audio_data, target_samples).astype(np.int16)
-
-                        # Save chunk to temp WAV
-                        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                            temp_filename = temp_file.name
-
-                            with wave.open(temp_filename, 'wb') as wf:
-                                wf.setnchannels(1)
-                                wf.setsampwidth(2)
-                                wf.setframerate(16000)
-                                wf.writeframes(audio_data.tobytes())
+                        session.feed_pcm(reader.read())
+                        if session.last_speech_time is not None:
+                            self.last_speech_time = session.last_speech_time
 
-                        # Transcribe chunk with error checking
-                        if self.model is None:
-                            raise RuntimeError("Whisper model not loaded")
-
-                        segments, info = self.model.transcribe(temp_filename, language="en")
-                        text = " ".join(segment.text for segment in segments).strip()
-
-                        os.unlink(temp_filename)
-
-                        if text:
-                            self.current_text += text + " "
-                            self.queue.put(("update_transcript", text))
-                            self.queue.put(("update_status", "🎙️ Listening... (real-time)", "#00aa00"))
-                            self.queue.put(("update_status", "🎙️ Listening... (real-time)", "#00aa00"))
+                        if gate.silence_seconds >= max_silence_seconds:
+                            self.ui.post("update_status", "Silence detected, stopping...", "#ffaa00")
+                            self.ui.post("stop_dictation")
+                            break
 
                     except Exception as e:
-                        self.queue.put(("update_transcript", f"[Error: {e}]"))
-                        self.queue.put(("update_status", "🎙️ Listening... (real-time)", "#00aa00"))
+                        self.ui.post("update_transcript", f"[Error: {e}]")
+                        self.ui.post("update_status", "🎙️ Listening... (real-time)", "#00aa00")
 
             # Stop recording
-            if self.audio_stream:
-                self.audio_stream.stop_stream()
-                self.audio_stream.close()
-                self.audio_stream = None
-
-            # Process any remaining frames
-            if len(self.audio_frames) > processed_frames:
-                remaining_frames = self.audio_frames[processed_frames:]
-                self.queue.put(("update_status", "🔍 Finalizing...", "#ffaa00"))
-                try:
-                    audio_data = np.frombuffer(b''.join(remaining_frames), dtype=np.int16)
-                    if self.sample_rate != 16000:
-                        num_samples = len(audio_data)
-                        target_samples = int(num_samples * 16000 / self.sample_rate)
-                        audio_data = resample(audio_data, target_samples).astype(np.int16)
-
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                        temp_filename = temp_file.name
-
-                        with wave.open(temp_filename, 'wb') as wf:
-                            wf.setnchannels(1)
-                            wf.setsampwidth(2)
-                            wf.setframerate(16000)
-                            wf.writeframes(audio_data.tobytes())
+            self.close_audio_stream()
 
-                    if self.model is None:
-                        raise RuntimeError("Whisper model not loaded")
-
-                    segments, info = self.model.transcribe(temp_filename, language="en")
-                    text = " ".join(segment.text for segment in segments).strip()
+            # Process any remaining frames and commit the pending hypothesis
+            self.ui.post("update_status", "🔍 Finalizing...", "#ffaa00")
+            try:
+                session.finish(reader.read())
+                self.ui.post("partial_transcript", "")
+                if self.verbose:
+                    print(f"VAD ({gate.vad.name}): {gate.speech_ratio:.0%} of audio sent to Whisper")
 
-                    os.unlink(temp_filename)
+            except Exception as e:
+                self.ui.post("update_transcript", f"[Error: {e}]")
 
-                    if text:
-                        self.current_text += text + " "
-                        self.queue.put(("update_transcript", text))
+            self.ui.post("dictation_done")
 
-                except Exception as e:
-                    self.root.after(0, self.update_transcript, f"[Error: {e}]")
+        except Exception as e:
+            self.ui.post("show_error", f"Recognition error: {e}")
+            self.ui.post("stop_dictation")
+            self.ui.post("dictation_done")
+
+    def close_audio_stream(self):
+        if self.audio_stream:
+            self.audio_stream.stop_stream()
+            self.audio_stream.close()
+            self.audio_stream = None
+
+    def dictate_with_daemon(self, reader, step_duration, max_silence_seconds, turn=None):
+        """Stream captured audio to the transcription daemon and show the text it sends back."""
+        resampler = StreamingResampler(self.sample_rate)
+
+        def on_event(event):
+            kind = event.get('type')
+            if kind == 'partial':
+                self.ui.post("partial_transcript", event['text'])
+            elif kind == 'final':
+                self.last_speech_time = time.perf_counter()
+                self.add_final_text(event['text'])
+            elif kind == 'utterance_end':
+                with self.transcript_lock:
+                    self.utterance_id += 1
+            elif kind == 'done' and self.verbose:
+                print(f"VAD (daemon): {event.get('speech_ratio', 0):.0%} of audio sent to Whisper")
+
+        stream = self.daemon.stream(on_event, model=self.selected_whisper_model, language="en")
+        try:
+            while self.is_listening and not stream.done.is_set():
+                time.sleep(step_duration)
+                if reader.available() > 0:
+                    with self.tracer.span(turn, "resample"):
+                        audio_data = pcm16_to_float32(reader.read(), self.sample_rate, resampler)
+                    stream.send_audio(audio_data)
+                if stream.silence_seconds >= max_silence_seconds:
+                    self.ui.post("update_status", "Silence detected, stopping...", "#ffaa00")
+                    self.ui.post("stop_dictation")
+                    break
 
-            self.root.after(0, lambda: self.update_status("Ready", "black"))
+            self.ui.post("update_status", "🔍 Finalizing...", "#ffaa00")
+            with self.tracer.span(turn, "finalize"):
+                with self.tracer.span(turn, "resample"):
+                    audio_data = pcm16_to_float32(reader.read(), self.sample_rate, resampler)
+                    audio_data = np.concatenate([audio_data, resampler.flush()])
+                stream.send_audio(audio_data)
+                stream.finish()  # Waits for the daemon's last text
+        finally:
+            stream.close()
+        if stream.error is not None:
+            self.ui.post("update_transcript", f"[Daemon error: {stream.error}]")
+
+    def add_final_text(self, text, draft=False):
+        """Record committed text for the current utterance and show it."""
+        with self.transcript_lock:
+            utterance_id = self.utterance_id
+            self.utterance_texts[utterance_id] = self.utterance_texts.get(utterance_id, "") + text + " "
+            self.current_text = self.join_utterances()
+        self.ui.post("final_transcript", text, utterance_id, draft)
+
+    def end_utterance(self, audio, two_pass=False):
+        """Start a new utterance; with two passes, queue the finished one for re-decoding."""
+        with self.transcript_lock:
+            utterance_id = self.utterance_id
+            self.utterance_id += 1
+        if two_pass and audio is not None:
+            self.refine_queue.put((utterance_id, audio))
+
+    def refine_worker(self):
+        """Re-decode finished utterances with the selected (larger) model, one at a time."""
+        while True:
+            utterance_id, audio = self.refine_queue.get()
+            try:
+                if self.model is None:
+                    self.ui.post("update_status", "Refinement skipped - Whisper model not loaded, keeping draft text", "orange")
+                    continue
+                segments = self.transcribe_audio(audio, language="en", beam_size=5)
+                text = " ".join(segment.text.strip() for segment in segments).strip()
+                if text:
+                    self.ui.post("replace_transcript", utterance_id, text)
+            except Exception as e:
+                print(f"Refinement failed for utterance {utterance_id}: {e}")
+
+    def join_utterances(self):
+        """The transcript in utterance order; call with ``transcript_lock`` held."""
+        return "".join(self.utterance_texts[i] for i in sorted(self.utterance_texts))
+
+    def replace_utterance(self, utterance_id, text):
+        """Swap an utterance's draft text for the refined transcript in place, or add it if the draft was empty."""
+        with self.transcript_lock:
+            if utterance_id < self.transcript_first_id:
+                return  # Cleared or a new dictation started meanwhile
+            self.utterance_texts[utterance_id] = text + " "
+            self.current_text = self.join_utterances()
+            later = [i for i in self.utterance_texts if i > utterance_id]
+
+        tag = f"utt{utterance_id}"
+        ranges = self.text_area.tag_ranges(tag)
+        if ranges:
+            start = ranges[0]
+            self.text_area.delete(start, ranges[-1])
+        else:
+            # No draft text: insert before the next utterance shown, or before the partial tail
+            start = tk.END
+            for i in sorted(later):
+                next_ranges = self.text_area.tag_ranges(f"utt{i}")
+                if next_ranges:
+                    start = next_ranges[0]
+                    break
+            else:
+                if self.text_area.tag_ranges("partial"):
+                    start = "partial.first"
+        self.text_area.insert(start, f"{text} ", (tag,))
 
-        except Exception as e:
-            self.queue.put(("show_error", f"Recognition error: {e}"))
-            self.queue.put(("stop_dictation",))
+        if not self.is_listening and self.current_text.strip():
+            pyperclip.copy(self.current_text.strip())
 
     def update_transcript(self, text):
         self.text_area.insert(tk.END, f"{text}\n")
         self.text_area.see(tk.END)
-        self.root.update_idletasks()
 
 def main():
     try:
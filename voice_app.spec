@@ -8,13 +8,13 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
+    # faster_whisper, scipy.signal, pygame, edge_tts and gtts are imported lazily
     hiddenimports=[
         'faster_whisper',
-        'torch',
-        'torch.nn',
-        'torch.optim',
-        'scipy',
+        'ctranslate2',
+        'scipy.signal',
         'pygame',
+        'edge_tts',
         'PIL',
         'pyperclip',
         'pyaudio',
@@ -35,7 +35,8 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Devices are detected through CTranslate2, torch is not needed at runtime
+    excludes=['torch', 'torchvision', 'torchaudio'],
     cipher=block_cipher,
     noarchive=False,
 )
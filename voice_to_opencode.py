@@ -6,7 +6,8 @@ This script provides offline speech recognition that copies transcribed text
 to the clipboard for easy integration with OpenCode editor.
 
 Features:
-- Offline speech recognition using PocketSphinx
+- Offline speech recognition using PocketSphinx, or Whisper through the
+  transcription daemon (python voice2text.py daemon) when it is running
 - Clipboard integration
 - Hotkey support (Ctrl+Shift+V to start/stop)
 - Real-time transcription display
@@ -29,6 +30,7 @@ import json
 import keyboard
 import pyaudio
 import re
+from daemon_client import DEFAULT_URL as DAEMON_URL, DaemonClient
 
 class VoiceToOpenCode:
     def __init__(self):
@@ -38,6 +40,12 @@ class VoiceToOpenCode:
         self.config_file = 'voice_config.json'
         self.config = self.load_config()
 
+        # Whisper through the transcription daemon if one is running, PocketSphinx otherwise;
+        # set transcription_daemon to "" to always use PocketSphinx
+        self.daemon_url = self.config.get('transcription_daemon', DAEMON_URL)
+        self.daemon = DaemonClient(self.daemon_url) if self.daemon_url else None
+        self.use_daemon = self.daemon is not None and self.daemon.health() is not None
+
         # Audio setup
         self.audio = pyaudio.PyAudio()
         self.microphones = self.get_microphones()
@@ -49,6 +57,7 @@ class VoiceToOpenCode:
         for i, mic in enumerate(self.microphones):
             print(f"  {i}: {mic}")
         print(f"Selected microphone: {self.selected_mic_index}")
+        print(f"Recognizer: {'Whisper daemon at ' + self.daemon.url if self.use_daemon else 'PocketSphinx'}")
         print("\nControls:")
         print("  Ctrl+Shift+V: Start/Stop listening")
         print("  Ctrl+C: Exit")
@@ -66,7 +75,8 @@ class VoiceToOpenCode:
 
     def save_config(self):
         config = {
-            'microphone_index': self.selected_mic_index
+            'microphone_index': self.selected_mic_index,
+            'transcription_daemon': self.daemon_url
         }
         try:
             with open(self.config_file, 'w') as f:
@@ -119,8 +129,12 @@ class VoiceToOpenCode:
                         audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=10)
 
                         print("🔍 Recognizing...")
-                        # Use offline PocketSphinx for recognition
-                        text = self.recognizer.recognize_sphinx(audio)
+                        if self.use_daemon:
+                            text = self.daemon.transcribe(audio.get_wav_data(convert_rate=16000, convert_width=2),
+                                                          language='en')
+                        else:
+                            # Use offline PocketSphinx for recognition
+                            text = self.recognizer.recognize_sphinx(audio)
 
                         if text:
                             self.current_text += text + " "
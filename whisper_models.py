@@ -0,0 +1,203 @@
+"""
+Whisper model catalogue and an in-memory cache of loaded models.
+
+Keeps several WhisperModel instances resident under a RAM budget so that
+switching back to a recently used model is instant. When the budget is
+exceeded the least recently used models are dropped, except those the
+caller has pinned as still in use.
+"""
+
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+WHISPER_MODELS = ["tiny", "base", "small", "medium", "large-v2", "large-v3"]
+
+# Model sizes in MB and estimated download times in minutes (assuming 1 MB/s)
+WHISPER_MODEL_INFO = {
+    "tiny": {"size": 39, "eta": 1},
+    "base": {"size": 74, "eta": 1},
+    "small": {"size": 244, "eta": 4},
+    "medium": {"size": 769, "eta": 13},
+    "large-v2": {"size": 1550, "eta": 26},
+    "large-v3": {"size": 1550, "eta": 26}
+}
+
+
+_device = None
+
+
+def detect_device():
+    """
+    Return "cuda" when CTranslate2 can see a CUDA device, otherwise "cpu".
+
+    Asks CTranslate2 (already a faster-whisper dependency) instead of
+    importing torch, and remembers the answer.
+    """
+    global _device
+    if _device is None:
+        try:
+            import ctranslate2
+            _device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        except Exception:
+            _device = "cpu"
+    return _device
+
+
+def create_whisper_model(name, device="cpu", compute_type="int8", cpu_threads=4, num_workers=1):
+    """Construct a faster-whisper model with explicit CTranslate2 settings."""
+    from faster_whisper import WhisperModel
+    return WhisperModel(
+        name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=cpu_threads,
+        num_workers=num_workers
+    )
+
+
+def process_rss_mb():
+    """Resident set size of this process in MB, or None if it cannot be read."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class CachedModel:
+    def __init__(self, name, model, footprint_mb, device):
+        self.name = name
+        self.model = model
+        self.footprint_mb = footprint_mb
+        self.device = device
+        self.loaded_at = time.time()
+
+
+class WhisperModelRegistry:
+    """LRU cache of loaded Whisper models with a memory budget."""
+
+    def __init__(self, budget_mb=2048):
+        """
+        :param budget_mb: Total RAM the cached models may use. The most recently
+            used model and pinned models are always kept, even if they alone
+            exceed the budget.
+        """
+        self.budget_mb = budget_mb
+        self._models = OrderedDict()
+        self._pins = {}  # role -> name of a model the caller still references
+        self._load_locks = {}  # name -> lock held while that model is created
+        self._lock = threading.RLock()
+
+    def pin(self, role, name):
+        """
+        Mark ``name`` as in use as ``role`` (e.g. "active"); ``name=None`` clears the role.
+
+        Pinned models are never evicted: the caller still references them, so
+        dropping them from the cache would not free any memory.
+        """
+        with self._lock:
+            if name is None:
+                self._pins.pop(role, None)
+            else:
+                self._pins[role] = name
+
+    def get(self, name):
+        """Return the cached model and mark it as most recently used, or None."""
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is None:
+                return None
+            self._models.move_to_end(name)
+            return entry.model
+
+    def load(self, name, loader, device="cpu", pin=None):
+        """
+        Return the cached model, or create it with ``loader()`` and cache it.
+
+        Older models are evicted first if the estimated size of the new one
+        would not fit, so two large models are not resident at once. Callers
+        asking for the same model at once share a single ``loader()`` call.
+
+        :param pin: Role to pin the model under (see ``pin``), set atomically
+            so the model cannot be evicted before the caller has pinned it.
+        """
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+        with load_lock:
+            with self._lock:
+                model = self.get(name)
+                if model is not None:
+                    if pin is not None:
+                        self._pins[pin] = name
+                    return model
+                estimate = WHISPER_MODEL_INFO.get(name, {}).get("size", 0)
+                self._evict(self.budget_mb - estimate)
+
+            rss_before = process_rss_mb()
+            model = loader()
+            rss_after = process_rss_mb()
+
+            footprint = estimate
+            if device == "cpu" and rss_before is not None and rss_after is not None and rss_after > rss_before:
+                footprint = rss_after - rss_before
+
+            with self._lock:
+                self._models[name] = CachedModel(name, model, footprint, device)
+                self._models.move_to_end(name)
+                if pin is not None:
+                    self._pins[pin] = name
+                self._evict(self.budget_mb, keep=name)
+            return model
+
+    def unload(self, name):
+        """Drop a model from the cache. Returns True if it was cached."""
+        with self._lock:
+            entry = self._models.pop(name, None)
+        if entry is None:
+            return False
+        del entry
+        gc.collect()
+        return True
+
+    def unload_all(self, keep=()):
+        """Drop every cached model except those named in ``keep``; returns the names dropped."""
+        with self._lock:
+            names = [name for name in self._models if name not in keep]
+        for name in names:
+            self.unload(name)
+        return names
+
+    def footprints(self):
+        """``{name: MB}`` for cached models, least recently used first."""
+        with self._lock:
+            return {name: entry.footprint_mb for name, entry in self._models.items()}
+
+    def total_mb(self):
+        with self._lock:
+            return sum(entry.footprint_mb for entry in self._models.values())
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._models
+
+    def _evict(self, limit_mb, keep=None):
+        protected = set(self._pins.values()) | {keep}
+        evicted = False
+        while self.total_mb() > limit_mb:
+            oldest = next((name for name in self._models if name not in protected), None)
+            if oldest is None:
+                break
+            entry = self._models.pop(oldest)
+            print(f"Evicting Whisper model {oldest} ({entry.footprint_mb:.0f} MB)")
+            evicted = True
+        if evicted:
+            gc.collect()
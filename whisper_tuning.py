@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Hardware calibration for CTranslate2 Whisper settings.
+
+Benchmarks a clip across compute types and ``cpu_threads`` and returns the
+fastest combination for the machine. A recording of real speech (``--audio``)
+gives the most faithful numbers; otherwise a built-in voice-like clip is
+used. Decoding is greedy and capped at a fixed number of tokens, so every
+configuration does about the same amount of work even when the model
+hallucinates on the clip; tokens/s is reported next to the times.
+
+Results are stored per model and device in the app config
+(``whisper_tuning``) and used by ``load_whisper_model``. With
+``--concurrency N`` it also checks whether ``num_workers`` helps N parallel
+streams; that result is stored separately and only used by the
+transcription daemon.
+
+Usage:
+python whisper_tuning.py [model ...] [--audio speech.wav] [--concurrency N]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+CPU_COMPUTE_TYPES = ["int8", "int8_float32", "float32"]
+CUDA_COMPUTE_TYPES = ["int8_float16", "float16", "int8"]
+CALIBRATION_TOKENS = 48  # Decode cap per clip
+
+# Greedy, with no temperature fallback, no timestamps and a cap, so a clip the model
+# hallucinates on cannot make one configuration decode far more than another
+DECODE_OPTIONS = {"language": "en", "beam_size": 1, "temperature": 0.0, "without_timestamps": True,
+                  "condition_on_previous_text": False, "max_new_tokens": CALIBRATION_TOKENS}
+
+SETTING_KEYS = ("compute_type", "cpu_threads", "num_workers")
+
+
+def tuning_key(model_name, device):
+    return f"{model_name}:{device}"
+
+
+def tuned_settings(tuning, model_name, device, concurrent=False):
+    """
+    ``create_whisper_model`` keyword arguments for a model: defaults updated with its calibration.
+
+    :param concurrent: Use the settings calibrated for parallel streams, if there are any.
+    """
+    settings = default_settings(device)
+    entry = tuning.get(tuning_key(model_name, device), {})
+    settings.update({k: v for k, v in entry.items() if k in SETTING_KEYS})
+    if concurrent:
+        settings.update({k: v for k, v in entry.get("concurrent", {}).items() if k in SETTING_KEYS})
+    return settings
+
+
+def default_settings(device):
+    """Settings used until a model has been calibrated."""
+    if device == "cuda":
+        return {"compute_type": "int8", "cpu_threads": 1, "num_workers": 1}
+    # One thread per physical core is a good start; cpu_count() reports logical cores
+    return {"compute_type": "int8", "cpu_threads": max(1, (os.cpu_count() or 2) // 2), "num_workers": 1}
+
+
+def calibration_clip(seconds=5.0, sample_rate=16000):
+    """
+    A deterministic voice-like test signal: a gliding harmonic tone with a
+    syllable-rate amplitude envelope. It exercises the encoder the same way
+    real speech does, which is where thread and precision settings matter.
+    """
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pitch = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    noise = np.random.default_rng(0).standard_normal(len(t)) * 0.01
+    return (0.2 * voice * envelope + noise).astype(np.float32)
+
+
+def thread_candidates(cores=None):
+    cores = cores or os.cpu_count() or 1
+    candidates = {cores, max(1, cores // 2)}
+    n = 1
+    while n < cores:
+        candidates.add(n)
+        n *= 2
+    return sorted(candidates)
+
+
+def supported_compute_types(device):
+    wanted = CUDA_COMPUTE_TYPES if device == "cuda" else CPU_COMPUTE_TYPES
+    try:
+        import ctranslate2
+        available = ctranslate2.get_supported_compute_types(device)
+    except Exception:
+        return ["int8"]
+    return [c for c in wanted if c in available] or ["int8"]
+
+
+def load_clip(path, seconds=30.0):
+    """The first ``seconds`` of an audio file as 16 kHz mono float32, for ``calibrate(clip=...)``."""
+    from faster_whisper import decode_audio
+    return decode_audio(path)[:int(seconds * 16000)]
+
+
+def _time_transcribe(model, clip, concurrency=1, repeat=2):
+    """Best wall-clock time to transcribe ``concurrency`` clips in parallel, and the tokens decoded per clip."""
+    tokens = []
+
+    def run():
+        segments, _ = model.transcribe(clip, **DECODE_OPTIONS)
+        tokens.append(sum(len(segment.tokens) for segment in segments))
+
+    best = float('inf')
+    for _ in range(repeat):
+        threads = [threading.Thread(target=run) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        best = min(best, time.perf_counter() - start)
+    return best, max(tokens)
+
+
+def calibrate(model_name, device="cpu", progress=None, concurrency=1, clip=None):
+    """
+    Find the fastest settings for ``model_name`` on ``device``.
+
+    Searches compute type and thread count for single-stream latency, which
+    is what dictation needs. With ``concurrency`` > 1 it then checks whether
+    splitting the threads across that many workers gives better throughput
+    for parallel streams, as the transcription daemon serves them.
+
+    :param progress: Optional callable ``progress(done, total, message)``.
+    :param concurrency: Number of parallel streams to tune ``num_workers`` for.
+    :param clip: 16 kHz float32 speech to time (see ``load_clip``), or None for the built-in clip.
+    :return: Dict with ``compute_type``, ``cpu_threads``, ``num_workers`` (always 1),
+        ``seconds`` (single-stream time of the clip) and ``tokens_per_second``;
+        with ``concurrency`` > 1, a ``concurrent`` dict with the thread and
+        worker counts for parallel streams.
+    """
+    from whisper_models import create_whisper_model
+
+    if clip is None:
+        clip = calibration_clip()
+    compute_types = supported_compute_types(device)
+    threads = [1] if device == "cuda" else thread_candidates()
+    configs = [(c, n) for c in compute_types for n in threads]
+    total = len(configs) + (1 if concurrency > 1 else 0)
+
+    results = []
+    for i, (compute_type, cpu_threads) in enumerate(configs):
+        if progress:
+            progress(i, total, f"{compute_type}, {cpu_threads} threads")
+        try:
+            model = create_whisper_model(model_name, device, compute_type, cpu_threads)
+            _time_transcribe(model, clip, repeat=1)  # Warm-up
+            seconds, tokens = _time_transcribe(model, clip)
+            results.append((seconds, compute_type, cpu_threads, tokens))
+            print(f"  {compute_type:>13} {cpu_threads:>3} threads: {seconds * 1000:.0f} ms, "
+                  f"{tokens} tokens ({tokens / seconds:.1f} tok/s)")
+        except Exception as e:
+            print(f"  {compute_type:>13} {cpu_threads:>3} threads: failed ({e})")
+        finally:
+            model = None
+
+    if not results:
+        raise RuntimeError(f"No usable configuration for {model_name} on {device}")
+
+    seconds, compute_type, cpu_threads, tokens = min(results)
+    best = {"compute_type": compute_type, "cpu_threads": cpu_threads, "num_workers": 1,
+            "seconds": round(seconds, 3), "tokens_per_second": round(tokens / seconds, 1)}
+
+    if concurrency > 1:
+        if progress:
+            progress(total - 1, total, f"num_workers for {concurrency} streams")
+        best["concurrent"] = {"cpu_threads": cpu_threads, "num_workers": 1, "concurrency": concurrency}
+        workers = min(concurrency, cpu_threads)
+        if device == "cpu" and workers > 1:
+            try:
+                single = create_whisper_model(model_name, device, compute_type, cpu_threads, num_workers=1)
+                one_worker, _ = _time_transcribe(single, clip, concurrency=concurrency)
+                single = None
+                split = create_whisper_model(model_name, device, compute_type, cpu_threads // workers,
+                                             num_workers=workers)
+                split_workers, _ = _time_transcribe(split, clip, concurrency=concurrency)
+                split = None
+                print(f"  {concurrency} streams: 1 worker {one_worker * 1000:.0f} ms, "
+                      f"{workers} workers {split_workers * 1000:.0f} ms")
+                if split_workers < one_worker * 0.9:
+                    best["concurrent"].update(cpu_threads=cpu_threads // workers, num_workers=workers)
+            except Exception as e:
+                print(f"  num_workers check failed: {e}")
+
+    if progress:
+        progress(total, total, "done")
+    return best
+
+
+def main():
+    from whisper_models import detect_device
+
+    config_file = os.path.expanduser('~/.voice_config.json')
+    config = {}
+    if os.path.exists(config_file):
+        with open(config_file, 'r') as f:
+            config = json.load(f)
+
+    parser = argparse.ArgumentParser(description="Calibrate CTranslate2 settings for Whisper models")
+    parser.add_argument('models', nargs='*', help='Models to calibrate (default: the selected one)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Also tune num_workers for this many parallel streams (transcription daemon)')
+    parser.add_argument('--audio', help='Recording of speech to time (default: a built-in voice-like clip)')
+    args = parser.parse_args()
+    clip = load_clip(args.audio) if args.audio else None
+
+    device = detect_device()
+    models = args.models or [config.get('whisper_model', 'tiny')]
+    tuning = config.setdefault('whisper_tuning', {})
+    for name in models:
+        print(f"Calibrating {name} on {device}...")
+        best = calibrate(name, device, concurrency=args.concurrency, clip=clip)
+        tuning[tuning_key(name, device)] = best
+        print(f"✅ {name}: {best}")
+
+    with open(config_file, 'w') as f:
+        json.dump(config, f)
+    print(f"Saved to {config_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Minimal WebSocket (RFC 6455) framing for the local transcription daemon.
+
+Only what the daemon and its clients need: the opening handshake on both
+sides, text and binary messages (with fragmentation), ping/pong and close.
+No extensions or subprotocols, and no TLS - the daemon listens on localhost.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import socket
+import struct
+import threading
+from urllib.parse import urlsplit
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class WebSocketError(Exception):
+    pass
+
+
+def accept_key(key):
+    """``Sec-WebSocket-Accept`` value for a client's ``Sec-WebSocket-Key``."""
+    digest = hashlib.sha1((key + GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def _read_exact(rfile, n):
+    data = rfile.read(n)
+    if data is None or len(data) < n:
+        raise ConnectionError("WebSocket connection closed")
+    return data
+
+
+class WebSocket:
+    """
+    A connected WebSocket over buffered socket files.
+
+    :param rfile: Binary file to read frames from.
+    :param wfile: Binary file to write frames to.
+    :param client: True on the client side, whose frames must be masked.
+    """
+
+    def __init__(self, rfile, wfile, client=False, sock=None):
+        self.rfile = rfile
+        self.wfile = wfile
+        self.client = client
+        self.sock = sock
+        self.closed = False
+        self._send_lock = threading.Lock()
+
+    def _send_frame(self, opcode, payload):
+        header = bytearray([0x80 | opcode])
+        mask_bit = 0x80 if self.client else 0
+        length = len(payload)
+        if length < 126:
+            header.append(mask_bit | length)
+        elif length < 1 << 16:
+            header.append(mask_bit | 126)
+            header += struct.pack('!H', length)
+        else:
+            header.append(mask_bit | 127)
+            header += struct.pack('!Q', length)
+        if self.client:
+            mask = os.urandom(4)
+            header += mask
+            payload = _mask(payload, mask)
+        with self._send_lock:
+            self.wfile.write(bytes(header) + payload)
+            self.wfile.flush()
+
+    def _read_frame(self):
+        b0, b1 = _read_exact(self.rfile, 2)
+        fin = bool(b0 & 0x80)
+        opcode = b0 & 0x0F
+        length = b1 & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', _read_exact(self.rfile, 2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', _read_exact(self.rfile, 8))[0]
+        if length > MAX_MESSAGE_BYTES:
+            raise WebSocketError(f"Frame of {length} bytes is too large")
+        mask = _read_exact(self.rfile, 4) if b1 & 0x80 else None
+        payload = _read_exact(self.rfile, length)
+        if mask:
+            payload = _mask(payload, mask)
+        return fin, opcode, payload
+
+    def send_text(self, text):
+        self._send_frame(OP_TEXT, text.encode('utf-8'))
+
+    def send_json(self, obj):
+        self.send_text(json.dumps(obj))
+
+    def send_binary(self, data):
+        self._send_frame(OP_BINARY, bytes(data))
+
+    def receive(self):
+        """
+        Next message: ``str`` for text, ``bytes`` for binary, None once closed.
+
+        Pings are answered and control frames are handled here.
+        """
+        message = bytearray()
+        message_opcode = None
+        while True:
+            try:
+                fin, opcode, payload = self._read_frame()
+            except (ConnectionError, OSError):
+                self.closed = True
+                return None
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    self.closed = True
+                    try:
+                        self._send_frame(OP_CLOSE, payload[:2])
+                    except OSError:
+                        pass
+                return None
+            if opcode == OP_PING:
+                self._send_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            message += payload
+            if len(message) > MAX_MESSAGE_BYTES:
+                raise WebSocketError("Message is too large")
+            if fin:
+                if message_opcode == OP_TEXT:
+                    return message.decode('utf-8')
+                return bytes(message)
+
+    def close(self, code=1000):
+        if not self.closed:
+            self.closed = True
+            try:
+                self._send_frame(OP_CLOSE, struct.pack('!H', code))
+            except OSError:
+                pass
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+
+def _mask(payload, mask):
+    """XOR ``payload`` with the repeating 4-byte ``mask``, as one big-integer operation."""
+    n = len(payload)
+    if not n:
+        return b""
+    key = int.from_bytes((mask * (n // 4 + 1))[:n], 'big')
+    return (int.from_bytes(payload, 'big') ^ key).to_bytes(n, 'big')
+
+
+def connect(url, timeout=5.0):
+    """
+    Open a client connection to a ``ws://host:port/path?query`` URL.
+
+    :return: A connected ``WebSocket``.
+    """
+    parts = urlsplit(url)
+    if parts.scheme != 'ws':
+        raise WebSocketError(f"Unsupported URL scheme: {parts.scheme}")
+    host = parts.hostname or '127.0.0.1'
+    port = parts.port or 80
+    path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+    sock = socket.create_connection((host, port), timeout=timeout)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    key = base64.b64encode(os.urandom(16)).decode('ascii')
+    request = (f"GET {path} HTTP/1.1\r\n"
+               f"Host: {host}:{port}\r\n"
+               "Upgrade: websocket\r\n"
+               "Connection: Upgrade\r\n"
+               f"Sec-WebSocket-Key: {key}\r\n"
+               "Sec-WebSocket-Version: 13\r\n\r\n")
+    sock.sendall(request.encode('ascii'))
+    rfile = sock.makefile('rb')
+    status = rfile.readline().decode('latin-1')
+    headers = {}
+    while True:
+        line = rfile.readline().decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if ' 101 ' not in status or headers.get('sec-websocket-accept') != accept_key(key):
+        sock.close()
+        raise WebSocketError(f"Handshake failed: {status.strip()}")
+    sock.settimeout(None)
+    return WebSocket(rfile, sock.makefile('wb'), client=True, sock=sock)